@@ -0,0 +1,711 @@
+import asyncio
+import itertools
+import random
+import secrets
+import struct
+from collections import deque
+
+import protocol
+import simulation
+from consts import *
+
+
+class Outbox:
+    """
+    Send queue of one connection, so a slow player only delays what is sent to them
+    Control messages are sent in order, of the positions and snapshots only the newest waits
+    """
+    def __init__(self, writer, limit=SEND_LIMIT):
+        self.writer = writer
+        self.limit = limit
+
+        self.control = deque()
+        self.size = 0
+        self.latest = None
+        self.pending = asyncio.Event()
+        self.task = asyncio.create_task(self.run())
+
+    def put(self, data):
+        """
+        Queue a control message, a player who let the limit fill up is disconnected
+        """
+        if self.size + len(data) > self.limit:
+            self.close()
+            return
+
+        self.control.append(data)
+        self.size += len(data)
+        self.pending.set()
+
+    def replace(self, data):
+        """
+        Queue positions, replacing positions not sent yet
+        """
+        self.latest = data
+        self.pending.set()
+
+    async def run(self):
+        """
+        Hand queued data to the transport whenever it drained below its limit
+        """
+        try:
+            while True:
+                await self.pending.wait()
+                self.pending.clear()
+
+                data = b''.join(self.control) + (self.latest or b'')
+                self.control.clear()
+                self.size = 0
+                self.latest = None
+
+                self.writer.write(data)
+                await self.writer.drain()
+        except ConnectionError:
+            self.close()
+
+    def close(self):
+        """
+        Stop sending, the reader of this connection sees it closed
+        """
+        self.task.cancel()
+        self.writer.close()
+
+
+class Player:
+    """
+    Simplify interaction with player client over asyncio streams
+    """
+    def __init__(self, reader, writer, color, datagrams=None):
+        self.reader = reader
+        self.writer = writer
+        self.color = color
+        self.score = 0
+
+        # positions wait in the outbox, where newer ones replace them, instead of in the transport buffer
+        writer.transport.set_write_buffer_limits(0)
+        self.outbox = Outbox(writer)
+
+        self.binary = False
+        self.acked = 0
+        self.sent = 0
+        self.ready = None
+
+        self.datagrams = datagrams
+        self.token = None
+        self.address = None
+        self.room = None
+        self.seen = 0  # loop time of the last datagram
+
+    async def handshake(self):
+        self.send(f'{self.color}')
+        self.binary = protocol.negotiate(await self.recv())  # ACK
+        if self.binary:
+            self.outbox.put(protocol.CONFIRM)
+
+            if self.datagrams is not None:
+                self.token = self.datagrams.register(self)
+                self.send_frame(protocol.MSG_TOKEN, protocol.TOKEN.pack(self.token, self.datagrams.port))
+
+    async def request_difficulty(self):
+        """
+        Ask the player to choose the difficulty
+        """
+        if self.binary:
+            self.send_frame(protocol.MSG_DIFF)
+            msg_type, payload = await self.recv_frame()
+            try:
+                return protocol.LEVEL.unpack(payload)[0]
+            except struct.error:
+                raise self.malformed(payload)
+
+        # string clients send nothing while the player chooses
+        self.send(DIFF)
+        data = await self.recv(timeout=None)
+        try:
+            return int(data)
+        except ValueError:
+            raise self.malformed(data)
+
+    async def begin(self, level):
+        if self.binary:
+            self.send_frame(protocol.MSG_BEGIN, protocol.LEVEL.pack(level))
+            await self.recv_frame()  # ACK
+        else:
+            self.send(f'{BEGIN}:{level}')
+            await self.recv()  # ACK
+
+    def send_positions(self, positions):
+        if self.binary:
+            self.outbox.replace(protocol.frame(protocol.MSG_POSITIONS, protocol.encode_positions(positions)))
+        else:
+            self.outbox.replace(protocol.string_positions(positions).encode())
+
+    def send_snapshot(self, snapshots, state=b''):
+        """
+        Send the latest snapshot as a delta against the one this player acknowledged, followed by the
+        frame of its own state in a simulated room
+        Over UDP once the player sent a datagram from its address, otherwise replacing the snapshot
+        still waiting for a slow connection, its base stays acknowledged so the delta remains valid
+        A player who has not acknowledged the last SNAPSHOT_WINDOW snapshots sent to it only gets a full
+        snapshot every SNAPSHOT_STALLED ticks, lost acks over UDP must not stop its snapshots for good
+        """
+        base = self.acked
+        if self.acked and self.sent - self.acked > SNAPSHOT_WINDOW:
+            if snapshots.seq - self.sent < SNAPSHOT_STALLED:
+                return
+            base = 0
+        self.sent = snapshots.seq
+
+        if self.address is not None:
+            self.datagrams.sendto(snapshots.encode(base) + state, self.address)
+        else:
+            self.outbox.replace(snapshots.encode(base) + state)
+
+    def send_scores(self, scores):
+        if self.binary:
+            self.send_frame(protocol.MSG_SCORES, protocol.encode_scores(scores))
+        else:
+            self.send(protocol.string_scores(scores))
+
+    async def recv_update(self):
+        """
+        Receive the player's reply to positions, as (POS | DONE | QUIT, (level, x, y))
+        or, in tick mode, as (SCORE, score), (ACK, snapshot sequence) and (INPUT, (input sequence, keys))
+        A closed or silent connection, or a reply which does not parse, counts as QUIT
+        """
+        try:
+            if self.binary:
+                return self.parse_frame(*await self.recv_frame())
+
+            data = await self.recv()
+            if QUIT in data and not data.startswith(DONE):
+                return QUIT, None
+            try:
+                return DONE if data.startswith(DONE) else POS, protocol.parse_string_position(data)
+            except (ValueError, IndexError):
+                raise self.malformed(data)
+        except ConnectionError:
+            return QUIT, None
+
+    @staticmethod
+    def parse_frame(msg_type, payload):
+        """
+        Binary reply as (kind, value), unknown frames count as QUIT
+        """
+        if msg_type == protocol.MSG_POS:
+            return POS, protocol.decode_position(payload)
+        elif msg_type == protocol.MSG_DONE:
+            return DONE, protocol.decode_position(payload)
+        elif msg_type == protocol.MSG_SCORE:
+            return SCORE, protocol.decode_score(payload)
+        elif msg_type == protocol.MSG_SNAPSHOT_ACK:
+            return ACK, protocol.SEQUENCE.unpack(payload)[0]
+        elif msg_type == protocol.MSG_INPUT:
+            return INPUT, protocol.INPUT.unpack(payload)
+        return QUIT, None
+
+    async def recv_score(self):
+        if self.binary:
+            return protocol.decode_score((await self.recv_frame())[1])
+        data = await self.recv()
+        try:
+            return int(data)
+        except ValueError:
+            raise self.malformed(data)
+
+    def send(self, msg):
+        self.outbox.put(msg.encode())
+
+    async def recv(self, size=SIZE, timeout=READ_TIMEOUT):
+        try:
+            data = await asyncio.wait_for(self.reader.read(size), timeout)
+        except asyncio.TimeoutError:
+            raise ConnectionError(f'{self.color} timed out')
+
+        if not data:
+            raise ConnectionError(f'{self.color} disconnected')
+        try:
+            return data.decode()
+        except UnicodeDecodeError:
+            raise self.malformed(data)
+
+    def malformed(self, data):
+        """
+        The error evicting a player who sent something which does not parse, as if it disconnected
+        """
+        print(f'{self.color} sent malformed data {data[:32]!r}, disconnecting')
+        return ConnectionError(f'{self.color} sent malformed data')
+
+    def send_frame(self, msg_type, payload=b''):
+        self.outbox.put(protocol.frame(msg_type, payload))
+
+    async def recv_frame(self):
+        """
+        Receive the next whole (type, payload) frame, skipping heartbeats
+        """
+        while True:
+            length, = protocol.LENGTH.unpack(await self.read(protocol.LENGTH.size))
+            body = await self.read(length)
+
+            if body[0] != protocol.MSG_HEARTBEAT:
+                return body[0], body[1:]
+
+    async def read(self, size):
+        """
+        Read exactly size bytes, a player heard from neither over TCP nor UDP for READ_TIMEOUT is disconnected
+        """
+        loop = asyncio.get_running_loop()
+        while True:
+            try:
+                return await asyncio.wait_for(self.reader.readexactly(size), READ_TIMEOUT)
+            except asyncio.IncompleteReadError:
+                raise ConnectionError(f'{self.color} disconnected')
+            except asyncio.TimeoutError:
+                if loop.time() - self.seen >= READ_TIMEOUT:
+                    raise ConnectionError(f'{self.color} timed out')
+
+    def close(self):
+        if self.token is not None:
+            self.datagrams.unregister(self.token)
+        self.outbox.close()
+
+
+class Spectator:
+    """
+    Read-only connection streaming a room, every spectator receives the same full snapshot
+    """
+    def __init__(self, reader, writer):
+        self.reader = reader
+        self.writer = writer
+
+        writer.transport.set_write_buffer_limits(0)
+        self.outbox = Outbox(writer)
+
+    async def recv_watch(self):
+        """
+        Receive the id of the room to watch, 0 for the newest
+        """
+        try:
+            length, = protocol.LENGTH.unpack(await asyncio.wait_for(self.reader.readexactly(protocol.LENGTH.size),
+                                                                    READ_TIMEOUT))
+            body = await asyncio.wait_for(self.reader.readexactly(length), READ_TIMEOUT)
+        except (asyncio.IncompleteReadError, asyncio.TimeoutError):
+            raise ConnectionError('spectator disconnected')
+
+        if body[0] != protocol.MSG_WATCH:
+            raise ConnectionError('not a spectator')
+        return protocol.ROOM.unpack(body[1:])[0]
+
+    def send_snapshot(self, snapshots):
+        self.outbox.replace(snapshots.encode(0))
+
+    def send_frame(self, data):
+        self.outbox.put(data)
+
+    async def wait_closed(self):
+        """
+        Ignore anything the spectator sends until it disconnects
+        """
+        while await self.reader.read(SIZE):
+            pass
+
+    def close(self):
+        self.outbox.close()
+
+
+class Datagrams(asyncio.DatagramProtocol):
+    """
+    UDP channel for positions and snapshots, which are worthless once a newer one exists
+    A datagram is tied to its player's TCP session by the token issued during the handshake
+    """
+    def __init__(self, port):
+        self.port = port
+        self.players = {}
+        self.transport = None
+
+    def connection_made(self, transport):
+        self.transport = transport
+
+    def register(self, player):
+        """
+        Issue a session token for a player
+        """
+        token = secrets.randbits(64)
+        self.players[token] = player
+        return token
+
+    def unregister(self, token):
+        self.players.pop(token, None)
+
+    def sendto(self, data, address):
+        self.transport.sendto(data, address)
+
+    def datagram_received(self, data, address):
+        """
+        Apply positions and acks, only these kinds are accepted over UDP
+        """
+        if len(data) < protocol.DATAGRAM.size:
+            return
+
+        player = self.players.get(protocol.DATAGRAM.unpack_from(data)[0])
+        if player is None or player.room is None:
+            return
+
+        player.address = address
+        player.seen = asyncio.get_running_loop().time()
+        for msg_type, payload in protocol.Decoder().feed(data[protocol.DATAGRAM.size:]):
+            kind, value = Player.parse_frame(msg_type, payload)
+            if kind in (POS, DONE, ACK):
+                player.room.apply(player, kind, value)
+
+
+class Room:
+    """
+    Interacts with all four players as tasks on the shared event loop
+    Without a tick rate every player is served ping-pong, each position message waits for the previous reply
+    With a tick rate binary players send input whenever they like and receive the same snapshot every tick,
+    delta compressed against the last snapshot each of them acknowledged, and spectators may watch
+    A simulated tick room moves binary players by the inputs they send instead of trusting their positions
+    """
+    def __init__(self, tick_rate=None, datagrams=None, simulate=False):
+        self.id = None
+        self.tick_rate = tick_rate
+        self.datagrams = datagrams
+        self.simulate = simulate
+        self.simulation = None
+        self.difficulty = 4
+        self.players = []
+        self.colors = [PURPLE, RED, GREEN, BROWN]
+        random.shuffle(self.colors)
+
+        self.positions = {
+            PURPLE: (0, .0, .0),  # (level, x, y)
+            RED: (0, .0, .0),
+            GREEN: (0, .0, .0),
+            BROWN: (0, .0, .0)
+        }
+
+        self.scores = {
+            PURPLE: 0,
+            RED: 0,
+            GREEN: 0,
+            BROWN: 0
+        }
+
+        self.listening = []
+        self.spectators = []
+        self.snapshots = protocol.SnapshotEncoder()
+        self.begun = asyncio.Event()
+        self.task = None
+
+    async def run(self):
+        """
+        Wait for every handshake, request difficulty and start game
+        Every player is closed once the room is over, however it ended
+        """
+        try:
+            # players who left while waiting for the room to fill are dropped
+            results = await asyncio.gather(*[player.ready for player in self.players], return_exceptions=True)
+            for player, result in zip(list(self.players), results):
+                if isinstance(result, Exception):
+                    player.close()
+                    self.players.remove(player)
+
+            difficulty = await self.choose_difficulty()
+            if difficulty is not None:
+                self.difficulty = difficulty
+                await self.play()
+        except ConnectionError:
+            pass
+        finally:
+            for player in self.players:
+                player.close()
+            for spectator in self.spectators:
+                spectator.close()
+
+    async def choose_difficulty(self):
+        """
+        Ask the first player still connected to choose the difficulty, the next one asked if they leave
+        None once every player left
+        """
+        while self.players:
+            player = self.players[0]
+            try:
+                return await player.request_difficulty()
+            except ConnectionError:
+                self.players.remove(player)
+                self.evict(player)
+        return None
+
+    async def play(self):
+        """
+        Track all players concurrently and wait for them to finish
+        """
+        if self.tick_rate is None:
+            await asyncio.gather(*[self.track_player(player) for player in self.players], return_exceptions=True)
+            return
+
+        # string clients cannot tell merged snapshots apart, they keep the ping-pong exchange
+        if self.simulate:
+            self.simulation = simulation.Simulation(self.difficulty)
+        self.begun.set()
+        ticker = asyncio.create_task(self.tick())
+        await asyncio.gather(*[self.listen(player) if player.binary else self.track_player(player)
+                               for player in self.players], return_exceptions=True)
+        ticker.cancel()
+
+    async def tick(self):
+        """
+        Send one consistent snapshot of the latest positions to every listening player at a fixed rate
+        """
+        loop = asyncio.get_running_loop()
+        interval = 1 / self.tick_rate
+        deadline = loop.time()
+
+        while True:
+            deadline += interval
+            await asyncio.sleep(deadline - loop.time())
+
+            # skip the ticks missed while the loop was busy instead of bursting them
+            if deadline < loop.time():
+                deadline = loop.time()
+
+            self.snapshots.push(self.positions)
+            for player in self.listening:
+                player.send_snapshot(self.snapshots, self.state(player))
+            for spectator in self.spectators:
+                spectator.send_snapshot(self.snapshots)
+
+    def state(self, player):
+        """
+        Frame of a player's authoritative state, nothing when the room is not simulated
+        """
+        if self.simulation is None:
+            return b''
+        return protocol.frame(protocol.MSG_STATE, protocol.encode_state(*self.simulation.state(player.color)))
+
+    async def watch(self, spectator):
+        """
+        Stream the room to a spectator until either leaves
+        A room which ends before its game begins closes the spectator waiting for it
+        """
+        begun = asyncio.create_task(self.begun.wait())
+        await asyncio.wait((begun, self.task), return_when=asyncio.FIRST_COMPLETED)
+        if self.task.done():
+            begun.cancel()
+            spectator.close()
+            return
+
+        spectator.send_frame(protocol.frame(protocol.MSG_BEGIN, protocol.LEVEL.pack(self.difficulty)))
+        spectator.send_frame(protocol.frame(protocol.MSG_SCORES, protocol.encode_scores(self.scores)))
+        self.spectators.append(spectator)
+
+        try:
+            await spectator.wait_closed()
+        finally:
+            self.spectators.remove(spectator)
+            spectator.close()
+
+    def update_score(self, color, score):
+        """
+        Record a player's score and show the scores to every spectator, encoded once for all of them
+        """
+        self.scores[color] = score
+        if self.spectators:
+            scores = protocol.frame(protocol.MSG_SCORES, protocol.encode_scores(self.scores))
+            for spectator in self.spectators:
+                spectator.send_frame(scores)
+
+    async def listen(self, player):
+        """
+        Apply everything a player sends as soon as it arrives, snapshots are sent by tick
+        """
+        try:
+            if self.simulation is not None:
+                self.positions[player.color] = self.simulation.join(player.color, asyncio.get_running_loop().time())
+                player.send_frame(protocol.MSG_SIMULATE)
+
+            await player.begin(self.difficulty)
+            self.listening.append(player)
+            player.room = self
+
+            while True:
+                kind, value = await player.recv_update()
+                if kind == QUIT:
+                    break
+                self.apply(player, kind, value)
+        finally:
+            player.room = None
+            if player in self.listening:
+                self.listening.remove(player)
+            self.evict(player)
+
+    def apply(self, player, kind, value):
+        """
+        Apply a reply of a listening player, received over TCP or UDP
+        Positions and scores reported to a simulated room are ignored, its players move by their inputs,
+        as fast as the simulation admits them, and score by the frames they took to reach the lounge
+        """
+        if kind == DONE:
+            # receive location in lounge, the score arrives as its own reply
+            player.send_scores(self.scores)
+            if self.simulation is None:
+                self.positions[player.color] = value
+        elif kind == SCORE:
+            if self.simulation is None:
+                self.update_score(player.color, value)
+        elif kind == ACK:
+            player.acked = max(player.acked, value)
+        elif kind == INPUT:
+            if self.simulation is not None and self.simulation.admit(player.color, value[0],
+                                                                     asyncio.get_running_loop().time()):
+                self.positions[player.color] = self.simulation.step(player.color, *value)
+                score = self.simulation.scores.get(player.color)
+                if score is not None and self.scores.get(player.color) != score:
+                    self.update_score(player.color, score)
+        elif self.simulation is None:
+            self.positions[player.color] = value
+
+    async def track_player(self, player):
+        """
+        Communicate with specific player
+        """
+        try:
+            await player.begin(self.difficulty)
+
+            while True:
+                player.send_positions(self.positions)
+                kind, position = await player.recv_update()
+
+                if kind == DONE:
+                    player.send_scores(self.scores)
+                    score = await player.recv_score()
+
+                    # receive player score and location in lounge
+                    self.update_score(player.color, score)
+                    self.positions[player.color] = position
+                    continue
+                elif kind == QUIT:
+                    break
+
+                # update positions
+                self.positions[player.color] = position
+        finally:
+            self.evict(player)
+
+    def evict(self, player):
+        """
+        Remove a player who left from the positions sent to the others, snapshots mark it absent
+        Scores of players who finished stay on the leaderboard
+        """
+        player.close()
+        self.positions.pop(player.color, None)
+        if self.simulation is not None:
+            self.simulation.leave(player.color)
+        if not self.scores.get(player.color):
+            self.scores.pop(player.color, None)
+
+    def add_player(self, reader, writer):
+        """
+        Add a player to the room and start its handshake
+        """
+        player = Player(reader, writer, self.colors[len(self.players)], self.datagrams)
+        player.ready = asyncio.create_task(player.handshake())
+        self.players.append(player)
+
+    def is_full(self):
+        """
+        Check if room is full
+        """
+        return len(self.players) == 4
+
+
+class Server:
+    """
+    Accept players and direct to rooms, all rooms share one event loop
+    Players wait in one room until it is full or, with a fill timeout, until the timeout passes
+    Rooms are dropped once every player quit or disconnected
+    In tick mode spectators may watch rooms from a separate port, and the server may run the physics
+    """
+    def __init__(self, address=ADDRESS, tick_rate=None, udp=False, udp_port=None, reuse_port=False,
+                 fill_timeout=None, spectate_port=None, simulate=False):
+        self.address = address
+        self.tick_rate = tick_rate
+        self.simulate = simulate and bool(tick_rate)
+        self.reuse_port = reuse_port
+        self.fill_timeout = fill_timeout
+        self.spectate_port = spectate_port if tick_rate else None
+        # positions only travel over UDP in tick mode, ping-pong would stall on every lost datagram
+        self.datagrams = Datagrams(udp_port or address[1]) if udp and tick_rate else None
+
+        self.rooms = {}  # rooms playing by id, in the order they started
+        self.ids = itertools.count(1)
+        self.waiting = Room(tick_rate, self.datagrams, self.simulate)
+        self.timer = None
+
+    async def accept(self, reader, writer):
+        """
+        Connect an accepted player to the waiting room
+        """
+        room = self.waiting
+        room.add_player(reader, writer)
+
+        if room.is_full():
+            self.start(room)
+        elif len(room.players) == 1 and self.fill_timeout:
+            self.timer = asyncio.get_running_loop().call_later(self.fill_timeout, self.start, room)
+
+    def start(self, room):
+        """
+        Close the waiting room to new players and play it
+        """
+        if self.timer is not None:
+            self.timer.cancel()
+            self.timer = None
+
+        self.waiting = Room(self.tick_rate, self.datagrams, self.simulate)
+        room.id = next(self.ids)
+        self.rooms[room.id] = room
+        room.task = asyncio.create_task(room.run())
+        room.task.add_done_callback(lambda _: self.rooms.pop(room.id))
+
+    async def watch(self, reader, writer):
+        """
+        Attach an accepted spectator to the room it asked for
+        """
+        spectator = Spectator(reader, writer)
+        try:
+            room_id = await spectator.recv_watch()
+        except ConnectionError:
+            spectator.close()
+            return
+
+        if not room_id and self.rooms:
+            room_id = next(reversed(self.rooms))
+
+        room = self.rooms.get(room_id)
+        if room is None:
+            spectator.close()
+            return
+        await room.watch(spectator)
+
+    async def serve(self):
+        """
+        Accept players until cancelled
+        """
+        if self.datagrams is not None:
+            await asyncio.get_running_loop().create_datagram_endpoint(lambda: self.datagrams,
+                                                                      (self.address[0], self.datagrams.port))
+
+        if self.spectate_port is not None:
+            await asyncio.start_server(self.watch, self.address[0], self.spectate_port)
+
+        server = await asyncio.start_server(self.accept, *self.address, reuse_port=self.reuse_port)
+        async with server:
+            await server.serve_forever()
+
+    def run(self):
+        asyncio.run(self.serve())
+
+    def current(self):
+        return self.waiting
@@ -0,0 +1,122 @@
+"""
+Measure what a player who stops reading costs the rest of the room and how stale they are afterwards
+
+Run from the repository root:
+    python -m benchmarks.backpressure --stall 4
+
+A room of four binary clients plays against a tick server. One of them stops reading for the
+given number of seconds while it keeps sending its position, then reads again.
+The healthy clients report their snapshot rate during the stall. The stalled client reports
+how many stale snapshots it read after resuming before a current one, and how old they were.
+What its own receive buffer holds cannot be dropped, everything else queued for it can.
+"""
+import argparse
+import asyncio
+import socket
+
+import protocol
+from benchmarks.rooms import connect, start_server
+from consts import *
+
+RECEIVE_BUFFER = 1  # the kernel rounds it up to its minimum
+
+
+async def client(reader, writer, tick, latest, stall=None):
+    """
+    Binary client answering every snapshot, returns the arrival times of its snapshots
+    With a stall of (start, seconds) it stops reading that long after the given loop time
+    """
+    loop = asyncio.get_running_loop()
+    color = (await reader.read(SIZE)).decode()
+    writer.write(protocol.offer().encode())
+    await reader.readexactly(len(protocol.CONFIRM))
+
+    decoder = protocol.SnapshotDecoder()
+    times = []
+    backlog = None
+
+    while True:
+        try:
+            length, = protocol.LENGTH.unpack(await reader.readexactly(protocol.LENGTH.size))
+            body = await reader.readexactly(length)
+        except (asyncio.IncompleteReadError, ConnectionError):
+            break
+        msg_type, payload = body[0], body[1:]
+
+        if msg_type == protocol.MSG_DIFF:
+            writer.write(protocol.frame(protocol.MSG_DIFFICULTY, protocol.LEVEL.pack(int(NORMAL))))
+        elif msg_type == protocol.MSG_BEGIN:
+            writer.write(protocol.frame(protocol.MSG_ACK))
+        elif msg_type == protocol.MSG_SNAPSHOT:
+            seq = protocol.SNAPSHOT.unpack_from(payload)[0]
+            now = loop.time()
+            times.append(now)
+            latest[color] = seq
+            if decoder.decode(payload) is not None:
+                writer.write(decoder.ack() + protocol.frame(protocol.MSG_POS, protocol.encode_position(1, 1, 1)))
+
+            age = (max(latest.values()) - seq) / tick
+            if stall is not None and backlog is not None and not backlog['current']:
+                if age > 2 / tick:
+                    backlog['stale'] += 1
+                    backlog['age'] = max(backlog['age'], age)
+                else:
+                    backlog['current'] = True
+            elif stall is not None and backlog is None and now >= stall[0]:
+                # keep the connection alive while not reading, as the game client's heartbeat does
+                for _ in range(int(stall[1] / HEARTBEAT_INTERVAL)):
+                    await asyncio.sleep(HEARTBEAT_INTERVAL)
+                    writer.write(protocol.frame(protocol.MSG_HEARTBEAT))
+                await asyncio.sleep(stall[1] % HEARTBEAT_INTERVAL)
+                backlog = {'stale': 0, 'age': 0, 'current': False}
+        elif msg_type == protocol.MSG_QUIT:
+            break
+
+    writer.close()
+    return times, backlog
+
+
+async def play(port, tick, stall, duration):
+    loop = asyncio.get_running_loop()
+    latest = {}
+
+    readers = [await connect(port) for _ in range(3)]
+    # a small receive window, set before connecting, and a stream reader which stops reading early
+    # leave what is not delivered yet on the server side
+    sock = socket.socket()
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, RECEIVE_BUFFER)
+    sock.connect((IP[0], port))
+    reader, writer = await asyncio.open_connection(sock=sock, limit=64)
+
+    start = loop.time() + 1
+    clients = [asyncio.ensure_future(client(r, w, tick, latest)) for r, w in readers]
+    stalled = asyncio.ensure_future(client(reader, writer, tick, latest, (start, stall)))
+
+    await asyncio.sleep(1 + duration)
+    for _, w in readers + [(reader, writer)]:
+        w.close()
+    results = await asyncio.gather(*clients, stalled)
+
+    # healthy clients during the stall
+    rates = [len([t for t in times if start <= t < start + stall]) / stall for times, _ in results[:3]]
+    return sum(rates) / len(rates), results[3][1]
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--tick', type=float, default=60)
+    parser.add_argument('--stall', type=float, default=4)
+    parser.add_argument('--port', type=int, default=ADDRESS[1] + 500)
+    args = parser.parse_args()
+
+    process = start_server('async', args.port, args.tick)
+    try:
+        rate, backlog = asyncio.run(play(args.port, args.tick, args.stall, args.stall + 2))
+    finally:
+        process.terminate()
+        process.wait()
+
+    print(f'ticks during stall               {args.tick * args.stall:>8.0f}')
+    print(f'healthy snapshots/s during stall {rate:>8.1f}')
+    print(f'stale snapshots after resuming   {backlog["stale"]:>8}')
+    print(f'age of the oldest s              {backlog["age"]:>8.2f}')
@@ -0,0 +1,69 @@
+"""
+Compare downstream bytes per room for each way of encoding room positions
+
+Run from the repository root:
+    python -m benchmarks.bandwidth --tick 60 --moving 0.25
+
+Encodes the same synthetic room, in which each player moves in bursts for the given share
+of the time and stands still otherwise, as string messages, binary position frames and
+delta snapshots acknowledged a round trip late. No sockets are involved.
+"""
+import argparse
+import random
+
+import protocol
+from consts import *
+
+
+def trace(ticks, moving, seed=0):
+    """
+    Positions of the four players at each tick
+    """
+    rng = random.Random(seed)
+    positions = {color: (1, rng.uniform(50, 550), rng.uniform(50, 550)) for color in COLORS}
+    walking = {color: False for color in COLORS}
+
+    states = []
+    for _ in range(ticks):
+        for color in COLORS:
+            # bursts of about a second, moving the requested share of the time
+            if rng.random() < 1 / 60:
+                walking[color] = rng.random() < moving
+            if walking[color]:
+                level, x, y = positions[color]
+                positions[color] = (level, x + rng.choice((-3, 3)), y + rng.uniform(-5, 5))
+        states.append(dict(positions))
+    return states
+
+
+def measure(tick, moving, rtt, seconds=60):
+    """
+    Bytes per second sent to a whole room of four clients by each encoding
+    """
+    states = trace(int(tick * seconds), moving)
+    lag = max(1, round(rtt * tick))
+
+    string = sum(len(protocol.string_positions(state).encode()) for state in states)
+    binary = sum(len(protocol.frame(protocol.MSG_POSITIONS, protocol.encode_positions(state))) for state in states)
+
+    encoder = protocol.SnapshotEncoder()
+    delta = 0
+    for state in states:
+        encoder.push(state)
+        # acknowledgements arrive a round trip after the snapshot was sent
+        delta += len(encoder.encode(max(0, encoder.seq - lag)))
+
+    return {name: size * 4 / seconds for name, size in (('string', string), ('binary', binary), ('delta', delta))}
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--tick', type=float, default=60)
+    parser.add_argument('--moving', type=float, default=.25, help='share of time each player moves')
+    parser.add_argument('--rtt', type=float, default=.1)
+    args = parser.parse_args()
+
+    result = measure(args.tick, args.moving, args.rtt)
+    print(f'{"encoding":<10}{"bytes/s per room":>18}{"vs string":>12}')
+    for name, rate in result.items():
+        print(f'{name:<10}{rate:>18.0f}{result["string"] / rate:>11.1f}x')
@@ -0,0 +1,85 @@
+"""
+Measure what a player's collision checks cost as levels grow
+
+Run from the repository root:
+    python -m benchmarks.collision --objects 20 200 2000 10000
+
+Each level is made of the given number of blocks at the density of the built in levels, spread over
+as many screens as it takes. A player is dropped at random places moving in random directions and
+updated once, through the collision grid, next to what the scan of every object it replaces costs.
+A crossbow in the middle shoots all the while, its arrow flies until the impact worked out for it.
+"""
+import argparse
+import random
+import time
+
+import game_objects
+import obstacles
+import player
+import simulation
+from consts import *
+
+
+def level(count, rng):
+    """
+    A world whose current level holds the given number of blocks and a crossbow, with the side of the
+    area they cover
+    """
+    world = simulation.World()
+    side = WIDTH * max(1, (count / 20) ** .5)
+    crossbow = obstacles.Crossbow(world, side / 2, side / 2, 1, 0)
+    world.levels[world.current_level] = tuple(
+        game_objects.Block(world, rng.uniform(0, side), rng.uniform(0, side), rng.randint(10, 60), rng.randint(10, 60))
+        for _ in range(count)) + (crossbow,)
+    world.init_level()
+    return world, side, crossbow
+
+
+def run(count, updates, seed):
+    """
+    Seconds per player update, per scan of every object and per arrow update, objects looked at per update
+    """
+    rng = random.Random(seed)
+    world, side, crossbow = level(count, rng)
+    p = player.Player(world, COLOR_PLAYER_PURPLE)
+    places = [(rng.uniform(0, side), rng.uniform(0, side), rng.uniform(-3, 3), rng.uniform(-8, 8))
+              for _ in range(updates)]
+
+    looked = 0
+    start = time.perf_counter()
+    for x, y, vx, vy in places:
+        p.x, p.y, p.vx, p.vy = x, y, vx, vy
+        p.update()
+    update = (time.perf_counter() - start) / updates
+
+    objects = world.get_level_objects()
+    start = time.perf_counter()
+    for x, y, vx, vy in places:
+        rect = (x, y, p.width, p.height)
+        for _ in range(2):  # once per axis
+            for b in objects:
+                b.is_colliding(rect)
+    scan = (time.perf_counter() - start) / updates
+
+    crossbow.arrow.is_launched = True
+    start = time.perf_counter()
+    for _ in range(updates):
+        crossbow.arrow.update()
+    arrow = (time.perf_counter() - start) / updates
+
+    for x, y, vx, vy in places:
+        looked += len(world.grid.query(x - abs(vx), y - abs(vy), p.width + abs(vx), p.height + abs(vy)))
+    return update, scan, arrow, looked / updates
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--objects', type=int, nargs='+', default=[20, 200, 2000, 10000])
+    parser.add_argument('--updates', type=int, default=5000)
+    parser.add_argument('--seed', type=int, default=1)
+    args = parser.parse_args()
+
+    print(f'{"objects":>8}{"us/update":>12}{"us/scan":>10}{"us/arrow":>10}{"looked at":>12}')
+    for count in args.objects:
+        update, scan, arrow, looked = run(count, args.updates, args.seed)
+        print(f'{count:>8}{update * 1e6:>12.1f}{scan * 1e6:>10.1f}{arrow * 1e6:>10.2f}{looked:>12.1f}')
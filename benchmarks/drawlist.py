@@ -0,0 +1,102 @@
+"""
+Measure what drawing a frame of many objects costs, shape by shape, sprite by sprite and batched
+
+Run from the repository root:
+    python -m benchmarks.drawlist --objects 2000
+
+A level holds the given number of objects, blocks, spinning pickups and flying arrows mixed, and is
+drawn the given number of times three ways: every object with its own pygame.draw calls, as the
+renderer drew blocks and doors; every object's sprite blitted on its own; and the sprites of all of
+them in one Surface.blits call, as the layers draw them now. Nothing is shown, the window is left to
+the dummy video driver.
+"""
+import argparse
+import os
+import random
+import time
+
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+
+import pygame as pyg
+
+import game_objects
+import layers
+import obstacles
+import power_ups
+import simulation
+import sprites
+from consts import *
+
+
+def scene(count, rng):
+    """
+    The given number of objects at random places, one in five a pickup and one in five an arrow
+    """
+    world = simulation.World()
+    objects = []
+    for i in range(count):
+        x, y = rng.uniform(0, WIDTH - 60), rng.uniform(0, HEIGHT - 60)
+        if i % 5 == 0:
+            obj = power_ups.Key(world, x, y)
+            obj.degree = rng.randrange(360)
+        elif i % 5 == 1:
+            obj = obstacles.Crossbow.Arrow(world, x, y, *rng.choice(((1, 0), (-1, 0), (0, 1), (0, -1))))
+        else:
+            obj = game_objects.Block(world, x, y, rng.randint(10, 60), rng.randint(10, 60))
+        objects.append(obj)
+    return objects
+
+
+def shapes(surface, objects):
+    """
+    Every object drawn with its own calls, pickups and arrows as they draw themselves
+    """
+    for obj in objects:
+        if isinstance(obj, game_objects.Block):
+            obj.draw_shape(surface, pyg)
+        else:
+            obj.draw(surface, pyg)
+
+
+def blitted(surface, objects):
+    """
+    Every object's sprite blitted on its own
+    """
+    for obj in objects:
+        surface.blit(*obj.sprite())
+
+
+def run(surface, objects, frames, draw):
+    """
+    Seconds per frame drawn
+    """
+    spent = 0
+    for _ in range(frames):
+        start = time.perf_counter()
+        surface.fill(COLOR_BACKGROUND)
+        draw(surface, objects)
+        spent += time.perf_counter() - start
+    return spent / frames
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--objects', type=int, nargs='+', default=[2000])
+    parser.add_argument('--frames', type=int, default=100)
+    parser.add_argument('--seed', type=int, default=1)
+    args = parser.parse_args()
+
+    pyg.init()
+    pyg.display.set_mode((WIDTH, HEIGHT))
+    surface = pyg.Surface((WIDTH, HEIGHT)).convert()
+    game_objects.GameObject.sprites = sprites.Sprites(pyg, pyg.image.load('assets/arrow.png'))
+
+    print(f'{"objects":>8}{"shapes ms":>11}{"blit ms":>9}{"blits ms":>10}{"saved":>8}')
+    for count in args.objects:
+        objects = scene(count, random.Random(args.seed))
+        for obj in objects:
+            obj.sprite()  # every frame made before timing, as turn() makes them when the game starts
+        times = [run(surface, objects, args.frames, draw)
+                 for draw in (shapes, blitted, lambda surface, objects: layers.draw(surface, objects, pyg))]
+        print(f'{count:>8}{times[0] * 1000:>11.2f}{times[1] * 1000:>9.2f}{times[2] * 1000:>10.2f}'
+              f'{1 - times[2] / times[0]:>8.0%}')
@@ -0,0 +1,114 @@
+"""
+Measure how smoothly opponents move on screen at lower server tick rates
+
+Run from the repository root:
+    python -m benchmarks.interpolation --tick 60 30 20 10 --jitter 15 --loss .02
+
+An opponent plays random keys for the given number of frames, the server sends its position every
+tick and each one arrives late by a random share of the jitter, some are lost. The client draws at
+60 Hz, once with the newest position received as it used to and once through the interpolation
+buffer. For both it reports how far each frame's movement on screen is from the opponent's real
+movement, on average and at worst, and the share of frames the opponent stands still while it
+really moves.
+"""
+import argparse
+import random
+
+import interpolation
+import simulation
+from consts import *
+
+FRAME = 1 / 60
+KEYS = (0, KEY_LEFT, KEY_RIGHT, KEY_UP, KEY_UP | KEY_LEFT, KEY_UP | KEY_RIGHT)
+
+
+def path(frames, seed):
+    """
+    Level and position of an opponent for every frame
+    """
+    rng = random.Random(seed)
+    sim = simulation.Simulation(int(EXTREME))
+    sim.join(PURPLE)
+    keys = held = 0
+    positions = []
+    for frame in range(frames):
+        if not held:
+            keys, held = rng.choice(KEYS), rng.randint(5, 40)
+        held -= 1
+        positions.append(sim.step(PURPLE, frame, keys))
+    return positions
+
+
+def arrivals(positions, tick, jitter, loss, seed):
+    """
+    (arrival time, position) of every position sent at the tick rate and not lost, in arrival order
+    """
+    rng = random.Random(seed)
+    sent = []
+    t = 0
+    while t < len(positions) * FRAME:
+        if rng.random() >= loss:
+            sent.append((t + rng.uniform(0, jitter), positions[int(t / FRAME)]))
+        t += 1 / tick
+    # a stream of positions arrives in order, a late one holds back the ones after it
+    late = 0
+    for i, (arrival, position) in enumerate(sent):
+        late = max(late, arrival)
+        sent[i] = late, position
+    return sent
+
+
+def smoothness(drawn, real):
+    """
+    Mean and largest px a frame's movement on screen differs from the real movement, share of frozen frames
+    """
+    errors = []
+    frozen = 0
+    for i in range(1, len(drawn)):
+        if drawn[i] is None or drawn[i - 1] is None or drawn[i][0] != drawn[i - 1][0] or real[i][0] != real[i - 1][0]:
+            continue
+        dx, dy = drawn[i][1] - drawn[i - 1][1], drawn[i][2] - drawn[i - 1][2]
+        rx, ry = real[i][1] - real[i - 1][1], real[i][2] - real[i - 1][2]
+        errors.append(abs(dx - rx) + abs(dy - ry))
+        frozen += not (dx or dy) and bool(rx or ry)
+    return sum(errors) / len(errors), max(errors), frozen / len(errors)
+
+
+def run(tick, frames, jitter, loss, delay, seed):
+    positions = path(frames, seed)
+    received = arrivals(positions, tick, jitter, loss, seed)
+    buffer = interpolation.Interpolation(delay)
+
+    newest, smooth = [], []
+    i = 0
+    for frame in range(frames):
+        now = frame * FRAME
+        latest = newest[-1] if newest else None
+        while i < len(received) and received[i][0] <= now:
+            latest = received[i][1]
+            buffer.push(received[i][0], *received[i][1])
+            i += 1
+        newest.append(latest)
+        smooth.append(buffer.sample(now))
+
+    # the buffer shows the opponent the delay later, compare it with the path that much earlier
+    shift = round(delay / FRAME)
+    return smoothness(newest, positions), smoothness(smooth[shift:], positions[:len(positions) - shift])
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--tick', type=float, nargs='+', default=[60, 30, 20, 10])
+    parser.add_argument('--frames', type=int, default=3600)
+    parser.add_argument('--jitter', type=float, default=15, help='ms a position may arrive late')
+    parser.add_argument('--loss', type=float, default=.02)
+    parser.add_argument('--delay', type=float, default=INTERPOLATION_DELAY, help='seconds drawn behind')
+    parser.add_argument('--seed', type=int, default=1)
+    args = parser.parse_args()
+
+    print(f'{"tick":>6}{"":>3}{"newest: px/frame":>18}{"max":>7}{"frozen":>8}'
+          f'{"":>3}{"buffer: px/frame":>18}{"max":>7}{"frozen":>8}')
+    for tick in args.tick:
+        raw, smooth = run(tick, args.frames, args.jitter / 1000, args.loss, args.delay, args.seed)
+        print(f'{tick:>6.0f}{"":>3}{raw[0]:>18.2f}{raw[1]:>7.1f}{raw[2]:>8.0%}'
+              f'{"":>3}{smooth[0]:>18.2f}{smooth[1]:>7.1f}{smooth[2]:>8.0%}')
@@ -0,0 +1,77 @@
+"""
+Measure how starting a world grows with the number of levels in its pack
+
+Run from the repository root:
+    python -m benchmarks.levels --levels 8 80 800
+
+Each pack repeats the levels of the game until it holds the given number of them, in a directory
+of its own. A world is started on it, which reads the level list and builds the lobby, once with
+nothing compiled yet and once compiled. Next to it the time to build every level of the pack up
+front, what starting a world cost while levels were Python code.
+"""
+import argparse
+import json
+import os
+import shutil
+import tempfile
+import time
+
+import levels
+import simulation
+
+
+def pack(count, directory):
+    """
+    A pack of the given number of levels copied from the game's
+    """
+    files = levels.Pack().files
+    names = []
+    for i in range(count):
+        name = f'{i}.json'
+        with open(os.path.join(levels.PACK, files[i % len(files)])) as f:
+            level = json.load(f)
+        level['name'] = f'{level["name"]} {i}'  # every level its own content, cached on its own
+        with open(os.path.join(directory, name), 'w') as f:
+            json.dump(level, f)
+        names.append(name)
+    with open(os.path.join(directory, 'pack.json'), 'w') as f:
+        json.dump({'levels': names}, f)
+
+
+def start(directory):
+    """
+    Seconds to start a world on the pack in a directory, read as a process reads it the first time
+    """
+    levels.compiled.clear()
+    begin = time.perf_counter()
+    simulation.World(levels.Pack(directory))
+    return time.perf_counter() - begin
+
+
+def run(count):
+    directory = tempfile.mkdtemp()
+    try:
+        pack(count, directory)
+        cold = start(directory)
+        warm = start(directory)
+
+        levels.compiled.clear()
+        begin = time.perf_counter()
+        world = simulation.World(levels.Pack(directory))
+        for i in range(len(world.levels)):
+            world.build_level(i)
+        every = time.perf_counter() - begin
+    finally:
+        shutil.rmtree(directory)
+    return cold, warm, every
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--levels', type=int, nargs='+', default=[8, 80, 800])
+    args = parser.parse_args()
+
+    print(f'{"levels":>8}{"start ms":>10}{"compiled ms":>13}{"all levels ms":>15}')
+    for count in args.levels:
+        cold, warm, every = run(count)
+        print(f'{count:>8}{cold * 1000:>10.2f}{warm * 1000:>13.2f}{every * 1000:>15.1f}')
@@ -0,0 +1,114 @@
+"""
+Drive a local server with many headless bots and save the results as JSON
+
+Run from the repository root:
+    python -m benchmarks.loadtest --bots 2000 --processes 4 --async --tick 30 --output async-tick.json
+
+Bots are spread over several client processes, each connects its share gradually and plays one game.
+Reports handshake latency, messages per second received by all bots, round trips from a bot's
+position to the server echoing it back, and server CPU per room, read from /proc (Linux only).
+"""
+import argparse
+import asyncio
+import json
+import multiprocessing
+import statistics
+import time
+
+from benchmarks.rooms import start_server, tree_cpu_time
+from bot import Bot
+from consts import *
+
+
+async def swarm(port, bots, ramp, options):
+    """
+    Start bots evenly over the ramp time and wait for all of them to finish
+    """
+    tasks = []
+    for _ in range(bots):
+        tasks.append(asyncio.ensure_future(Bot(port=port, **options).run()))
+        await asyncio.sleep(ramp / bots)
+    return await asyncio.gather(*tasks, return_exceptions=True)
+
+
+def client(port, bots, ramp, options, results):
+    results.put([result for result in asyncio.run(swarm(port, bots, ramp, options)) if isinstance(result, dict)])
+
+
+def percentile(samples, share):
+    return samples[min(len(samples) - 1, int(len(samples) * share))] if samples else None
+
+
+def run(args):
+    mode = 'async' if args.use_async else 'thread'
+    process = start_server(mode, args.port, args.tick, workers=args.workers, fill_timeout=args.fill_timeout,
+                           simulate=args.simulate)
+    time.sleep(1)
+
+    options = {'binary': not args.string, 'difficulty': args.difficulty, 'play': args.play, 'lounge': args.lounge}
+    results = multiprocessing.Queue()
+    shares = [args.bots // args.processes + (i < args.bots % args.processes) for i in range(args.processes)]
+    clients = [multiprocessing.Process(target=client, args=(args.port, share, args.ramp, options, results))
+               for share in shares]
+
+    try:
+        before, start = tree_cpu_time(process.pid), time.monotonic()
+        for c in clients:
+            c.start()
+        stats = [stat for _ in clients for stat in results.get()]
+        after, end = tree_cpu_time(process.pid), time.monotonic()
+        for c in clients:
+            c.join()
+    finally:
+        process.terminate()
+        process.wait()
+
+    handshakes = sorted(stat['handshake'] for stat in stats)
+    rtts = sorted(rtt for stat in stats for rtt in stat['rtts'])
+    rooms = args.bots / 4
+    cpu = (after - before) / (end - start)
+
+    return {
+        'config': vars(args),
+        'bots': len(stats),
+        'failed': args.bots - len(stats),
+        'duration': end - start,
+        'handshake_p50': percentile(handshakes, .5),
+        'handshake_p99': percentile(handshakes, .99),
+        'messages_per_second': sum(stat['received'] for stat in stats) / (end - start),
+        'rtt_p50': percentile(rtts, .5),
+        'rtt_p99': percentile(rtts, .99),
+        'rtt_mean': statistics.mean(rtts) if rtts else None,
+        'server_cpu': cpu,
+        'server_cpu_per_room': cpu / rooms
+    }
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--bots', type=int, default=400)
+    parser.add_argument('--processes', type=int, default=multiprocessing.cpu_count())
+    parser.add_argument('--ramp', type=float, default=5, help='seconds over which each process connects its bots')
+    parser.add_argument('--string', action='store_true', help='bots speak the string protocol instead of binary')
+    parser.add_argument('--difficulty', choices=(NORMAL, HARD, EXTREME), default=NORMAL)
+    parser.add_argument('--play', type=float, default=10)
+    parser.add_argument('--lounge', type=float, default=2)
+    parser.add_argument('--async', dest='use_async', action='store_true')
+    parser.add_argument('--tick', type=float, default=None)
+    parser.add_argument('--simulate', action='store_true', help='with --tick, the server runs the physics')
+    parser.add_argument('--workers', type=int, default=None)
+    parser.add_argument('--fill-timeout', type=float, default=2)
+    parser.add_argument('--port', type=int, default=ADDRESS[1] + 700)
+    parser.add_argument('--output', default='loadtest.json')
+    args = parser.parse_args()
+
+    result = run(args)
+    with open(args.output, 'w') as f:
+        json.dump(result, f, indent=4)
+
+    print(f'{result["bots"]} bots ({result["failed"]} failed) in {result["duration"]:.1f} s, saved to {args.output}')
+    for key in ('handshake_p50', 'handshake_p99', 'rtt_p50', 'rtt_p99'):
+        if result[key] is not None:
+            print(f'{key:<24}{result[key] * 1000:>10.1f} ms')
+    print(f'{"messages/s":<24}{result["messages_per_second"]:>10.0f}')
+    print(f'{"server cpu per room":<24}{result["server_cpu_per_room"] * 100:>10.2f} %')
@@ -0,0 +1,91 @@
+"""
+Measure what reconciling a mispredicted input costs the client and how far off it is drawn
+
+Run from the repository root:
+    python -m benchmarks.prediction --rtt 2 6 12 30 --frames 3000
+
+A client world predicts every input at once while an authoritative simulation applies it, and
+sends back its state, a round trip of the given number of frames later. Now and then the client
+is pushed off its path as a misprediction would, the next state then corrects it by replaying
+every input still on its way. Reported are the corrections, the time one takes, how many frames
+the client needs to be drawn where it is, and the largest distance it was drawn away from it.
+"""
+import argparse
+import collections
+import random
+import time
+
+import player
+import simulation
+from consts import *
+
+KEYS = (0, KEY_LEFT, KEY_RIGHT, KEY_UP, KEY_UP | KEY_LEFT, KEY_UP | KEY_RIGHT)
+
+
+def run(rtt, frames, perturb, seed):
+    """
+    Play both sides the given number of frames with a round trip of rtt frames
+    """
+    rng = random.Random(seed)
+    server = simulation.Simulation(int(EXTREME))
+    server.join(PURPLE)
+
+    world = simulation.World()
+    p = player.Player(world, PLAYER_COLORS[PURPLE])
+    world.begin(p, int(EXTREME))
+    prediction = simulation.Prediction(p)
+
+    inputs = collections.deque()  # (arrival frame, sequence, keys) on the way to the server
+    states = collections.deque()  # (arrival frame, state) on the way back
+    keys = held = 0
+    costs, settles, errors = [], [], []
+    corrected = None
+
+    for frame in range(frames):
+        if not held:
+            keys, held = rng.choice(KEYS), rng.randint(5, 40)
+        held -= 1
+
+        world.step(p, keys)
+        if rng.random() < perturb:
+            p.x += rng.choice((-1, 1)) * rng.uniform(5, 40)
+        inputs.append((frame + rtt // 2, prediction.record(keys), keys))
+
+        while inputs and inputs[0][0] <= frame:
+            _, seq, held_keys = inputs.popleft()
+            server.step(PURPLE, seq, held_keys)
+            states.append((frame + rtt - rtt // 2, server.state(PURPLE)))
+
+        while states and states[0][0] <= frame:
+            count = prediction.corrections
+            start = time.perf_counter()
+            prediction.reconcile(*states.popleft()[1])
+            if prediction.corrections > count:
+                costs.append(time.perf_counter() - start)
+                corrected = frame
+
+        prediction.smooth()
+        error = abs(p.error_x) + abs(p.error_y)
+        errors.append(error)
+        if corrected is not None and not error:
+            settles.append(frame - corrected)
+            corrected = None
+
+    return costs, settles, max(errors)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--rtt', type=int, nargs='+', default=[2, 6, 12, 30], help='round trips in frames')
+    parser.add_argument('--frames', type=int, default=3000)
+    parser.add_argument('--perturb', type=float, default=.01, help='chance per frame to push the client off')
+    parser.add_argument('--seed', type=int, default=1)
+    args = parser.parse_args()
+
+    print(f'{"rtt ms":>8}{"corrections":>13}{"us each":>10}{"max us":>10}{"settle frames":>15}{"max error":>11}')
+    for rtt in args.rtt:
+        costs, settles, error = run(rtt, args.frames, args.perturb, args.seed)
+        mean = sum(costs) / len(costs) if costs else 0
+        settle = sum(settles) / len(settles) if settles else 0
+        print(f'{rtt * 1000 / 60:>8.0f}{len(costs):>13}{mean * 1e6:>10.0f}{max(costs, default=0) * 1e6:>10.0f}'
+              f'{settle:>15.1f}{error:>11.1f}')
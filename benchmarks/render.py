@@ -0,0 +1,141 @@
+"""
+Measure what drawing and showing a level costs per frame, as the renderer did it and as it does now
+
+Run from the repository root:
+    python -m benchmarks.render --frames 600 --spikes 40
+
+Every level of the game is played for the given number of frames, the objects updated as the game
+updates them, and drawn and shown once a frame three ways: every object on its own and the whole
+frame shown, as the renderer used to; the whole frame drawn over the scenery layer and shown; and
+only what changed since the frame before drawn and shown, through dirty rectangles. A made up level
+lines the screen with the given number of strips of spikes, and a title screen stands still as the
+welcome screen does. The window is left to the dummy video driver.
+"""
+import argparse
+import os
+import random
+import time
+
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+
+import pygame as pyg
+
+import game_objects
+import layers
+import obstacles
+import simulation
+import sprites
+from benchmarks.rotation import render
+from consts import *
+
+
+def spiky(world, count, rng):
+    """
+    The lobby with strips of spikes of every size and direction all over it
+    """
+    strips = []
+    for _ in range(count):
+        if rng.random() < .5:
+            strip = obstacles.Spikes(world, rng.randrange(WIDTH - 200), rng.randrange(HEIGHT), 200, 10, rng.choice((1, -1)))
+        else:
+            strip = obstacles.Spikes(world, rng.randrange(WIDTH), rng.randrange(HEIGHT - 200), 10, 200, rng.choice((1, -1)))
+        strips.append(strip)
+    world.current_level = 0
+    world.levels[0] = world.get_level_objects() + tuple(strips)
+    world.init_level()
+
+
+def every(screen, surface, world):
+    """
+    What the renderer did before the scenery layer, showing the whole frame
+    """
+    surface.fill(COLOR_BACKGROUND)
+    for obj in world.get_level_objects():
+        render(obj, surface)
+    screen.blit(surface, (0, 0))
+    pyg.display.flip()
+
+
+def show(screen, surface, dirty, frame):
+    """
+    Draw a frame through dirty rectangles and show the areas which changed, frame gives its background,
+    version and items
+    """
+    rects = dirty.render(surface, *frame())
+    if rects:
+        for rect in rects:
+            screen.blit(surface, rect, rect)
+        pyg.display.update(rects)
+
+
+def run(world, frames, draw):
+    """
+    Seconds per frame drawn
+    """
+    spent = 0
+    for _ in range(frames):
+        for obj in world.get_level_objects():
+            obj.update()
+        start = time.perf_counter()
+        draw()
+        spent += time.perf_counter() - start
+    return spent / frames
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--frames', type=int, default=600)
+    parser.add_argument('--spikes', type=int, default=40)
+    parser.add_argument('--seed', type=int, default=1)
+    args = parser.parse_args()
+
+    pyg.init()
+    screen = pyg.display.set_mode((WIDTH, HEIGHT))
+    surface = pyg.Surface((WIDTH, HEIGHT))
+    game_objects.GameObject.sprites = sprites.Sprites(pyg, pyg.image.load('assets/arrow.png'))
+
+    print(f'{"level":>10}{"objects":>9}{"ms/frame":>10}{"layer ms":>10}{"dirty ms":>10}{"saved":>8}')
+    world = simulation.World()
+    for level in range(len(world.levels) + 2):
+        if level == len(world.levels) + 1:
+            name = 'title'
+            font = pyg.font.SysFont('Consolas', 40)
+            title = font.render('Title', True, COLOR_BLACK)
+            blank = pyg.Surface((WIDTH, HEIGHT))
+            blank.fill(COLOR_BACKGROUND)
+
+            def frame():
+                return blank, None, [(layers.area(250, 200, *title.get_size()), 'Title', (title, (250, 200)))]
+
+            def old():
+                surface.fill(COLOR_BACKGROUND)
+                surface.blit(title, (250, 200))
+                screen.blit(surface, (0, 0))
+                pyg.display.flip()
+        else:
+            if level == len(world.levels):
+                name = 'spikes'
+                spiky(world, args.spikes, random.Random(args.seed))
+            else:
+                name = str(level)
+                world.current_level = level
+                world.init_level()
+
+            def frame():
+                return layers.level_items(world, scenery, rotation)
+
+            def old():
+                every(screen, surface, world)
+
+        times = []
+        for draw in (old,
+                     lambda: show(screen, surface, layers.DirtyRects(), frame),
+                     lambda: show(screen, surface, dirty, frame)):
+            world.restart_level()
+            scenery = layers.Scenery(pyg)
+            rotation = layers.Rotation(pyg)
+            dirty = layers.DirtyRects()
+            times.append(run(world, args.frames, draw))
+        objects = 1 if name == 'title' else len(world.get_level_objects())
+        print(f'{name:>10}{objects:>9}{times[0] * 1000:>10.3f}{times[1] * 1000:>10.3f}{times[2] * 1000:>10.3f}'
+              f'{1 - times[2] / times[0]:>8.0%}')
@@ -0,0 +1,89 @@
+"""
+Measure what a death costs, restarting the current level against rebuilding every level
+
+Run from the repository root:
+    python -m benchmarks.retry --deaths 1000
+
+For every level a player plays a while with random keys, so keys are collected, doors open and arrows
+fly, and then dies the given number of times. Each death restarts the level from the state it was
+built in, next to it the same deaths rebuild all levels as a death used to. Reported are the time
+per death and what memory the deaths left allocated.
+"""
+import argparse
+import random
+import time
+import tracemalloc
+
+import player
+import simulation
+from consts import *
+
+KEYS = (0, KEY_LEFT, KEY_RIGHT, KEY_UP, KEY_UP | KEY_LEFT, KEY_UP | KEY_RIGHT)
+
+
+def play(world, p, level, rng):
+    """
+    Enter a level and play it for a few seconds
+    """
+    world.current_level = level
+    world.init_level()
+    p.reset()
+    world.god_mode = True  # keep playing through hazards, deaths are counted on their own
+    keys = held = 0
+    for _ in range(300):
+        if not held:
+            keys, held = rng.choice(KEYS), rng.randint(5, 40)
+        held -= 1
+        world.step(p, keys)
+        if world.current_level != level:
+            break
+    world.current_level = level
+    world.god_mode = False
+
+
+def rebuild(world):
+    """
+    What a death did before levels could be restarted
+    """
+    world.generate_levels()
+    for i in range(len(world.levels)):
+        world.build_level(i)
+    world.init_level()
+
+
+def run(deaths, seed, restart):
+    rng = random.Random(seed)
+    world = simulation.World()
+    p = player.Player(world, COLOR_PLAYER_PURPLE)
+    die = world.restart_level if restart else lambda: rebuild(world)
+    times = []
+    grown = 0
+
+    for level in range(1, len(world.levels) - 1):
+        play(world, p, level, rng)
+        start = time.perf_counter()
+        for _ in range(deaths):
+            die()
+        times.append((time.perf_counter() - start) / deaths)
+
+        # tracing slows every allocation down, the memory is measured over deaths of their own
+        play(world, p, level, rng)
+        tracemalloc.start()
+        before = tracemalloc.get_traced_memory()[0]
+        for _ in range(deaths):
+            die()
+        grown += tracemalloc.get_traced_memory()[0] - before
+        tracemalloc.stop()
+    return sum(times) / len(times), grown
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--deaths', type=int, default=1000)
+    parser.add_argument('--seed', type=int, default=1)
+    args = parser.parse_args()
+
+    print(f'{"":>10}{"us/death":>10}{"kB kept":>10}')
+    for name, restart in (('restart', True), ('rebuild', False)):
+        cost, grown = run(args.deaths, args.seed, restart)
+        print(f'{name:>10}{cost * 1e6:>10.1f}{grown / 1024:>10.1f}')
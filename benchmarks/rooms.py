@@ -0,0 +1,163 @@
+"""
+Compare CPU use of the threaded and the asyncio server under the same load
+
+Run from the repository root:
+    python -m benchmarks.rooms --rooms 100 --duration 10
+
+Every room is filled with four scripted clients speaking the string protocol, each answers
+every POS message after 1 / rate seconds. Server CPU time is read from /proc (Linux only),
+with --workers it is the total over the supervisor and its worker processes.
+"""
+import argparse
+import asyncio
+import os
+import subprocess
+import sys
+import time
+
+from consts import *
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+TICKS = os.sysconf('SC_CLK_TCK')
+
+
+def cpu_time(pid):
+    """
+    Total user and system CPU seconds used by a process
+    """
+    with open(f'/proc/{pid}/stat') as f:
+        fields = f.read().rsplit(')', 1)[1].split()
+    return (int(fields[11]) + int(fields[12])) / TICKS
+
+
+def children(pid):
+    """
+    Process ids of the direct children of a process
+    """
+    with open(f'/proc/{pid}/task/{pid}/children') as f:
+        return [int(child) for child in f.read().split()]
+
+
+def tree_cpu_time(pid):
+    """
+    CPU seconds used by a process and its direct children
+    """
+    return cpu_time(pid) + sum(cpu_time(child) for child in children(pid))
+
+
+def start_server(mode, port, tick=None, udp=False, workers=None, fill_timeout=None, spectate=None, simulate=False):
+    """
+    Launch a server process
+    """
+    args = [sys.executable, 'server.py', '--port', str(port)]
+    if spectate:
+        args += ['--spectate', str(spectate)]
+    if fill_timeout:
+        args += ['--fill-timeout', str(fill_timeout)]
+    if workers:
+        args += ['--workers', str(workers)]
+    if mode == 'async':
+        args.append('--async')
+    if tick:
+        args += ['--tick', str(tick)]
+    if udp:
+        args.append('--udp')
+    if simulate:
+        args.append('--simulate')
+    return subprocess.Popen(args, cwd=ROOT)
+
+
+async def connect(port):
+    """
+    Open a connection, waiting up to five seconds for the server to start listening
+    """
+    for _ in range(100):
+        try:
+            return await asyncio.open_connection(IP[0], port)
+        except ConnectionRefusedError:
+            await asyncio.sleep(.05)
+    raise ConnectionRefusedError(f'no server listening on port {port}')
+
+
+async def bot(reader, writer, rate, stop):
+    """
+    Scripted client, answers the server the way the game client does
+    """
+    await reader.read(SIZE)  # color
+    writer.write(ACK.encode())
+
+    while True:
+        msg = (await reader.read(SIZE)).decode()
+        if not msg:
+            break
+
+        if msg == DIFF:
+            writer.write(NORMAL.encode())
+        elif msg.startswith(BEGIN):
+            writer.write(ACK.encode())
+        elif msg.startswith(POS):
+            await asyncio.sleep(1 / rate)
+            if stop.is_set():
+                writer.write(QUIT.encode())
+                break
+            writer.write(f'1:{300.0}:{300.0}'.encode())
+
+    writer.close()
+
+
+async def load(process, port, rooms, rate, duration):
+    """
+    Fill rooms with bots, then sample server CPU time while they play
+    """
+    stop = asyncio.Event()
+    bots = []
+    for _ in range(rooms * 4):
+        reader, writer = await connect(port)
+        bots.append(asyncio.ensure_future(bot(reader, writer, rate, stop)))
+
+    # let every room finish its handshake before sampling
+    await asyncio.sleep(1)
+    before, start = tree_cpu_time(process.pid), time.monotonic()
+    await asyncio.sleep(duration)
+    after, end = tree_cpu_time(process.pid), time.monotonic()
+
+    stop.set()
+    # with several workers each may hold a room that never fills, its bots wait for DIFF forever
+    _, waiting = await asyncio.wait(bots, timeout=5)
+    for task in waiting:
+        task.cancel()
+    return (after - before) / (end - start)
+
+
+def measure(mode, port, rooms, rate, duration, workers=None):
+    """
+    Run the load against one server mode
+    """
+    process = start_server(mode, port, workers=workers)
+    try:
+        cpu = asyncio.run(load(process, port, rooms, rate, duration))
+    finally:
+        process.terminate()
+        process.wait()
+
+    return {
+        'mode': mode,
+        'rooms': rooms,
+        'cpu': cpu,
+        'rooms_per_core': rooms / cpu if cpu else float('inf')
+    }
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--rooms', type=int, default=100)
+    parser.add_argument('--rate', type=float, default=60, help='client replies per second')
+    parser.add_argument('--duration', type=float, default=10)
+    parser.add_argument('--port', type=int, default=ADDRESS[1] + 100)
+    parser.add_argument('--workers', type=int, default=None, help='worker processes sharing the port')
+    args = parser.parse_args()
+
+    print(f'{"mode":<8}{"rooms":>8}{"cpu %":>10}{"rooms/core":>14}')
+    for i, mode in enumerate(('thread', 'async')):
+        result = measure(mode, args.port + i, args.rooms, args.rate, args.duration, args.workers)
+        print(f'{result["mode"]:<8}{result["rooms"]:>8}{result["cpu"] * 100:>10.1f}{result["rooms_per_core"]:>14.1f}')
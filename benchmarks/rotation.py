@@ -0,0 +1,114 @@
+"""
+Measure what drawing a frame of a rotating level costs as levels grow
+
+Run from the repository root:
+    python -m benchmarks.rotation --objects 20 200 500
+
+Each level holds the given number of objects, one in ten a spinning pickup and the rest blocks, and
+turns by 90 degrees. Every frame of the turn is drawn once with every object turned on a screen sized
+surface of its own, as the renderer used to, and once with the scenery layer and the pickups over it
+turned as a whole. The turn takes 60 frames, frames of 16.7 ms keep it at 60 frames a second. Nothing is shown,
+the window is left to the dummy video driver.
+"""
+import argparse
+import os
+import random
+import time
+
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+
+import pygame as pyg
+
+import game_objects
+import layers
+import power_ups
+import simulation
+import sprites
+from consts import *
+
+
+def level(count, rng):
+    """
+    A world whose current level holds the given number of objects
+    """
+    world = simulation.World()
+    world.levels[world.current_level] = tuple(
+        power_ups.Key(world, rng.uniform(0, WIDTH - 20), rng.uniform(0, HEIGHT - 20)) if i % 10 == 0 else
+        game_objects.Block(world, rng.uniform(0, WIDTH - 60), rng.uniform(0, HEIGHT - 60),
+                           rng.randint(10, 60), rng.randint(10, 60))
+        for i in range(count))
+    world.init_level()
+    return world
+
+
+def render(obj, surface):
+    """
+    How an object drew itself before the rotation layer, turned on a screen sized surface of its own
+    while the level rotated, and a crossbow its arrow with it
+    """
+    if obj.is_rotating:
+        sur = pyg.Surface((WIDTH, HEIGHT))
+        sur.fill(COLOR_BACKGROUND)
+        sur.set_colorkey(COLOR_BACKGROUND)
+        obj.draw(sur, pyg)
+        rotated = pyg.transform.rotate(sur, obj.angle)
+        surface.blit(rotated, rotated.get_rect(center=(WIDTH / 2, HEIGHT / 2)))
+    else:
+        obj.draw(surface, pyg)
+
+    if obj.group == GROUP_CROSSBOW and obj.arrow.is_launched:
+        obj.arrow.draw(surface, pyg)
+
+
+def every(surface, world):
+    """
+    What the renderer did while the level rotated
+    """
+    surface.fill(COLOR_BACKGROUND)
+    for obj in world.get_level_objects():
+        render(obj, surface)
+
+
+def turned(surface, world, scenery, rotation):
+    """
+    What the renderer does while the level rotates
+    """
+    surface.fill(COLOR_BACKGROUND)
+    surface.blit(*rotation.render(world, scenery))
+
+
+def run(count, frames, draw, seed):
+    """
+    Seconds per frame drawn, over the first frames of a turn
+    """
+    world = level(count, random.Random(seed))
+    world.rotate(RIGHT)
+    spent = 0
+    for _ in range(frames):
+        for obj in world.get_level_objects():
+            obj.update()
+        start = time.perf_counter()
+        draw(world)
+        spent += time.perf_counter() - start
+    return spent / frames
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--objects', type=int, nargs='+', default=[20, 200, 500])
+    parser.add_argument('--frames', type=int, default=20, help='frames of the turn drawn, 59 at most')
+    parser.add_argument('--seed', type=int, default=1)
+    args = parser.parse_args()
+
+    pyg.init()
+    pyg.display.set_mode((WIDTH, HEIGHT))
+    surface = pyg.Surface((WIDTH, HEIGHT))
+    scenery = layers.Scenery(pyg)
+    rotation = layers.Rotation(pyg)
+    game_objects.GameObject.sprites = sprites.Sprites(pyg, pyg.image.load('assets/arrow.png'))
+
+    print(f'{"objects":>8}{"ms/frame":>10}{"layer ms":>10}{"fps":>8}')
+    for count in args.objects:
+        old = run(count, args.frames, lambda world: every(surface, world), args.seed)
+        new = run(count, args.frames, lambda world: turned(surface, world, scenery, rotation), args.seed)
+        print(f'{count:>8}{old * 1000:>10.2f}{new * 1000:>10.2f}{min(60, 1 / new):>8.0f}')
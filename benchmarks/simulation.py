@@ -0,0 +1,75 @@
+"""
+Measure what stepping the authoritative simulation costs per room
+
+Run from the repository root:
+    python -m benchmarks.simulation --rooms 100 200 400 --frames 300
+
+Every room holds four players on extreme difficulty, spread over the levels, each holding random
+keys for a random number of frames. All rooms are stepped one frame at a time as a simulated
+server would at 60 Hz, the frame time is compared against the 16.7 ms a frame may take.
+"""
+import argparse
+import random
+import time
+
+import simulation
+from consts import *
+
+FRAME = 1 / 60
+KEYS = (0, KEY_LEFT, KEY_RIGHT, KEY_UP, KEY_UP | KEY_LEFT, KEY_UP | KEY_RIGHT)
+
+
+def build(rooms, seed):
+    """
+    Rooms of four players, each placed on a level of its own choosing
+    """
+    rng = random.Random(seed)
+    sims = []
+    for _ in range(rooms):
+        sim = simulation.Simulation(int(EXTREME))
+        for color in COLORS:
+            sim.join(color)
+            p = sim.players[color]
+            p.world.current_level = rng.randint(1, len(p.world.levels) - 2)
+            p.world.init_level()
+            p.reset()
+        sims.append(sim)
+    return sims
+
+
+def run(rooms, frames, seed):
+    """
+    Step every room the given number of frames, return the seconds each frame took
+    """
+    rng = random.Random(seed)
+    sims = build(rooms, seed)
+    held = {(i, color): (0, 0) for i in range(rooms) for color in COLORS}  # keys, frames left
+
+    times = []
+    for frame in range(frames):
+        start = time.perf_counter()
+        for i, sim in enumerate(sims):
+            for color in COLORS:
+                keys, left = held[i, color]
+                if not left:
+                    keys, left = rng.choice(KEYS), rng.randint(5, 40)
+                held[i, color] = keys, left - 1
+                sim.step(color, frame, keys)
+        times.append(time.perf_counter() - start)
+    return times
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--rooms', type=int, nargs='+', default=[100, 200, 400])
+    parser.add_argument('--frames', type=int, default=300)
+    parser.add_argument('--seed', type=int, default=1)
+    args = parser.parse_args()
+
+    print(f'{"rooms":>8}{"ms/frame":>12}{"p99 ms":>10}{"us/room":>10}{"rooms at 60 Hz":>16}')
+    for rooms in args.rooms:
+        times = sorted(run(rooms, args.frames, args.seed))
+        mean = sum(times) / len(times)
+        p99 = times[min(len(times) - 1, int(len(times) * .99))]
+        print(f'{rooms:>8}{mean * 1000:>12.2f}{p99 * 1000:>10.2f}{mean / rooms * 1e6:>10.1f}'
+              f'{FRAME / (mean / rooms):>16.0f}')
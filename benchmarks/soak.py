@@ -0,0 +1,76 @@
+"""
+Play many short rooms against one server and watch its memory and open sockets
+
+Run from the repository root:
+    python -m benchmarks.soak --rooms 10000 --wave 100
+
+Rooms are played in waves of scripted clients, the last room of every wave is one player short
+and only starts once the fill timeout passes. Every client quits after its first position update.
+Resident memory and open file descriptors of the server are read from /proc (Linux only)
+and should level off after the first waves.
+"""
+import argparse
+import asyncio
+import os
+
+from benchmarks.rooms import bot, connect, start_server
+from consts import *
+
+
+def resident(pid):
+    """
+    Resident memory of a process in kB
+    """
+    with open(f'/proc/{pid}/status') as f:
+        for line in f:
+            if line.startswith('VmRSS:'):
+                return int(line.split()[1])
+
+
+async def wave(port, rooms, fill_timeout):
+    """
+    Play rooms * 4 - 1 clients until all of them quit
+    """
+    stop = asyncio.Event()
+    bots = []
+    for _ in range(rooms * 4 - 1):
+        reader, writer = await connect(port)
+        bots.append(asyncio.ensure_future(bot(reader, writer, 1000, stop)))
+
+    # the short room has to start before its players may quit
+    await asyncio.sleep(fill_timeout)
+    stop.set()
+    await asyncio.gather(*bots)
+
+
+async def soak(process, port, rooms, size, fill_timeout, every):
+    samples = []
+    for played in range(size, rooms + 1, size):
+        await wave(port, size, fill_timeout)
+
+        if played % every == 0:
+            # let the server close the sockets of the last wave
+            await asyncio.sleep(.2)
+            sample = (played, resident(process.pid), len(os.listdir(f'/proc/{process.pid}/fd')))
+            samples.append(sample)
+            print(f'{sample[0]:>8}{sample[1] / 1024:>10.1f}{sample[2]:>8}')
+    return samples
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--mode', choices=('thread', 'async'), default='async')
+    parser.add_argument('--rooms', type=int, default=10000)
+    parser.add_argument('--wave', type=int, default=100, help='rooms played at the same time')
+    parser.add_argument('--fill-timeout', type=float, default=.2)
+    parser.add_argument('--every', type=int, default=1000, help='rooms between samples')
+    parser.add_argument('--port', type=int, default=ADDRESS[1] + 400)
+    args = parser.parse_args()
+
+    process = start_server(args.mode, args.port, fill_timeout=args.fill_timeout)
+    try:
+        print(f'{"rooms":>8}{"rss MB":>10}{"fds":>8}')
+        asyncio.run(soak(process, args.port, args.rooms, args.wave, args.fill_timeout, args.every))
+    finally:
+        process.terminate()
+        process.wait()
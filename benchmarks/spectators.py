@@ -0,0 +1,112 @@
+"""
+Measure server CPU of streaming one room to many spectators
+
+Run from the repository root:
+    python -m benchmarks.spectators --spectators 0 100 1000
+
+A room of four binary clients plays against a tick server while the given number of spectators
+watch it. Every spectator receives the same full snapshot, encoded once per tick.
+Also times encoding a tick for all spectators once, against encoding it for each of them.
+"""
+import argparse
+import asyncio
+import time
+
+import protocol
+from benchmarks.backpressure import client
+from benchmarks.rooms import connect, cpu_time, start_server
+from consts import *
+
+
+async def spectator(port, counts):
+    """
+    Watch the newest room and count the snapshots received
+    """
+    reader, writer = await connect(port)
+    writer.write(protocol.frame(protocol.MSG_WATCH, protocol.ROOM.pack(0)))
+
+    # frames are counted, not decoded, to leave the CPU to the server
+    decoder = protocol.Decoder()
+    while True:
+        try:
+            data = await reader.read(SIZE * 16)
+        except ConnectionError:
+            break
+        if not data:
+            break
+
+        counts.append(sum(msg_type == protocol.MSG_SNAPSHOT for msg_type, _ in decoder.feed(data)))
+
+    writer.close()
+
+
+async def watch(process, port, spectate, spectators, tick, duration):
+    players = [await connect(port) for _ in range(4)]
+    clients = [asyncio.ensure_future(client(reader, writer, tick, {})) for reader, writer in players]
+    # the room starts once the difficulty arrives
+    await asyncio.sleep(.5)
+
+    counts = []
+    watching = [asyncio.ensure_future(spectator(spectate, counts)) for _ in range(spectators)]
+    await asyncio.sleep(1)
+
+    counts.clear()
+    before, start = cpu_time(process.pid), time.monotonic()
+    await asyncio.sleep(duration)
+    after, end = cpu_time(process.pid), time.monotonic()
+    received = sum(counts)
+
+    for _, writer in players:
+        writer.close()
+    await asyncio.gather(*clients, *watching)
+    return (after - before) / (end - start), received / (end - start) / max(1, spectators)
+
+
+def encode_cost(spectators, ticks=100):
+    """
+    Seconds per tick spent encoding snapshots for the spectators, shared and one per spectator
+    """
+    snapshots = protocol.SnapshotEncoder()
+    positions = {color: (1, 100.0, 100.0) for color in COLORS}
+
+    start = time.perf_counter()
+    for i in range(ticks):
+        snapshots.push({color: (1, i, i) for color in positions})
+        for _ in range(spectators):
+            snapshots.encode(0)
+    shared = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for i in range(ticks):
+        snapshots.push({color: (1, i, i) for color in positions})
+        for _ in range(spectators):
+            snapshots.frames.clear()
+            snapshots.encode(0)
+    each = time.perf_counter() - start
+
+    return shared / ticks, each / ticks
+
+
+def measure(port, spectators, tick, duration):
+    process = start_server('async', port, tick, spectate=port + 1)
+    try:
+        cpu, rate = asyncio.run(watch(process, port, port + 1, spectators, tick, duration))
+    finally:
+        process.terminate()
+        process.wait()
+    return cpu, rate
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--spectators', type=int, nargs='+', default=[0, 100, 1000])
+    parser.add_argument('--tick', type=float, default=60)
+    parser.add_argument('--duration', type=float, default=5)
+    parser.add_argument('--port', type=int, default=ADDRESS[1] + 600)
+    args = parser.parse_args()
+
+    print(f'{"spectators":>10}{"cpu %":>10}{"snapshots/s each":>18}{"encode shared us":>18}{"encode each us":>16}')
+    for i, spectators in enumerate(args.spectators):
+        cpu, rate = measure(args.port + 2 * i, spectators, args.tick, args.duration)
+        shared, each = encode_cost(spectators)
+        print(f'{spectators:>10}{cpu * 100:>10.1f}{rate:>18.1f}{shared * 1e6:>18.0f}{each * 1e6:>16.0f}')
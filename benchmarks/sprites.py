@@ -0,0 +1,96 @@
+"""
+Measure what drawing a spinning pickup and a flying arrow costs, made every frame or looked up
+
+Run from the repository root:
+    python -m benchmarks.sprites --draws 20000 --step 1 3 10
+
+Pickups of every colour at random places and angles and arrows flying every way are drawn the given
+number of times, as the objects drew them before the sprite cache, making and turning their surfaces
+every time, and from the cache at each angular resolution, ready made at every angle as the game makes
+them when it starts. Next to it the memory the frames of the pickups take. Nothing is shown, the
+window is left to the dummy video driver.
+"""
+import argparse
+import os
+import random
+import time
+
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+
+import pygame as pyg
+
+import game_objects
+import obstacles
+import power_ups
+import simulation
+import sprites
+from consts import *
+
+PICKUPS = (power_ups.Key, power_ups.GravityRotator, power_ups.Jet)
+
+
+def pickup(self, surface):
+    """
+    How a pickup drew itself before the sprite cache
+    """
+    sur = pyg.Surface((self.width, self.height))
+    sur.fill(COLOR_BACKGROUND)
+    sur.set_colorkey((0, 255, 0))
+    pyg.draw.rect(sur, self.color, (0, 0, self.width, self.height))
+    pyg.draw.rect(sur, COLOR_BLACK, (0, 0, self.width, self.height), 1)
+    blitted = pyg.Rect(self.x, self.y, self.width, self.height)
+    surface.blit(sur, blitted)
+    rotated = pyg.transform.rotate(sur, self.degree)
+    surface.blit(rotated, rotated.get_rect(center=blitted.center))
+
+
+def arrow(self, surface, image):
+    """
+    How an arrow drew itself before the sprite cache
+    """
+    sprite = pyg.transform.rotate(image.convert(), 0 if self.vx > 0 else 180 if self.vx < 0 else
+                                  90 if self.vy < 0 else 270 if self.vy > 0 else 0)
+    sprite.set_colorkey((255, 255, 255))
+    surface.blit(sprite, (self.x, self.y))
+
+
+def timed(draw, objects):
+    start = time.perf_counter()
+    for obj in objects:
+        draw(obj)
+    return (time.perf_counter() - start) / len(objects)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--draws', type=int, default=20000)
+    parser.add_argument('--step', type=int, nargs='+', default=[1, 3, 10], help='degrees between frames')
+    parser.add_argument('--seed', type=int, default=1)
+    args = parser.parse_args()
+
+    pyg.init()
+    pyg.display.set_mode((WIDTH, HEIGHT))
+    surface = pyg.Surface((WIDTH, HEIGHT))
+    image = pyg.image.load('assets/arrow.png')
+
+    rng = random.Random(args.seed)
+    world = simulation.World()
+    pickups = []
+    for _ in range(args.draws):
+        kind = rng.choice(PICKUPS)
+        p = kind(world, rng.uniform(0, WIDTH - 20), rng.uniform(0, HEIGHT - 20),
+                 *((RIGHT,) if kind is power_ups.GravityRotator else ()))
+        p.degree = rng.randrange(360)
+        pickups.append(p)
+    arrows = [obstacles.Crossbow.Arrow(world, rng.uniform(0, WIDTH), rng.uniform(0, HEIGHT),
+                                       *rng.choice(((1, 0), (-1, 0), (0, 1), (0, -1)))) for _ in range(args.draws)]
+
+    print(f'{"":>12}{"us/pickup":>11}{"us/arrow":>10}{"frames":>8}{"kB":>8}')
+    print(f'{"every frame":>12}{timed(lambda p: pickup(p, surface), pickups) * 1e6:>11.1f}'
+          f'{timed(lambda a: arrow(a, surface, image), arrows) * 1e6:>10.1f}')
+    for step in args.step:
+        cache = game_objects.GameObject.sprites = sprites.Sprites(pyg, image, step)
+        cache.turn((COLOR_KEY, COLOR_GRAVITY_ROTATOR, COLOR_JET), 20, 20)
+        size = sum(frame.get_width() * frame.get_height() * frame.get_bytesize() for frame in cache.frames.values())
+        print(f'{f"step {step}":>12}{timed(lambda p: p.draw(surface, pyg), pickups) * 1e6:>11.1f}'
+              f'{timed(lambda a: a.draw(surface, pyg), arrows) * 1e6:>10.1f}{len(cache.frames):>8}{size / 1024:>8.0f}')
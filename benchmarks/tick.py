@@ -0,0 +1,133 @@
+"""
+Measure snapshot rate and staleness of opponent positions under simulated round trip times
+
+Run from the repository root:
+    python -m benchmarks.tick --duration 5
+
+A room of four binary clients is played against the ping-pong server and against tick servers.
+Every client delays what it receives and what it sends by half the round trip time.
+Each client writes a counter into its x coordinate, so the receiver knows when an opponent's
+position was produced; staleness is the age of that position when the snapshot is delivered.
+"""
+import argparse
+import asyncio
+import statistics
+
+import protocol
+from benchmarks.rooms import connect, start_server
+from consts import *
+
+RTTS = (.02, .1, .25)
+
+
+async def client(reader, writer, rtt, sent, samples, stop):
+    """
+    Binary client answering every snapshot with a fresh position, with rtt / 2 delay each way
+    """
+    loop = asyncio.get_running_loop()
+    color = (await reader.read(SIZE)).decode()
+    writer.write(protocol.offer().encode())
+    await reader.readexactly(len(protocol.CONFIRM))
+
+    counter = 0
+    snapshots = []
+    decoder = protocol.SnapshotDecoder()
+
+    def send(msg_type, payload=b''):
+        loop.call_later(rtt / 2, writer.write, protocol.frame(msg_type, payload))
+
+    def handle(msg_type, payload):
+        nonlocal counter
+
+        if msg_type == protocol.MSG_DIFF:
+            send(protocol.MSG_DIFFICULTY, protocol.LEVEL.pack(int(NORMAL)))
+        elif msg_type == protocol.MSG_BEGIN:
+            send(protocol.MSG_ACK)
+        elif msg_type in (protocol.MSG_POSITIONS, protocol.MSG_SNAPSHOT) and stop.is_set():
+            send(protocol.MSG_QUIT)
+        elif msg_type in (protocol.MSG_POSITIONS, protocol.MSG_SNAPSHOT):
+            if msg_type == protocol.MSG_POSITIONS:
+                positions = protocol.decode_positions(payload)
+            else:
+                positions = decoder.decode(payload)
+                send(protocol.MSG_SNAPSHOT_ACK, protocol.SEQUENCE.pack(decoder.seq))
+
+            now = loop.time()
+            snapshots.append(now)
+            for other, (level, x, _) in positions.items():
+                if other != color and level == 1:
+                    samples.append(now - sent[other][round(x)])
+
+            # the counter wraps to stay within the quantized coordinate range
+            counter = (counter + 1) % 1000
+            sent[color][counter] = now
+            send(protocol.MSG_POS, protocol.encode_position(1, counter, 0))
+
+    # the server closes the connection once the QUIT sent after stop arrives
+    while True:
+        try:
+            length, = protocol.LENGTH.unpack(await reader.readexactly(protocol.LENGTH.size))
+            body = await reader.readexactly(length)
+        except (asyncio.IncompleteReadError, ConnectionError):
+            break
+        loop.call_later(rtt / 2, handle, body[0], body[1:])
+
+    writer.close()
+    return snapshots
+
+
+async def play(port, rtt, duration):
+    """
+    Play one room and return (snapshots per second per client, staleness samples)
+    """
+    sent = {color: {} for color in COLORS}
+    samples = []
+    stop = asyncio.Event()
+
+    clients = []
+    for _ in range(4):
+        reader, writer = await connect(port)
+        clients.append(asyncio.ensure_future(client(reader, writer, rtt, sent, samples, stop)))
+
+    await asyncio.sleep(1 + duration)
+    stop.set()
+    snapshots = await asyncio.gather(*clients)
+
+    # only count the steady state, after the handshake
+    rates = [len([t for t in times if t >= times[-1] - duration]) / duration for times in snapshots if times]
+    return statistics.mean(rates), samples
+
+
+def measure(tick, port, rtt, duration):
+    process = start_server('async', port, tick)
+    try:
+        rate, samples = asyncio.run(play(port, rtt, duration))
+    finally:
+        process.kill()
+        process.wait()
+
+    samples.sort()
+    return {
+        'mode': f'tick {tick:g} Hz' if tick else 'ping-pong',
+        'rtt': rtt,
+        'rate': rate,
+        'staleness_p50': samples[len(samples) // 2],
+        'staleness_p99': samples[int(len(samples) * .99)]
+    }
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--ticks', type=float, nargs='+', default=[30, 60])
+    parser.add_argument('--duration', type=float, default=5)
+    parser.add_argument('--port', type=int, default=ADDRESS[1] + 200)
+    args = parser.parse_args()
+
+    print(f'{"mode":<14}{"rtt ms":>8}{"snapshots/s":>14}{"stale p50 ms":>14}{"stale p99 ms":>14}')
+    port = args.port
+    for rtt in RTTS:
+        for tick in [None] + args.ticks:
+            result = measure(tick, port, rtt, args.duration)
+            port += 1
+            print(f'{result["mode"]:<14}{rtt * 1000:>8.0f}{result["rate"]:>14.1f}'
+                  f'{result["staleness_p50"] * 1000:>14.1f}{result["staleness_p99"] * 1000:>14.1f}')
@@ -0,0 +1,90 @@
+"""
+Measure the hitch of walking through a door into the next level, with and without preparing it ahead
+
+Run from the repository root:
+    python -m benchmarks.transition --objects 0 500 2000
+
+Each pack holds the levels of the game with the given number of blocks added to every one of them,
+read as a process reads them the first time. In every level the door is opened as the keys open it,
+the door plays out its animation at 60 frames a second and then the player walks into the next level.
+Reported are the time the transition takes on the game thread, on average and at worst, and the
+longest frame of the door animation, which the level prepared on a thread of its own shares the
+interpreter with.
+"""
+import argparse
+import json
+import os
+import random
+import shutil
+import tempfile
+import time
+
+import levels
+import player
+import simulation
+from consts import *
+
+FRAME = 1 / 60
+
+
+def pack(count, directory, rng):
+    """
+    The levels of the game with the given number of blocks added to each
+    """
+    files = levels.Pack().files
+    for name in files:
+        with open(os.path.join(levels.PACK, name)) as f:
+            level = json.load(f)
+        level['objects'] += [{'type': 'block', 'x': rng.randrange(WIDTH), 'y': rng.randrange(HEIGHT),
+                              'width': rng.randint(10, 60), 'height': rng.randint(10, 60)} for _ in range(count)]
+        with open(os.path.join(directory, name), 'w') as f:
+            json.dump(level, f)
+    with open(os.path.join(directory, 'pack.json'), 'w') as f:
+        json.dump({'levels': files}, f)
+
+
+def run(directory, background):
+    """
+    Seconds of every transition and of the longest frame while doors opened
+    """
+    levels.compiled.clear()
+    shutil.rmtree(os.path.join(directory, levels.CACHE), ignore_errors=True)
+    world = simulation.World(levels.Pack(directory), background)
+    p = player.Player(world, COLOR_PLAYER_PURPLE)
+    transitions = []
+    longest = 0
+
+    while world.current_level < len(world.levels) - 1:
+        world.gate.open()
+        world.prefetch(world.current_level + 1)
+        while not world.gate.is_open:
+            start = time.perf_counter()
+            for obj in world.get_level_objects():
+                obj.update()
+            spent = time.perf_counter() - start
+            longest = max(longest, spent)
+            time.sleep(max(0, FRAME - spent))
+
+        start = time.perf_counter()
+        world.next_level(p)
+        transitions.append(time.perf_counter() - start)
+    return transitions, longest
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--objects', type=int, nargs='+', default=[0, 500, 2000])
+    parser.add_argument('--seed', type=int, default=1)
+    args = parser.parse_args()
+
+    print(f'{"objects":>8}{"":>10}{"ms/transition":>15}{"worst ms":>10}{"worst frame ms":>16}')
+    for count in args.objects:
+        directory = tempfile.mkdtemp()
+        try:
+            pack(count, directory, random.Random(args.seed))
+            for name, background in (('on entry', False), ('prefetch', True)):
+                transitions, longest = run(directory, background)
+                print(f'{count:>8}{name:>10}{sum(transitions) / len(transitions) * 1000:>15.2f}'
+                      f'{max(transitions) * 1000:>10.2f}{longest * 1000:>16.2f}')
+        finally:
+            shutil.rmtree(directory)
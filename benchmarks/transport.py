@@ -0,0 +1,181 @@
+"""
+Compare opponent update jitter over TCP and over the UDP channel under packet loss
+
+Run from the repository root:
+    python -m benchmarks.transport --loss 0 0.01 0.05
+
+A room of four binary clients plays against a tick server offering UDP, once with every
+client ignoring the token and once with every client using the UDP channel.
+Loss is injected by the clients on loopback: a lost datagram is simply dropped, a lost TCP
+segment is retransmitted after the minimum retransmission timeout (200 ms on Linux) and holds
+back everything received after it, as in-order delivery does.
+Jitter is the standard deviation of the time between two updates of the same opponent.
+"""
+import argparse
+import asyncio
+import random
+import statistics
+
+import protocol
+from benchmarks.rooms import connect, start_server
+from consts import *
+
+RTO = .2
+
+
+class Endpoint(asyncio.DatagramProtocol):
+    """
+    Client side of the UDP channel, drops received datagrams at the loss rate
+    """
+    def __init__(self, deliver, loss, rng):
+        self.deliver = deliver
+        self.loss = loss
+        self.rng = rng
+
+    def datagram_received(self, data, address):
+        if self.rng.random() >= self.loss:
+            for msg_type, payload in protocol.Decoder().feed(data):
+                self.deliver(msg_type, payload)
+
+
+async def client(reader, writer, udp, loss, rtt, intervals, stop, seed):
+    """
+    Binary client answering every snapshot with a new position, with rtt / 2 delay each way
+    """
+    loop = asyncio.get_running_loop()
+    rng = random.Random(seed)
+
+    color = (await reader.read(SIZE)).decode()
+    writer.write(protocol.offer().encode())
+    await reader.readexactly(len(protocol.CONFIRM))
+
+    decoder = protocol.SnapshotDecoder()
+    channel = None
+    token = b''
+    counter = 0
+    updates = {}
+
+    def send(data):
+        loop.call_later(rtt / 2, writer.write, data)
+
+    def send_update(data):
+        if channel is None:
+            send(data)
+        elif rng.random() >= loss:
+            loop.call_later(rtt / 2, channel.sendto, token + data)
+
+    async def open_channel(server_port):
+        nonlocal channel
+        channel, _ = await loop.create_datagram_endpoint(
+            lambda: Endpoint(lambda t, p: loop.call_later(rtt / 2, handle, t, p), loss, rng),
+            remote_addr=(IP[0], server_port))
+
+    def handle(msg_type, payload):
+        nonlocal counter, token
+
+        if msg_type == protocol.MSG_DIFF:
+            send(protocol.frame(protocol.MSG_DIFFICULTY, protocol.LEVEL.pack(int(NORMAL))))
+        elif msg_type == protocol.MSG_BEGIN:
+            send(protocol.frame(protocol.MSG_ACK))
+        elif msg_type == protocol.MSG_TOKEN and udp:
+            session, server_port = protocol.TOKEN.unpack(payload)
+            token = protocol.DATAGRAM.pack(session)
+            asyncio.ensure_future(open_channel(server_port))
+        elif msg_type == protocol.MSG_SNAPSHOT and stop.is_set():
+            send(protocol.frame(protocol.MSG_QUIT))
+        elif msg_type == protocol.MSG_SNAPSHOT:
+            positions = decoder.decode(payload)
+            if positions is None:
+                return
+
+            now = loop.time()
+            for other, position in positions.items():
+                if other != color and position[0] == 1:
+                    last = updates.get(other)
+                    if last is None or last[1] != position:
+                        if last is not None:
+                            intervals.append(now - last[0])
+                        updates[other] = (now, position)
+
+            counter = (counter + 1) % 1000
+            send_update(decoder.ack() + protocol.frame(protocol.MSG_POS, protocol.encode_position(1, counter, 0)))
+
+    # TCP delivers in order, a lost segment delays itself and everything behind it
+    queue = asyncio.Queue()
+
+    async def deliver():
+        while True:
+            at, msg_type, payload = await queue.get()
+            await asyncio.sleep(at - loop.time())
+            handle(msg_type, payload)
+
+    delivery = asyncio.ensure_future(deliver())
+    blocked = 0
+    while True:
+        try:
+            length, = protocol.LENGTH.unpack(await reader.readexactly(protocol.LENGTH.size))
+            body = await reader.readexactly(length)
+        except (asyncio.IncompleteReadError, ConnectionError):
+            break
+
+        now = loop.time()
+        if rng.random() < loss:
+            blocked = max(blocked, now) + RTO
+        queue.put_nowait((max(now, blocked) + rtt / 2, body[0], body[1:]))
+
+    delivery.cancel()
+    if channel is not None:
+        channel.close()
+    writer.close()
+
+
+async def play(port, udp, loss, rtt, duration):
+    intervals = []
+    stop = asyncio.Event()
+
+    clients = []
+    for i in range(4):
+        reader, writer = await connect(port)
+        clients.append(asyncio.ensure_future(client(reader, writer, udp, loss, rtt, intervals, stop, i)))
+
+    await asyncio.sleep(1 + duration)
+    stop.set()
+    await asyncio.gather(*clients)
+    return intervals
+
+
+def measure(udp, port, tick, loss, rtt, duration):
+    process = start_server('async', port, tick, udp=True)
+    try:
+        intervals = asyncio.run(play(port, udp, loss, rtt, duration))
+    finally:
+        process.kill()
+        process.wait()
+
+    intervals.sort()
+    return {
+        'transport': 'udp' if udp else 'tcp',
+        'loss': loss,
+        'interval': statistics.mean(intervals),
+        'jitter': statistics.pstdev(intervals),
+        'gap_p99': intervals[int(len(intervals) * .99)]
+    }
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--loss', type=float, nargs='+', default=[0, .01, .05])
+    parser.add_argument('--tick', type=float, default=30)
+    parser.add_argument('--rtt', type=float, default=.05)
+    parser.add_argument('--duration', type=float, default=5)
+    parser.add_argument('--port', type=int, default=ADDRESS[1] + 300)
+    args = parser.parse_args()
+
+    print(f'{"transport":<11}{"loss %":>8}{"interval ms":>13}{"jitter ms":>11}{"gap p99 ms":>12}')
+    port = args.port
+    for loss in args.loss:
+        for udp in (False, True):
+            result = measure(udp, port, args.tick, loss, args.rtt, args.duration)
+            port += 1
+            print(f'{result["transport"]:<11}{loss * 100:>8.1f}{result["interval"] * 1000:>13.1f}'
+                  f'{result["jitter"] * 1000:>11.1f}{result["gap_p99"] * 1000:>12.1f}')
@@ -0,0 +1,224 @@
+import argparse
+import asyncio
+import random
+import time
+
+import protocol
+from consts import *
+
+FPS = 60
+
+
+class Bot:
+    """
+    Headless client speaking the whole protocol the way the game client does
+    Walks for a while, reports its score from the scoreboard room, lingers there and quits
+    Its x coordinate carries a counter, the time until the server echoes it back is the round trip
+    A server running the physics moves it by random keys instead, sent with every reply
+    """
+    def __init__(self, host: str = IP[0], port: int = IP[1], binary: bool = True, difficulty: str = NORMAL,
+                 play: float = 10, lounge: float = 2, rate: float = FPS) -> None:
+        self.host = host
+        self.port = port
+        self.binary = binary
+        self.difficulty = difficulty
+        self.play = play
+        self.lounge = lounge
+        self.rate = rate
+
+        self.color = None
+        self.reader = None
+        self.writer = None
+
+        self.simulated = False
+        self.keys = 0
+        self.held = 0
+        self.inputs = 0
+
+        self.counter = 0
+        self.sent = {}
+        self.last = 0
+        self.started = None
+
+        self.handshake = None
+        self.received = 0
+        self.rtts = []
+
+    async def run(self) -> dict:
+        """
+        Play one game, return its statistics
+        """
+        start = time.perf_counter()
+        self.reader, self.writer = await asyncio.open_connection(self.host, self.port)
+        self.color = (await self.reader.read(SIZE)).decode()
+
+        self.writer.write((protocol.offer() if self.binary else ACK).encode())
+        if self.binary:
+            await self.reader.readexactly(len(protocol.CONFIRM))
+        self.handshake = time.perf_counter() - start
+
+        heartbeat = asyncio.create_task(self.heartbeat()) if self.binary else None
+        try:
+            if self.binary:
+                await self.run_binary()
+            else:
+                await self.run_string()
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            if heartbeat is not None:
+                heartbeat.cancel()
+            self.writer.close()
+
+        return {
+            'color': self.color,
+            'handshake': self.handshake,
+            'received': self.received,
+            'duration': time.perf_counter() - start,
+            'rtts': self.rtts
+        }
+
+    async def heartbeat(self) -> None:
+        while True:
+            await asyncio.sleep(HEARTBEAT_INTERVAL)
+            self.writer.write(protocol.frame(protocol.MSG_HEARTBEAT))
+
+    async def run_binary(self) -> None:
+        decoder = protocol.SnapshotDecoder()
+        while True:
+            length, = protocol.LENGTH.unpack(await self.reader.readexactly(protocol.LENGTH.size))
+            body = await self.reader.readexactly(length)
+            msg_type, payload = body[0], body[1:]
+            self.received += 1
+
+            if msg_type == protocol.MSG_DIFF:
+                self.writer.write(protocol.frame(protocol.MSG_DIFFICULTY, protocol.LEVEL.pack(int(self.difficulty))))
+            elif msg_type == protocol.MSG_SIMULATE:
+                self.simulated = True
+            elif msg_type == protocol.MSG_BEGIN:
+                self.writer.write(protocol.frame(protocol.MSG_ACK))
+                self.started = time.perf_counter()
+            elif msg_type == protocol.MSG_SCORES:
+                self.writer.write(protocol.frame(protocol.MSG_SCORE, protocol.encode_score(self.score())))
+            elif msg_type in (protocol.MSG_POSITIONS, protocol.MSG_SNAPSHOT):
+                if msg_type == protocol.MSG_POSITIONS:
+                    positions = protocol.decode_positions(payload)
+                    ack = b''
+                else:
+                    positions = decoder.decode(payload)
+                    if positions is None:
+                        continue
+                    ack = decoder.ack()
+
+                self.echo(positions)
+                if self.finished():
+                    self.writer.write(protocol.frame(protocol.MSG_QUIT))
+                    return
+                if msg_type == protocol.MSG_POSITIONS:
+                    await self.pace()
+
+                kind = protocol.MSG_DONE if self.in_lounge() else protocol.MSG_POS
+                self.writer.write(ack + protocol.frame(kind, protocol.encode_position(*self.next_position())))
+                if self.simulated:
+                    self.writer.write(protocol.frame(protocol.MSG_INPUT, protocol.INPUT.pack(*self.next_input())))
+
+    async def run_string(self) -> None:
+        while True:
+            msg = (await self.reader.read(SIZE)).decode()
+            if not msg:
+                return
+            self.received += 1
+
+            if msg == DIFF:
+                self.writer.write(self.difficulty.encode())
+            elif msg.startswith(BEGIN):
+                self.writer.write(ACK.encode())
+                self.started = time.perf_counter()
+            elif msg.startswith(SCORE):
+                self.writer.write(f'{self.score()}'.encode())
+            elif msg.startswith(POS):
+                self.echo(protocol.parse_string_positions(msg))
+                if self.finished():
+                    self.writer.write(QUIT.encode())
+                    return
+                await self.pace()
+
+                level, x, y = self.next_position()
+                prefix = f'{DONE}:' if self.in_lounge() else ''
+                self.writer.write(f'{prefix}{level}:{x}:{y}'.encode())
+
+    async def pace(self) -> None:
+        """
+        Answer ping-pong positions no faster than the frame rate of the game client
+        """
+        delay = self.last + 1 / self.rate - time.perf_counter()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        self.last = time.perf_counter()
+
+    def next_position(self) -> tuple:
+        """
+        Position to send next, remembering when its counter left
+        """
+        # the counter wraps to stay within the quantized coordinate range
+        self.counter = self.counter % 1000 + 1
+        self.sent[self.counter] = time.perf_counter()
+        return 1, float(self.counter), random.uniform(50, 550)
+
+    def next_input(self) -> tuple:
+        """
+        Input to send next, random keys held for a random number of frames
+        """
+        if not self.held:
+            self.keys = random.choice((0, KEY_LEFT, KEY_RIGHT, KEY_UP, KEY_UP | KEY_LEFT, KEY_UP | KEY_RIGHT))
+            self.held = random.randint(5, 40)
+        self.held -= 1
+        self.inputs += 1
+        return self.inputs, self.keys
+
+    def echo(self, positions: dict) -> None:
+        """
+        Record the round trip of the own position the server sent back
+        """
+        position = positions.get(self.color)
+        if position is not None:
+            sent = self.sent.pop(round(position[1]), None)
+            if sent is not None:
+                self.rtts.append(time.perf_counter() - sent)
+
+    def score(self) -> int:
+        """
+        Seconds played, the game client counts them the same way
+        """
+        return int(time.perf_counter() - self.started)
+
+    def in_lounge(self) -> bool:
+        return time.perf_counter() - self.started >= self.play
+
+    def finished(self) -> bool:
+        return time.perf_counter() - self.started >= self.play + self.lounge
+
+
+async def run_bots(count: int, **options) -> list:
+    return await asyncio.gather(*[Bot(**options).run() for _ in range(count)])
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Headless Dyber clients')
+    parser.add_argument('--host', default=IP[0])
+    parser.add_argument('--port', type=int, default=IP[1])
+    parser.add_argument('--bots', type=int, default=4)
+    parser.add_argument('--string', action='store_true', help='speak the string protocol instead of binary')
+    parser.add_argument('--difficulty', choices=(NORMAL, HARD, EXTREME), default=NORMAL)
+    parser.add_argument('--play', type=float, default=10, help='seconds walking before reaching the scoreboard')
+    parser.add_argument('--lounge', type=float, default=2, help='seconds in the scoreboard room before quitting')
+    parser.add_argument('--rate', type=float, default=FPS, help='ping-pong replies per second')
+    args = parser.parse_args()
+
+    results = asyncio.run(run_bots(args.bots, host=args.host, port=args.port, binary=not args.string,
+                                   difficulty=args.difficulty, play=args.play, lounge=args.lounge, rate=args.rate))
+    for result in results:
+        rtts = sorted(result['rtts'])
+        rtt = f'{rtts[len(rtts) // 2] * 1000:.1f} ms' if rtts else '-'
+        print(f'{result["color"]:<8}handshake {result["handshake"] * 1000:.1f} ms, '
+              f'{result["received"]} messages, median round trip {rtt}')
@@ -10,6 +10,7 @@ DONE = 'DONE'
 SCORE = 'SCORE'
 POS = 'POS'
 QUIT = 'QUIT'
+INPUT = 'INPUT'
 
 NORMAL = '3'
 HARD = '5'
@@ -19,5 +20,89 @@ PURPLE = 'Purple'
 RED = 'Red'
 GREEN = 'Green'
 BROWN = 'Brown'
+COLORS = (PURPLE, RED, GREEN, BROWN)
 
 SIZE = 1024
+
+HEARTBEAT_INTERVAL = 1  # seconds between heartbeats of an idle binary client
+READ_TIMEOUT = 5  # seconds of silence after which a player counts as disconnected
+SEND_LIMIT = 64 * 1024  # bytes of control messages queued for a player who stopped reading
+SNAPSHOT_WINDOW = 32  # snapshots sent to a player beyond the last one it acknowledged
+SNAPSHOT_STALLED = 8  # ticks between the full snapshots sent to a player beyond its window
+
+# Playfield
+WIDTH = 600
+HEIGHT = 600
+GRAVITY = 0.3
+
+COLOR_BLACK = (0, 0, 0)
+COLOR_WHITE = (255, 255, 255)
+COLOR_BACKGROUND = (200, 200, 200)
+COLOR_PLAYER_RED = (200, 0, 0)
+COLOR_PLAYER_PURPLE = (118, 6, 204)
+COLOR_PLAYER_GREEN = (23, 110, 8)
+COLOR_PLAYER_BROWN = (79, 46, 5)
+COLOR_BLOCK = (100, 100, 100)
+COLOR_DOOR = (100, 50, 50)
+COLOR_KEY = (190, 190, 50)
+COLOR_GRAVITY_ROTATOR = (70, 130, 20)
+COLOR_SPIKES = (50, 50, 50)
+COLOR_SPRINGBOARD = ((80, 20, 20), (70, 70, 70))
+COLOR_JET = (140, 5, 180)
+COLOR_CROSSBOW = (100, 50, 0)
+COLOR_ARROW = ((80, 40, 0), (100, 100, 100), (255, 255, 255))
+PLAYER_COLORS = {
+    PURPLE: COLOR_PLAYER_PURPLE,
+    RED: COLOR_PLAYER_RED,
+    GREEN: COLOR_PLAYER_GREEN,
+    BROWN: COLOR_PLAYER_BROWN
+}
+
+TYPE_BLOCK = 0
+TYPE_PLAYER = 1
+TYPE_KEY = 2
+TYPE_GRAVITY_ROTATOR = 3
+TYPE_DOOR = 4
+TYPE_SPIKES = 5
+TYPE_SPRINGBOARD = 6
+TYPE_JET = 7
+TYPE_CROSSBOW = 8
+TYPE_ARROW = 9
+
+# what touching a level object does, levels sort their objects by it once
+GROUP_SOLID = 0
+GROUP_HAZARD = 1
+GROUP_PICKUP = 2
+GROUP_CROSSBOW = 3
+GROUP_DOOR = 4
+GROUP_SPRINGBOARD = 5
+GROUPS = (GROUP_SOLID, GROUP_HAZARD, GROUP_PICKUP, GROUP_CROSSBOW, GROUP_DOOR, GROUP_SPRINGBOARD)
+ARROW_STOPS = (GROUP_SOLID, GROUP_HAZARD, GROUP_DOOR, GROUP_SPRINGBOARD)
+SCENERY = (GROUP_SOLID, GROUP_HAZARD, GROUP_CROSSBOW, GROUP_SPRINGBOARD)  # drawn once, they only move when rotating
+ACTIVE = (GROUP_PICKUP, GROUP_CROSSBOW, GROUP_DOOR)  # change every frame, the rest only while the level turns
+
+LEFT = -1
+RIGHT = 1
+UP = -1
+DOWN = 1
+
+# bits of the keys held in one frame, the input the player sends to an authoritative server
+KEY_LEFT = 1
+KEY_RIGHT = 2
+KEY_UP = 4
+KEY_RETRY = 8
+
+FPS = 60  # frames a second the game runs at
+INPUT_BUFFER = 256  # inputs a client keeps until the server acknowledges them, about four seconds
+INPUT_BURST = 30  # frames an authoritative server steps a player ahead of FPS, for inputs the network bunched up
+CORRECTION_BUDGET = 3  # px per frame a corrected player is drawn moving towards its real position
+SNAP_DISTANCE = 120  # px of correction too far to smooth, the player is drawn there at once
+
+GRID_CELL = 100  # px side of a cell of the grid collisions are looked up in
+
+INTERPOLATION_DELAY = 0.1  # seconds opponents are drawn behind the newest position received of them
+INTERPOLATION_BUFFER = 32  # positions kept of each opponent
+EXTRAPOLATION_LIMIT = 0.1  # seconds an opponent keeps moving past its newest position before it waits
+
+SPRITE_STEP = 1  # degrees between the turned frames of a spinning pickup kept, 1 draws every degree
+SPRITE_CACHE = 4096  # frames of pickups and shapes kept, the least recently drawn go first
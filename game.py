@@ -1,13 +1,17 @@
 import socket
 import sys
-from threading import Thread
+import time
+from threading import Lock, Thread
 
 import pygame as pyg
 
 import game_objects
-import obstacles
+import interpolation
+import layers
 import player
-import power_ups
+import protocol
+import simulation
+import sprites
 
 from consts import *
 
@@ -18,66 +22,27 @@ class Game:
     Handles all game-related constants and game logistics
     Interacts with the server
     """
-    WIDTH: int = 600
-    HEIGHT: int = 600
-    GRAVITY: float = 0.3
     FPS: int = 60
     TITLE: str = 'Dyber'
 
-    COLOR_BLACK: tuple = (0, 0, 0)
-    COLOR_WHITE: tuple = (255, 255, 255)
-    COLOR_BACKGROUND: tuple = (200, 200, 200)
-    COLOR_PLAYER_RED: tuple = (200, 0, 0)
-    COLOR_PLAYER_PURPLE: tuple = (118, 6, 204)
-    COLOR_PLAYER_GREEN: tuple = (23, 110, 8)
-    COLOR_PLAYER_BROWN: tuple = (79, 46, 5)
-    COLOR_BLOCK: tuple = (100, 100, 100)
-    COLOR_DOOR: tuple = (100, 50, 50)
-    COLOR_KEY: tuple = (190, 190, 50)
-    COLOR_GRAVITY_ROTATOR: tuple = (70, 130, 20)
-    COLOR_SPIKES: tuple = (50, 50, 50)
-    COLOR_SPRINGBOARD: tuple = ((80, 20, 20), (70, 70, 70))
-    COLOR_JET: tuple = (140, 5, 180)
-    COLOR_CROSSBOW: tuple = (100, 50, 0)
-    COLOR_ARROW: tuple = ((80, 40, 0), (100, 100, 100), (255, 255, 255))
-
-    TYPE_BLOCK: int = 0
-    TYPE_PLAYER: int = 1
-    TYPE_KEY: int = 2
-    TYPE_GRAVITY_ROTATOR: int = 3
-    TYPE_DOOR: int = 4
-    TYPE_SPIKES: int = 5
-    TYPE_SPRINGBOARD: int = 6
-    TYPE_JET: int = 7
-    TYPE_CROSSBOW: int = 8
-    TYPE_ARROW: int = 9
-
-    LEFT: int = -1
-    RIGHT: int = 1
-    UP: int = -1
-    DOWN: int = 1
-
-    sprite_arrow: pyg.Surface = None
-
-    is_rotating: bool = False
     is_running: bool = False
-    is_up_pressed: bool = False
+    keys: int = 0
 
-    levels: list = []
-    start_points: list = []
-    current_level: int = 0
-    total_keys: int = 0
+    world: simulation.World = None
+    lock: Lock = Lock()
     frame_count: int = 1
     frame_cycles: int = 0
 
     screen: pyg.Surface = None
     surface: pyg.Surface = None
+    scenery: layers.Scenery = None
+    rotation: layers.Rotation = None
     timer: pyg.time.Clock = None
 
     player1: player.Player = None
     opponents: dict = None
-
-    gate: game_objects = None
+    interpolations: dict = None  # color to the positions received of that opponent
+    interpolation_delay: float = INTERPOLATION_DELAY
 
     scores: dict = {}
 
@@ -88,16 +53,22 @@ class Game:
     button_font: pyg.font.Font = None
 
     csocket: socket.socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    send_lock: Lock = Lock()  # several threads write to csocket, a message must go out whole and alone
+    binary: bool = False
+    use_udp: bool = True
+    usocket: socket.socket = None
+    token: bytes = None
     game_start: bool = False
     begin_cycles: int = None
+    simulated: bool = False
+    prediction: simulation.Prediction = None
+    show_paths: bool = False
 
     start_btn = None
     normal_btn = None
     hard_btn = None
     extreme_btn = None
 
-    god_mode: bool = False
-
     class Button:
         """
         Used for easy GUI options
@@ -109,15 +80,21 @@ class Game:
             self.size = size
             self.half = (self.size[0] / 2, self.size[1] / 2)
             self.text = text
+            self.image = None  # the button drawn onto a surface of its own the first time it is shown
 
-        def render(self):
+        def item(self) -> tuple:
             """
-            Render button to screen
+            The button as an item of the frame
             """
-            Game.draw_text(self.text, self.pos, Game.button_font)
-            pyg.draw.rect(Game.surface, Game.COLOR_BLACK, (self.pos[0] - self.half[0],
-                                                           self.pos[1] - self.half[1],
-                                                           self.size[0], self.size[1]), 4)
+            if self.image is None:
+                self.image = pyg.Surface(self.size).convert()
+                self.image.fill(COLOR_BACKGROUND)
+                self.image.set_colorkey(COLOR_BACKGROUND)
+                text = Game.button_font.render(self.text, True, COLOR_BLACK)
+                self.image.blit(text, (self.half[0] - text.get_width() / 2, self.half[1] - text.get_height() / 2))
+                pyg.draw.rect(self.image, COLOR_BLACK, (0, 0, self.size[0], self.size[1]), 4)
+            corner = (self.pos[0] - self.half[0], self.pos[1] - self.half[1])
+            return layers.area(*corner, *self.size), self.text, (self.image, corner)
 
         def contains(self, mx, my):
             """
@@ -132,118 +109,302 @@ class Game:
         """
         def run(self) -> None:
             """
-            Render all game objects, players and menus
+            Render all game objects, players and menus, at most FPS frames a second
+            Only the areas of the screen which changed are drawn and shown again
             """
+            clock = pyg.time.Clock()
+            blank = pyg.Surface((WIDTH, HEIGHT)).convert()
+            blank.fill(COLOR_BACKGROUND)
+            dirty = layers.DirtyRects()
+
             while Game.is_running:
-                Game.surface.fill(Game.COLOR_BACKGROUND)
+                clock.tick(Game.FPS)
 
                 # when in welcome screen
                 if Game.welcome:
-                    Game.draw_text(Game.TITLE, (Game.WIDTH / 2, Game.HEIGHT / 2 - 100), Game.header_font)
-                    Game.start_btn.render()
+                    background, version = blank, None
+                    items = [Game.text_item(Game.TITLE, (WIDTH / 2, HEIGHT / 2 - 100), Game.header_font),
+                             Game.start_btn.item()]
                 else:  # when in game screen
-                    for obj in Game.get_level_objects():
-                        obj.render(Game.surface, pyg)
+                    background, version, items = layers.level_items(Game.world, Game.scenery, Game.rotation,
+                                                                    Game.show_paths)
 
-                    for opponent in Game.opponents.values():
-                        if opponent != Game.player1 and opponent.level == Game.current_level:
-                            opponent.render(Game.surface, pyg)
+                    now = time.monotonic()
+                    for color, opponent in Game.opponents.items():
+                        if opponent == Game.player1:
+                            continue
 
-                    Game.player1.render(Game.surface, pyg)
+                        position = Game.interpolations[color].sample(now)
+                        if position is not None:
+                            opponent.level, opponent.x, opponent.y = position
+                        if opponent.level == Game.world.current_level:
+                            items.append(Game.player_item(opponent))
+
+                    items.append(Game.player_item(Game.player1))
 
                     # show time since game start
-                    past = Game.header_font.render(str(Game.frame_cycles), True, Game.COLOR_BLACK)
-                    Game.surface.blit(past, (50, 50))
+                    items.append(Game.text_item(str(Game.frame_cycles), (50, 50), Game.header_font, False))
 
                     # if in god test mode -> show indication
-                    if Game.god_mode:
-                        god = Game.header_font.render('GOD', True, Game.COLOR_BLACK)
-                        Game.surface.blit(god, (500, 50))
+                    if Game.world.god_mode:
+                        items.append(Game.text_item('GOD', (500, 50), Game.header_font, False))
 
                     # in difficulty chooser
                     if Game.difficulty:
-                        Game.draw_text('Choose Difficulty', (Game.WIDTH / 2, Game.HEIGHT / 2 - 200), Game.header_font)
-                        Game.normal_btn.render()
-                        Game.hard_btn.render()
-                        Game.extreme_btn.render()
+                        items.append(Game.text_item('Choose Difficulty', (WIDTH / 2, HEIGHT / 2 - 200),
+                                                    Game.header_font))
+                        items += [Game.normal_btn.item(), Game.hard_btn.item(), Game.extreme_btn.item()]
 
                     # in scoreboard room
                     if Game.score_board:
-                        Game.draw_text('Score Board', (Game.WIDTH / 2, Game.HEIGHT / 2 - 200), Game.header_font)
+                        items.append(Game.text_item('Score Board', (WIDTH / 2, HEIGHT / 2 - 200), Game.header_font))
                         sorted_scores = dict(sorted(Game.scores.items(), key=lambda item: item[1]))
 
                         off = -100
                         for key in sorted_scores.keys():
                             if sorted_scores[key] != 0:
-                                Game.draw_text(key, (Game.WIDTH / 2 - 100, Game.HEIGHT / 2 + off), Game.header_font)
-                                Game.draw_text(str(sorted_scores[key]),
-                                               (Game.WIDTH / 2 + 100, Game.HEIGHT / 2 + off), Game.header_font)
+                                items.append(Game.text_item(key, (WIDTH / 2 - 100, HEIGHT / 2 + off),
+                                                            Game.header_font))
+                                items.append(Game.text_item(str(sorted_scores[key]),
+                                                            (WIDTH / 2 + 100, HEIGHT / 2 + off), Game.header_font))
                                 off += 100
 
                     # when starting the game
                     if Game.game_start and Game.frame_cycles - Game.begin_cycles < 3:
-                        begin_text = Game.header_font.render('Begin!', True, Game.COLOR_BLACK)
-                        Game.surface.blit(begin_text, (Game.WIDTH / 2 - begin_text.get_width() / 2,
-                                                       Game.HEIGHT / 2 - begin_text.get_height() / 2))
+                        items.append(Game.text_item('Begin!', (WIDTH / 2, HEIGHT / 2), Game.header_font))
 
-                Game.screen.blit(Game.surface, (0, 0))
-                pyg.display.flip()
+                rects = dirty.render(Game.surface, background, version, items)
+                if rects:
+                    for rect in rects:
+                        Game.screen.blit(Game.surface, rect, rect)
+                    pyg.display.update(rects)
 
     class Comm(Thread):
         """
         A thread to communicate with the server and deliver messages
         """
+        def run(self) -> None:
+            # a server speaking the binary protocol confirms it before anything else
+            data = Game.csocket.recv(SIZE)
+            Game.binary = data.startswith(protocol.CONFIRM)
+
+            if Game.binary:
+                self.snapshots = protocol.SnapshotDecoder()
+                self.lock = Lock()
+                Game.Heartbeat().start()
+                decoder = protocol.Decoder()
+                frames = decoder.feed(data)[1:]
+                while Game.is_running:
+                    for msg_type, payload in frames:
+                        self.on_frame(msg_type, payload)
+                    data = self.receive()
+                    if not data:
+                        return
+                    frames = decoder.feed(data)
+
+                Game.send(protocol.frame(protocol.MSG_QUIT))
+            else:
+                msg = data.decode()
+                while Game.is_running:
+                    self.on_message(msg)
+                    data = self.receive()
+                    if not data:
+                        return
+                    msg = data.decode()
+
+                Game.send(QUIT.encode())
+
+        @staticmethod
+        def receive() -> bytes:
+            """
+            Receive from the server, nothing once it closed the connection, which stops the game
+            """
+            try:
+                data = Game.csocket.recv(SIZE)
+            except OSError:
+                data = b''
+            if not data:
+                Game.stop_running()
+            return data
+
+        def on_frame(self, msg_type: int, payload: bytes) -> None:
+            """
+            Handle a frame of the binary protocol
+            """
+            if msg_type == protocol.MSG_DIFF:  # server asking to choose difficulty
+                Game.difficulty = True
+            elif msg_type == protocol.MSG_BEGIN:  # the game shall start
+                Game.send(protocol.frame(protocol.MSG_ACK))
+                self.on_begin(protocol.LEVEL.unpack(payload)[0])
+            elif msg_type == protocol.MSG_SCORES:  # receive scores to show on leaderboard
+                self.on_scores(protocol.decode_scores(payload))
+                Game.send(protocol.frame(protocol.MSG_SCORE, protocol.encode_score(Game.frame_cycles)))
+            elif msg_type == protocol.MSG_POSITIONS:  # receive position of other players
+                self.on_positions(protocol.decode_positions(payload))
+                Game.send(self.position_frame())
+            elif msg_type == protocol.MSG_SNAPSHOT:  # receive delta compressed positions of other players
+                # snapshots still arriving over TCP may race the first ones over UDP
+                with self.lock:
+                    positions = self.snapshots.decode(payload)
+                    ack = self.snapshots.ack()
+
+                if positions is not None:
+                    self.on_positions(positions)
+                    Game.send_update(ack + self.position_frame())
+            elif msg_type == protocol.MSG_SIMULATE:  # server running the physics from inputs
+                Game.simulated = True
+            elif msg_type == protocol.MSG_STATE:  # authoritative state of the own player
+                with Game.lock:
+                    Game.prediction.reconcile(*protocol.decode_state(payload))
+            elif msg_type == protocol.MSG_TOKEN and Game.use_udp:  # server offering a UDP channel for positions
+                token, port = protocol.TOKEN.unpack(payload)
+                Game.token = protocol.DATAGRAM.pack(token)
+                Game.usocket = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+                Game.usocket.connect((Game.csocket.getpeername()[0], port))
+                Game.Datagrams(self).start()
+
+        def position_frame(self) -> bytes:
+            """
+            Frame with current position in level, marked as done when in the scoreboard room
+            """
+            position = protocol.encode_position(Game.world.current_level, Game.player1.x, Game.player1.y)
+            if self.in_lounge():
+                return protocol.frame(protocol.MSG_DONE, position)
+            return protocol.frame(protocol.MSG_POS, position)
+
+        def on_message(self, msg: str) -> None:
+            """
+            Handle a message of the string protocol
+            """
+            if msg == DIFF:  # server asking to choose difficulty
+                Game.difficulty = True
+            elif msg.startswith(BEGIN):  # the game shall start
+                Game.send(ACK.encode())
+                self.on_begin(int(msg.split(':')[1]))
+            elif msg.startswith(SCORE):  # receive scores to show on leaderboard
+                self.on_scores(protocol.parse_string_scores(msg))
+                Game.send(f'{Game.frame_cycles}'.encode())
+            elif msg.startswith(POS):  # receive position of other players
+                self.on_positions(protocol.parse_string_positions(msg))
+
+                if self.in_lounge():
+                    Game.send(f'{DONE}:{Game.world.current_level}:{Game.player1.x}:{Game.player1.y}'.encode())
+                else:  # send current position in level to other players
+                    Game.send(f'{Game.world.current_level}:{Game.player1.x}:{Game.player1.y}'.encode())
+
+        @staticmethod
+        def on_begin(difficulty: int) -> None:
+            # between two frames, so an authoritative server receives inputs from the first frame on
+            with Game.lock:
+                Game.game_start = True
+                Game.begin_cycles = Game.frame_cycles
+                Game.world.begin(Game.player1, difficulty)  # exit lobby level, adjust level amount to difficulty
+
+        @staticmethod
+        def on_scores(scores: dict) -> None:
+            for color in scores.keys():
+                if color != Game.player1.color:
+                    Game.scores[color] = scores[color]
+
+        @staticmethod
+        def on_positions(positions: dict) -> None:
+            # the renderer draws opponents from these, a little in the past but moving smoothly
+            now = time.monotonic()
+            for color in Game.opponents.keys():
+                if Game.opponents[color] == Game.player1:
+                    continue
+
+                if color in positions:
+                    Game.interpolations[color].push(now, *positions[color])
+                else:  # left the game, no level matches so it is not drawn
+                    Game.interpolations[color].push(now, -1, Game.opponents[color].x, Game.opponents[color].y)
+
+        @staticmethod
+        def in_lounge() -> bool:
+            """
+            When in scoreboard room, mark own score for shared lounge effect
+            """
+            if Game.world.in_lounge():
+                for p in Game.opponents.keys():
+                    if Game.opponents[p] == Game.player1:
+                        Game.scores[p] = Game.frame_cycles
+                        break
+                return True
+            return False
+
+    class Datagrams(Thread):
+        """
+        A thread to receive snapshots, and the own state in a simulated room, over the UDP channel
+        """
+        def __init__(self, comm) -> None:
+            super().__init__(daemon=True)
+            self.comm = comm
+
         def run(self) -> None:
             while Game.is_running:
-                msg = Game.csocket.recv(SIZE).decode()
-                if msg == DIFF:  # server asking to choose difficulty
-                    Game.difficulty = True
-                elif msg.startswith(BEGIN):  # the game shall start
-                    Game.game_start = True
-                    Game.begin_cycles = Game.frame_cycles
-                    Game.csocket.send(ACK.encode())
-                    Game.next_level()  # exit lobby level
-                    Game.levels = Game.levels[:int(msg.split(':')[1]) + 2]  # adjust level amount to difficulty
-                elif msg.startswith(SCORE):  # receive scores to show on leaderboard
-                    msg_split = msg.split(':')[1:]
-                    for i in range(0, len(msg_split) - 1, 2):
-                        if msg_split[i] != Game.player1.color:
-                            Game.scores[msg_split[i]] = int(msg_split[i + 1])
-
-                    Game.csocket.send(f'{Game.frame_cycles}'.encode())
-                elif msg.startswith(POS):  # receive position of other players
-                    dic = {}
-                    data = msg.split(':')[1:]
-                    for i in range(0, len(data) - 1, 2):
-                        data_list = data[i + 1][1:-1].split(', ')
-                        dic[data[i]] = (int(data_list[0]), float(data_list[1]), float(data_list[2]))
-
-                    for color in dic.keys():
-                        if Game.opponents[color] != Game.player1:
-                            Game.opponents[color].level = dic[color][0]
-                            Game.opponents[color].x = dic[color][1]
-                            Game.opponents[color].y = dic[color][2]
-
-                    # when in scoreboard room, send indication and current position for shared lounge effect
-                    if Game.current_level == len(Game.levels) - 1:
-                        Game.csocket.send(f'{DONE}:{Game.current_level}:{Game.player1.x}:{Game.player1.y}'.encode())
-                        for p in Game.opponents.keys():
-                            if Game.opponents[p] == Game.player1:
-                                Game.scores[p] = Game.frame_cycles
-                                break
-                    else:  # send current position in level to other players
-                        Game.csocket.send(f'{Game.current_level}:{Game.player1.x}:{Game.player1.y}'.encode())
-
-            Game.csocket.send(QUIT.encode())
+                try:
+                    data = Game.usocket.recv(SIZE)
+                except ConnectionRefusedError:  # an ICMP error for a datagram lost on the way, keep listening
+                    continue
+                except OSError:  # socket closed
+                    break
+                for msg_type, payload in protocol.Decoder().feed(data):
+                    if msg_type in (protocol.MSG_SNAPSHOT, protocol.MSG_STATE):
+                        self.comm.on_frame(msg_type, payload)
+
+    class Heartbeat(Thread):
+        """
+        A thread to tell the server the client is alive, also while the player sits in a menu
+        """
+        def __init__(self) -> None:
+            super().__init__(daemon=True)
+
+        def run(self) -> None:
+            while Game.is_running:
+                time.sleep(HEARTBEAT_INTERVAL)
+                try:
+                    Game.send(protocol.frame(protocol.MSG_HEARTBEAT))
+                except OSError:  # server gone
+                    break
+
+    @staticmethod
+    def send(data: bytes) -> None:
+        """
+        Send to the server over the control socket
+        """
+        with Game.send_lock:
+            Game.csocket.sendall(data)
+
+    @staticmethod
+    def send_update(data: bytes) -> None:
+        """
+        Send positions and acks, over UDP when the server offered it
+        """
+        if Game.usocket is not None:
+            try:
+                Game.usocket.send(Game.token + data)
+            except ConnectionRefusedError:  # reported for an earlier datagram, this one is lost like any other
+                pass
+        else:
+            Game.send(data)
+
+    @staticmethod
+    def text_item(text, pos, font, centered=True) -> tuple:
+        """
+        Text as an item of the frame, centered on a position or from its top left corner
+        """
+        image = font.render(text, True, COLOR_BLACK)
+        if centered:
+            pos = (pos[0] - image.get_width() / 2, pos[1] - image.get_height() / 2)
+        return layers.area(*pos, *image.get_size(), 0), (text, pos), (image, pos)
 
     @staticmethod
-    def draw_text(text, pos, font):
+    def player_item(p: player.Player) -> tuple:
         """
-        Draw centered text to surface
+        A player as an item of the frame
         """
-        button_text = font.render(text, True, Game.COLOR_BLACK)
-        Game.surface.blit(button_text, (pos[0] - button_text.get_width() / 2,
-                                        pos[1] - button_text.get_height() / 2))
+        rect = (p.x + p.error_x, p.y + p.error_y, p.width, p.height)
+        return layers.area(*rect), (p.color, rect), p.sprite()
 
     @staticmethod
     def initialize() -> None:
@@ -259,46 +420,32 @@ class Game:
         pyg.display.set_caption(Game.TITLE)
         pyg.display.gl_set_attribute(pyg.GL_MULTISAMPLEBUFFERS, 2)
 
-        Game.screen = pyg.display.set_mode((Game.WIDTH, Game.HEIGHT))
-        Game.surface = pyg.Surface((Game.WIDTH, Game.HEIGHT))
-        Game.surface.fill(Game.COLOR_BACKGROUND)
+        Game.screen = pyg.display.set_mode((WIDTH, HEIGHT))
+        Game.surface = pyg.Surface((WIDTH, HEIGHT))
+        Game.surface.fill(COLOR_BACKGROUND)
+        Game.scenery = layers.Scenery(pyg)
+        Game.rotation = layers.Rotation(pyg)
 
         Game.timer = pyg.time.Clock()
 
-        Game.sprite_arrow = pyg.image.load('assets/arrow.png')
+        game_objects.GameObject.sprites = sprites.Sprites(pyg, pyg.image.load('assets/arrow.png'))
+        game_objects.GameObject.sprites.turn((COLOR_KEY, COLOR_GRAVITY_ROTATOR, COLOR_JET), 20, 20)
 
-        Game.generate_levels()
-        Game.init_level()
+        Game.world = simulation.World(background=True, on_prepare=Game.scenery.prepare)
 
         Game.opponents = {
-            PURPLE: player.Player(Game.COLOR_PLAYER_PURPLE),
-            RED: player.Player(Game.COLOR_PLAYER_RED),
-            GREEN: player.Player(Game.COLOR_PLAYER_GREEN),
-            BROWN: player.Player(Game.COLOR_PLAYER_BROWN)
+            PURPLE: player.Player(Game.world, COLOR_PLAYER_PURPLE),
+            RED: player.Player(Game.world, COLOR_PLAYER_RED),
+            GREEN: player.Player(Game.world, COLOR_PLAYER_GREEN),
+            BROWN: player.Player(Game.world, COLOR_PLAYER_BROWN)
         }
+        Game.interpolations = {color: interpolation.Interpolation(Game.interpolation_delay) for color in COLORS}
 
-        Game.start_btn = Game.Button((Game.WIDTH / 2, Game.HEIGHT / 2), (200, 50), 'START')
+        Game.start_btn = Game.Button((WIDTH / 2, HEIGHT / 2), (200, 50), 'START')
 
-        Game.normal_btn = Game.Button((Game.WIDTH / 2, Game.HEIGHT / 2 - 100), (200, 50), 'NORMAL')
-        Game.hard_btn = Game.Button((Game.WIDTH / 2, Game.HEIGHT / 2), (200, 50), 'HARD')
-        Game.extreme_btn = Game.Button((Game.WIDTH / 2, Game.HEIGHT / 2 + 100), (200, 50), 'EXTREME')
-
-    @staticmethod
-    def rotate(rd: int) -> None:
-        """
-        Rotate the level
-        """
-        Game.is_rotating = True
-
-        for b in Game.get_level_objects():
-            b.rotate_gravity(rd)
-
-    @staticmethod
-    def stop_rotation() -> None:
-        """
-        Stop rotating the level
-        """
-        Game.is_rotating = False
+        Game.normal_btn = Game.Button((WIDTH / 2, HEIGHT / 2 - 100), (200, 50), 'NORMAL')
+        Game.hard_btn = Game.Button((WIDTH / 2, HEIGHT / 2), (200, 50), 'HARD')
+        Game.extreme_btn = Game.Button((WIDTH / 2, HEIGHT / 2 + 100), (200, 50), 'EXTREME')
 
     @staticmethod
     def run() -> None:
@@ -318,9 +465,6 @@ class Game:
 
             Game.timer.tick(Game.FPS)
 
-            if Game.is_up_pressed:
-                Game.player1.jump()
-
             Game.update_objects()
 
             # track time
@@ -356,7 +500,8 @@ class Game:
                     Game.csocket.connect(IP)
                     color = Game.csocket.recv(SIZE).decode()
                     Game.player1 = Game.opponents[color]
-                    Game.csocket.send(ACK.encode())
+                    Game.prediction = simulation.Prediction(Game.player1)
+                    Game.send(protocol.offer().encode())
                     Game.Comm().start()
                     Game.welcome = False
 
@@ -372,47 +517,64 @@ class Game:
 
             if e.type == pyg.KEYDOWN:
                 if e.key == pyg.K_LEFT:
-                    Game.player1.start_left()
+                    Game.keys |= KEY_LEFT
                 if e.key == pyg.K_RIGHT:
-                    Game.player1.start_right()
+                    Game.keys |= KEY_RIGHT
                 if e.key == pyg.K_UP:
-                    if Game.player1.is_standing:
-                        Game.is_up_pressed = True
+                    Game.keys |= KEY_UP
+                if e.key == pyg.K_r:
+                    Game.keys |= KEY_RETRY
 
             if e.type == pyg.KEYUP:
                 if e.key == pyg.K_LEFT:
-                    Game.player1.stop_left()
+                    Game.keys &= ~KEY_LEFT
                 if e.key == pyg.K_RIGHT:
-                    Game.player1.stop_right()
+                    Game.keys &= ~KEY_RIGHT
                 if e.key == pyg.K_UP:
-                    Game.is_up_pressed = False
-                if e.key == pyg.K_r:
-                    Game.player1.die()
+                    Game.keys &= ~KEY_UP
+                if e.key == pyg.K_r:  # retry once released
+                    Game.keys &= ~KEY_RETRY
                 if e.key == pyg.K_ESCAPE:
                     Game.stop_running()
                     continue
                 if e.key == pyg.K_g:
-                    Game.god_mode = not Game.god_mode
+                    Game.world.god_mode = not Game.world.god_mode
+                if e.key == pyg.K_p:  # debug overlay of the arrows' flights
+                    Game.show_paths = not Game.show_paths
 
             if e.type == pyg.MOUSEBUTTONDOWN and Game.difficulty:
                 mx, my = pyg.mouse.get_pos()
                 if Game.normal_btn.contains(mx, my):
-                    Game.csocket.send(NORMAL.encode())
-                    Game.difficulty = False
+                    Game.send_difficulty(NORMAL)
                 elif Game.hard_btn.contains(mx, my):
-                    Game.csocket.send(HARD.encode())
-                    Game.difficulty = False
+                    Game.send_difficulty(HARD)
                 elif Game.extreme_btn.contains(mx, my):
-                    Game.csocket.send(EXTREME.encode())
-                    Game.difficulty = False
+                    Game.send_difficulty(EXTREME)
+
+    @staticmethod
+    def send_difficulty(difficulty: str) -> None:
+        """
+        Answer the server with the chosen difficulty
+        """
+        if Game.binary:
+            Game.send(protocol.frame(protocol.MSG_DIFFICULTY, protocol.LEVEL.pack(int(difficulty))))
+        else:
+            Game.send(difficulty.encode())
+        Game.difficulty = False
 
     @staticmethod
     def update_objects() -> None:
         """
-        Update all game objects in level
+        Update all game objects in level, an authoritative server receives the keys of every frame
+        and they are kept until it confirms where they led
         """
-        Game.player1.fall()
-        Game.player1.update()
+        with Game.lock:
+            Game.world.step(Game.player1, Game.keys)
+
+            if Game.simulated and Game.game_start:
+                seq = Game.prediction.record(Game.keys)
+                Game.send(protocol.frame(protocol.MSG_INPUT, protocol.INPUT.pack(seq, Game.keys)))
+                Game.prediction.smooth()
 
         if not Game.game_start:
             for opponent in Game.opponents.values():
@@ -420,245 +582,5 @@ class Game:
                     opponent.fall()
                     opponent.update()
 
-        if not Game.player1.is_alive:
-            Game.generate_levels()
-            Game.init_level()
-            Game.player1.is_alive = True
-            return
-
-        if Game.player1.total_keys_collected >= Game.total_keys:
-            if not Game.gate.is_animating_closure:
-                Game.gate.open()
-
-            if Game.player1.passed():
-                Game.next_level()
-
-        for obj in Game.get_level_objects():
-            obj.update()
-
-    @staticmethod
-    def add_level(lvl: tuple) -> None:
-        """
-        Adds level
-        """
-        Game.levels.append(lvl)
-
-    @staticmethod
-    def new_start_point(x: float, y: float) -> None:
-        """
-        Creates player start point
-        """
-        Game.start_points.append((x, y))
-
-    @staticmethod
-    def next_level() -> None:
-        """
-        Transition to the next level
-        """
-        obstacles.Crossbow.count = 0
-        Game.current_level += 1
-        Game.init_level()
-        Game.player1.reset()
-
-        if Game.current_level == len(Game.levels) - 1:
+        if Game.world.in_lounge():
             Game.score_board = True
-
-    @staticmethod
-    def get_level_objects() -> tuple:
-        """
-        Return level objects
-        """
-        return Game.levels[Game.current_level]
-
-    @staticmethod
-    def generate_levels() -> None:
-        """
-        Build and list all levels in the game
-        Lobby: 0
-        Normal: 1st -> 3rd
-        Hard: 1st -> 5th
-        Extreme: 1st -> 6th
-        Score Lounge: 7th
-        """
-        Game.levels.clear()
-
-        # Limbo
-        level = (
-            game_objects.Block(0, 590, 590, 10),
-            game_objects.Block(10, 0, 590, 10),
-            game_objects.Block(0, 0, 10, 590),
-            game_objects.Block(590, 10, 10, 590),
-            game_objects.Block(120, 370, 50, 50),
-            game_objects.Block(280, 340, 150, 40),
-            game_objects.Block(200, 187, 20, 20),
-            game_objects.Block(10, 100, 150, 20),
-            game_objects.Block(10, 490, 50, 100),
-            game_objects.Block(490, 294, 100, 20),
-            game_objects.Block(280, 290, 50, 50),
-            game_objects.Door(-100, 0),
-        )
-        Game.new_start_point(413, 465)
-        Game.add_level(level)
-
-        # 1st Level - Normal
-        level = (
-            game_objects.Block(0, 590, 590, 10),
-            game_objects.Block(10, 0, 590, 10),
-            game_objects.Block(0, 100, 10, 490),
-            game_objects.Block(590, 10, 10, 590),
-            game_objects.Block(120, 370, 50, 50),
-            game_objects.Block(280, 340, 150, 40),
-            game_objects.Block(200, 187, 20, 20),
-            game_objects.Block(10, 100, 150, 20),
-            game_objects.Door(0, 0),
-            game_objects.Block(10, 490, 50, 100),
-            game_objects.Block(490, 294, 100, 20),
-            power_ups.Key(538, 237),
-            game_objects.Block(280, 290, 50, 50)
-        )
-        Game.new_start_point(413, 465)
-        Game.add_level(level)
-
-        # 2nd Level - Normal
-        level = (
-            game_objects.Block(0, 0, 600, 10),
-            game_objects.Block(0, 10, 10, 600),
-            game_objects.Block(10, 590, 590, 10),
-            game_objects.Block(590, 110, 10, 480),
-            game_objects.Door(590, 10),
-            power_ups.Key(197, 461),
-            power_ups.Key(415, 302),
-            power_ups.Key(272, 116),
-            power_ups.Key(445, 62),
-            power_ups.Jet(280, 206),
-            obstacles.Crossbow(550, 300, -1, 0),
-            game_objects.Block(375, 338, 100, 10),
-            game_objects.Block(240, 238, 100, 10),
-            game_objects.SpringBoard(250, 570)
-        )
-        Game.new_start_point(40, 530)
-        Game.add_level(level)
-
-        # 3rd level - Normal
-        level = (
-            game_objects.Block(0, 590, 590, 10),
-            game_objects.Block(0, 0, 10, 590),
-            game_objects.Block(10, 0, 590, 10),
-            game_objects.Door(590, 10),
-            obstacles.Spikes(10, 10, 10, 580, 1),
-            obstacles.Spikes(100, 80, 10, 510, -1),
-            obstacles.Spikes(110, 70, 180, 10, -1),
-            obstacles.Spikes(290, 80, 10, 510, 1),
-            obstacles.Spikes(380, 10, 10, 340, -1),
-            game_objects.SpringBoard(20, 570),
-            obstacles.Spikes(390, 10, 10, 340, 1),
-            obstacles.Spikes(490, 150, 50, 10, -1),
-            obstacles.Spikes(480, 160, 10, 430, -1),
-            game_objects.Block(590, 110, 10, 490),
-            power_ups.Jet(50, 98),
-            power_ups.Key(50, 33),
-            power_ups.Key(325, 36),
-            power_ups.Key(380, 464),
-            game_objects.SpringBoard(310, 570),
-            game_objects.SpringBoard(390, 570),
-            power_ups.Key(489, 69),
-            game_objects.Block(110, 80, 180, 510),
-            game_objects.Block(490, 160, 100, 430)
-        )
-        Game.new_start_point(40, 300)
-        Game.add_level(level)
-
-        # 4th level - Hard
-        level = (
-            game_objects.Block(0, 590, 600, 10),
-            game_objects.Block(0, 10, 10, 590),
-            game_objects.Block(0, 0, 600, 10),
-            game_objects.Block(590, 0, 10, 490),
-            obstacles.Crossbow(510, 10, 0, 1),
-            power_ups.Jet(83, 380),
-            game_objects.SpringBoard(509, 570),
-            obstacles.Spikes(158, 332, 265, 257, -1),
-            game_objects.SpringBoard(428, 570),
-            game_objects.Block(540, 490, 50, 20),
-            game_objects.Door(590, 490),
-            obstacles.Spikes(542, 480, 50, 10, -1),
-            power_ups.Key(555, 344)
-        )
-        Game.new_start_point(46, 550)
-        Game.add_level(level)
-
-        # 5th level - Hard
-        level = (
-            game_objects.Block(0, 590, 600, 120),
-            game_objects.Block(590, 0, 10, 250),
-            game_objects.Block(0, 0, 600, 10),
-            game_objects.Block(0, 0, 10, 590),
-            game_objects.Block(469, 469, 10, 121),
-            game_objects.Block(121, 469, 10, 121),
-            obstacles.Crossbow(111, 10, 0, 1),
-            game_objects.Block(540, 165, 50, 10),
-            game_objects.Block(10, 165, 60, 10),
-            game_objects.Block(10, 425, 60, 10),
-            game_objects.Block(540, 425, 50, 10),
-            game_objects.Block(469, 10, 10, 121),
-            game_objects.Block(142, 10, 10, 121),
-            obstacles.Crossbow(10, 135, 1, 0),
-            power_ups.Key(50, 50),
-            power_ups.Key(530, 50),
-            game_objects.SpringBoard(389, 570),
-            game_objects.SpringBoard(132, 570),
-            game_objects.Block(590, 350, 10, 250),
-            game_objects.Door(590, 250)
-        )
-        Game.new_start_point(280, 550)
-        Game.add_level(level)
-
-        # 6th level - Extreme
-        level = (
-            game_objects.Block(0, 590, 600, 10),
-            game_objects.Block(0, 0, 600, 10),
-            game_objects.Block(0, 10, 10, 590),
-            game_objects.Block(590, 0, 10, 500),
-            game_objects.Block(430, 488, 10, 10),
-            game_objects.Door(430, 385),
-            game_objects.Block(430, 286, 160, 10),
-            game_objects.Block(549, 402, 41, 10),
-            game_objects.SpringBoard(337, 569),
-            obstacles.Spikes(11, 579, 540, 10, -1),
-            obstacles.Spikes(430, 275, 152, 10, -1),
-            obstacles.Spikes(579, 11, 10, 255, 0),
-            obstacles.Spikes(519, 80, 10, 107, 1),
-            obstacles.Spikes(469, 190, 49, 10, 1),
-            obstacles.Spikes(469, 70, 49, 10, -1),
-            obstacles.Spikes(459, 80, 10, 107, -1),
-            power_ups.Key(538, 234),
-            power_ups.Key(495, 26),
-            power_ups.Jet(473, 232),
-            game_objects.Block(215, 544, 10, 10),
-            game_objects.Block(430, 286, 10, 96)
-        )
-        Game.new_start_point(200, 503)
-        Game.add_level(level)
-
-        # Score board
-        level = (
-            game_objects.Block(0, 0, 590, 10),
-            game_objects.Block(590, 0, 10, 590),
-            game_objects.Block(10, 590, 590, 10),
-            game_objects.Block(0, 10, 10, 590)
-        )
-        Game.new_start_point(122, 445)
-        Game.add_level(level)
-
-    @staticmethod
-    def init_level() -> None:
-        """
-        Initialize keys for current level
-        """
-        Game.total_keys *= 0 if Game.total_keys != 0 else 1
-
-        for obj in Game.get_level_objects():
-            if obj.type == Game.TYPE_KEY:
-                Game.total_keys += 1
-            elif obj.type == Game.TYPE_DOOR:
-                Game.gate = obj
@@ -1,12 +1,19 @@
 import math
-import game
+
+from consts import *
 
 
 class GameObject:
     """
     Super class for all objects inside the game
+    Every object belongs to a world, the level state it reads and changes
     """
-    def __init__(self, t: int, c: tuple, x: float, y: float, w: int, h: int) -> None:
+    group: int = GROUP_SOLID
+    sprites = None  # sprites.Sprites of the game client, the simulation never renders
+
+    def __init__(self, world, t: int, c: tuple, x: float, y: float, w: int, h: int) -> None:
+        self.world = world
+
         self.x: float = x
         self.y: float = y
 
@@ -24,6 +31,26 @@ class GameObject:
     def get_rect(self) -> tuple:
         return self.x, self.y, self.width, self.height
 
+    def state(self) -> tuple:
+        """
+        Everything about the object that changes during a level
+        """
+        return (self.x, self.y, self.width, self.height,
+                self.angle, self.rotation_dir, self.is_rotating, self.times_rotated)
+
+    def restore(self, state: tuple) -> None:
+        """
+        Return the object to a state taken before
+        """
+        (self.x, self.y, self.width, self.height,
+         self.angle, self.rotation_dir, self.is_rotating, self.times_rotated) = state
+
+    def get_bounds(self) -> tuple:
+        """
+        Rectangles the object can be collided with in
+        """
+        return self.get_rect(),
+
     def is_colliding(self, rect: tuple) -> bool:
         """
         Check intersection with another rectangle
@@ -63,8 +90,8 @@ class GameObject:
         self.angle += 1.5 * self.rotation_dir
 
         if self.angle in (-90, 90):
-            hw: float = game.Game.WIDTH / 2
-            hh: float = game.Game.HEIGHT / 2
+            hw: float = WIDTH / 2
+            hh: float = HEIGHT / 2
             shw: float = self.width / 2
             shh: float = self.height / 2
 
@@ -81,75 +108,76 @@ class GameObject:
 
             self.x = tx + hw - shw
             self.y = ty + hh - shh
+            self.world.moved(self)
 
             self.is_rotating = False
 
             self.angle = 0
 
-            if game.Game.is_rotating:
-                game.Game.is_rotating = False
+            if self.world.is_rotating:
+                self.world.is_rotating = False
 
             self.on_rotation_stop()
 
-    def clear(self, surface, pyg) -> None:
-        """
-        Paint over the object to cover itself from view thus clearing itself
-        """
-        pyg.draw.rect(surface, game.Game.COLOR_BACKGROUND, self.get_rect())
-        pyg.draw.rect(surface, game.Game.COLOR_BACKGROUND, self.get_rect(), 2)
-
     def draw_shape(self, surface, pyg) -> None:
         """
         Draw the basic shape onto a surface
         """
         pyg.draw.rect(surface, self.color, self.get_rect())
-        pyg.draw.rect(surface, game.Game.COLOR_BLACK, self.get_rect(), 2)
+        pyg.draw.rect(surface, COLOR_BLACK, self.get_rect(), 2)
 
-    def update(self) -> None:
+    def sprite(self) -> tuple:
         """
-        Update object properties such as position or rotation
+        The surface the object is drawn from and where it goes, None for objects drawn shape by shape
         """
-        if self.is_rotating:
-            self.rotate_position()
+        return self.sprites.rect(self.color, self.width, self.height), (self.x, self.y)
 
-    def render(self, surface, pyg) -> None:
+    def draw(self, surface, pyg) -> None:
         """
-        Render object to screen
+        Draw the object as it stands before the level turns it
         """
-        if self.is_rotating:
-            sur: pyg.Surface = pyg.Surface((game.Game.WIDTH, game.Game.HEIGHT))
-            sur.fill(game.Game.COLOR_BACKGROUND)
-            sur.set_colorkey(game.Game.COLOR_BACKGROUND)
-
-            self.draw_shape(sur, pyg)
-
-            rotated: pyg.Surface = pyg.transform.rotate(sur, self.angle)
-            rotated_rect: pyg.Surface = rotated.get_rect()
-            rotated_rect.center = (game.Game.WIDTH / 2, game.Game.HEIGHT / 2)
-            surface.blit(rotated, rotated_rect)
-        else:
+        sprite: tuple = self.sprite()
+        if sprite is None:
             self.draw_shape(surface, pyg)
+        else:
+            surface.blit(*sprite)
+
+    def update(self) -> None:
+        """
+        Update object properties such as position or rotation
+        """
+        if self.is_rotating:
+            self.rotate_position()
 
 
 class Block(GameObject):
     """
     Basic game object, just a block, used for floors, ceilings and walls
     """
-    def __init__(self, x: float, y: float, w: int, h: int) -> None:
-        super().__init__(game.Game.TYPE_BLOCK, game.Game.COLOR_BLOCK, x, y, w, h)
+    def __init__(self, world, x: float, y: float, w: int, h: int) -> None:
+        super().__init__(world, TYPE_BLOCK, COLOR_BLOCK, x, y, w, h)
 
 
 class Door(GameObject):
     """
     Opens a hallway to exit the boundaries of the screen thus progressing to next level
     """
-    def __init__(self, x: float, y: float) -> None:
-        super().__init__(game.Game.TYPE_DOOR, game.Game.COLOR_DOOR, x, y, 10, 100)
+    group: int = GROUP_DOOR
+
+    def __init__(self, world, x: float, y: float) -> None:
+        super().__init__(world, TYPE_DOOR, COLOR_DOOR, x, y, 10, 100)
 
         self.is_open: bool = False
         self.is_animating_closure: bool = False
         self.open_towards_up: bool = True
 
+    def state(self) -> tuple:
+        return super().state(), self.is_open, self.is_animating_closure, self.open_towards_up
+
+    def restore(self, state: tuple) -> None:
+        base, self.is_open, self.is_animating_closure, self.open_towards_up = state
+        super().restore(base)
+
     def open(self) -> None:
         """
         Open the door, start animating
@@ -186,29 +214,29 @@ class Door(GameObject):
                         self.width -= 1
                     else:
                         self.width -= 1
+                self.world.moved(self)
         elif (self.height == 0 or self.width == 0) and not self.is_open:
             self.is_open = True
 
-    def render(self, surface, pyg) -> None:
-        """
-        Render door to screen
-        """
-        super().render(surface, pyg)
-
 
 class SpringBoard(GameObject):
     """
     Game object that launches the player upwards
     """
-    def __init__(self, x: float, y: float) -> None:
-        super().__init__(game.Game.TYPE_SPRINGBOARD, game.Game.COLOR_SPRINGBOARD, x, y, 80, 10)
+    group: int = GROUP_SPRINGBOARD
+
+    def __init__(self, world, x: float, y: float) -> None:
+        super().__init__(world, TYPE_SPRINGBOARD, COLOR_SPRINGBOARD, x, y, 80, 10)
+
+    def sprite(self) -> None:
+        return None
 
     def draw_shape(self, surface, pyg) -> None:
         """
         Draw the springboard onto a surface
         """
         pyg.draw.rect(surface, self.color[0], (self.x, self.y, self.width, 10))
-        pyg.draw.rect(surface, game.Game.COLOR_BLACK, (self.x, self.y, self.width, 10), 2)
+        pyg.draw.rect(surface, COLOR_BLACK, (self.x, self.y, self.width, 10), 2)
 
         pyg.draw.rect(surface, self.color[1], (self.x + 30, self.y + 10, 20, 10))
-        pyg.draw.rect(surface, game.Game.COLOR_BLACK, (self.x + 30, self.y + 10, 20, 10), 2)
+        pyg.draw.rect(surface, COLOR_BLACK, (self.x + 30, self.y + 10, 20, 10), 2)
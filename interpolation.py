@@ -0,0 +1,62 @@
+"""
+Smooth motion of the other players from positions arriving at uneven times
+"""
+import collections
+
+from consts import *
+
+FRAME = 1 / 60
+
+
+class Interpolation:
+    """
+    Positions of one opponent stamped with the time they arrived, drawn a fixed delay behind the newest
+    Between two positions the opponent is drawn on the line joining them, past the newest one it keeps
+    moving the way it did for up to EXTRAPOLATION_LIMIT seconds and then waits there
+    A position on another level is never blended with the one before it, the opponent switches at once
+    """
+    def __init__(self, delay: float = INTERPOLATION_DELAY, size: int = INTERPOLATION_BUFFER) -> None:
+        self.delay = delay
+        self.positions: collections.deque = collections.deque(maxlen=size)  # (time, level, x, y)
+
+    def push(self, t: float, level: int, x: float, y: float) -> None:
+        """
+        Keep a position received at time t
+        """
+        self.positions.append((t, level, x, y))
+
+    def sample(self, now: float) -> tuple:
+        """
+        Where to draw the opponent at time now as (level, x, y), None before any position arrived
+        """
+        positions = tuple(self.positions)  # the receiving thread appends meanwhile
+        if not positions:
+            return None
+
+        t = now - self.delay
+        if t <= positions[0][0]:
+            return positions[0][1:]
+
+        for i in range(len(positions) - 1, 0, -1):
+            if positions[i - 1][0] <= t:
+                break
+        else:
+            i = 0
+
+        if positions[i][0] > t:  # between an older position and a newer one
+            t0, level, x0, y0 = positions[i - 1]
+            t1, next_level, x1, y1 = positions[i]
+            if level != next_level:
+                return level, x0, y0
+            share = (t - t0) / (t1 - t0)
+            return level, x0 + (x1 - x0) * share, y0 + (y1 - y0) * share
+
+        # past the newest, continue from a position at least a frame older as positions may arrive in bursts
+        t1, level, x1, y1 = positions[-1]
+        for t0, previous, x0, y0 in reversed(positions[:-1]):
+            if t1 - t0 >= FRAME:
+                if previous != level:
+                    break
+                ahead = min(t - t1, EXTRAPOLATION_LIMIT) / (t1 - t0)
+                return level, x1 + (x1 - x0) * ahead, y1 + (y1 - y0) * ahead
+        return level, x1, y1
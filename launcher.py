@@ -0,0 +1,99 @@
+import multiprocessing
+import signal
+import sys
+import threading
+import time
+
+from consts import *
+
+
+def work(index, counts, address, use_async, tick_rate, udp, fill_timeout, simulate):
+    """
+    Worker process, accepts on the shared port and fills its own rooms
+    """
+    signal.signal(signal.SIGTERM, signal.SIG_DFL)
+    if use_async:
+        import async_server
+        # a datagram must reach the worker holding its token, the kernel only balances TCP by connection
+        server = async_server.Server(address, tick_rate, udp, udp_port=address[1] + index, reuse_port=True,
+                                     fill_timeout=fill_timeout, simulate=simulate)
+    else:
+        import server as threaded_server
+        server = threaded_server.Server(address, reuse_port=True, fill_timeout=fill_timeout)
+
+    def report():
+        while True:
+            counts[index] = len(server.rooms)
+            time.sleep(1)
+
+    threading.Thread(target=report, daemon=True).start()
+    server.run()
+
+
+class Supervisor:
+    """
+    Fork worker processes accepting on one port with SO_REUSEPORT, restart the ones that die
+    Every worker keeps its own rooms, players are never moved between workers
+    """
+    def __init__(self, workers, address=ADDRESS, use_async=False, tick_rate=None, udp=False, fill_timeout=None,
+                 simulate=False, interval=10):
+        self.address = address
+        self.options = (use_async, tick_rate, udp, fill_timeout, simulate)
+        self.interval = interval
+
+        self.counts = multiprocessing.Array('i', workers, lock=False)
+        self.processes = [None] * workers
+        self.restarts = [0] * workers
+
+    def start(self, index):
+        """
+        Start (or restart) the worker with the given index
+        """
+        self.counts[index] = 0
+        process = multiprocessing.Process(target=work, args=(index, self.counts, self.address, *self.options),
+                                          name=f'worker-{index}', daemon=True)
+        process.start()
+        self.processes[index] = process
+
+    def status(self):
+        """
+        Worker index to (pid, rooms, restarts)
+        """
+        return {index: (process.pid, self.counts[index], self.restarts[index])
+                for index, process in enumerate(self.processes)}
+
+    def check(self):
+        """
+        Restart every worker which exited
+        """
+        for index, process in enumerate(self.processes):
+            if not process.is_alive():
+                print(f'worker {index} (pid {process.pid}) exited with {process.exitcode}, restarting')
+                self.restarts[index] += 1
+                self.start(index)
+
+    def run(self):
+        """
+        Start all workers and supervise them until interrupted or terminated
+        """
+        signal.signal(signal.SIGTERM, lambda *_: sys.exit())
+        for index in range(len(self.processes)):
+            self.start(index)
+
+        last = time.monotonic()
+        try:
+            while True:
+                time.sleep(.5)
+                self.check()
+
+                if self.interval and time.monotonic() - last >= self.interval:
+                    last = time.monotonic()
+                    print(', '.join(f'worker {index} (pid {pid}): {rooms} rooms'
+                                    for index, (pid, rooms, _) in self.status().items()))
+        except KeyboardInterrupt:
+            pass
+        finally:
+            for process in self.processes:
+                process.terminate()
+            for process in self.processes:
+                process.join()
@@ -0,0 +1,192 @@
+"""
+Parts of the screen drawn once and kept on surfaces of their own, and what is drawn over them every frame
+
+What a frame draws over its background is listed as items (area, key, sprite): the area of the surface
+the sprite paints in, a key standing for how it looks there and the sprite itself as a (surface,
+position) pair. Only areas whose items changed are painted again, each with one Surface.blits call.
+"""
+from consts import *
+
+
+def draw(surface, objects, pyg) -> None:
+    """
+    Draw objects in order, the ones drawn from sprites with one Surface.blits call for each run of them
+    """
+    batch = []
+    for obj in objects:
+        sprite = obj.sprite()
+        if sprite is not None:
+            batch.append(sprite)
+            continue
+        if batch:
+            surface.blits(batch, False)
+            batch = []
+        obj.draw_shape(surface, pyg)
+    if batch:
+        surface.blits(batch, False)
+
+
+class Scenery:
+    """
+    Blocks, spikes, springboards and crossbows of the current level, drawn onto a surface of their own
+    They stand still outside rotations, so the surface is only drawn again for another level or once they
+    moved, and every frame draws over it. The scenery of the next level may be drawn ahead, while the
+    door of the current one opens, and is taken over once that level is entered
+    """
+    def __init__(self, pyg) -> None:
+        self.pyg = pyg
+        self.surface = pyg.Surface((WIDTH, HEIGHT)).convert()
+        self.objects: tuple = None  # objects of the level drawn
+        self.version: int = None  # scenery count of the world when drawn
+        self.ahead: tuple = None  # objects of a level not entered yet and the surface they are drawn on
+
+    def paint(self, surface, objects: tuple) -> None:
+        """
+        Draw the scenery among some objects onto a surface
+        """
+        surface.fill(COLOR_BACKGROUND)
+        draw(surface, [obj for obj in objects if obj.group in SCENERY], self.pyg)
+
+    def draw(self, world) -> None:
+        """
+        Draw the scenery of the current level of a world again
+        """
+        self.version = world.scenery  # taken first, a move while drawing draws it again next frame
+        self.objects = world.get_level_objects()
+        self.paint(self.surface, self.objects)
+
+    def prepare(self, objects: tuple) -> None:
+        """
+        Draw the scenery of a level before it is entered (thread preparing the level)
+        Nothing moves it until it is entered, so it is drawn as it will be shown
+        """
+        surface = self.pyg.Surface((WIDTH, HEIGHT)).convert()
+        self.paint(surface, objects)
+        self.ahead = objects, surface
+
+    def update(self, world):
+        """
+        The scenery of the current level of a world, drawn first if it changed
+        """
+        objects = world.get_level_objects()
+        ahead = self.ahead
+        if ahead is not None and ahead[0] is objects and self.objects is not objects:
+            self.ahead = None
+            self.version, self.objects, self.surface = world.scenery, objects, ahead[1]
+        elif self.version != world.scenery or self.objects is not objects:
+            self.draw(world)
+        return self.surface
+
+
+class Rotation:
+    """
+    The level while it rotates, drawn once a frame onto a surface of its own and turned as a whole
+    Every object turns by the same angle, so one rotation of the whole level stands in for one per object.
+    The scenery only moves once the turn ends, its layer is drawn from and the rest drawn over it
+    """
+    def __init__(self, pyg) -> None:
+        self.pyg = pyg
+        self.surface = pyg.Surface((WIDTH, HEIGHT)).convert()
+        self.surface.set_colorkey(COLOR_BACKGROUND)  # turning pads the corners with it, they stay background
+
+    def render(self, world, scenery: Scenery) -> tuple:
+        """
+        The current level of a world turned by its angle, and where it goes
+        """
+        self.surface.blit(scenery.update(world), (0, 0))
+        groups = world.groups
+        draw(self.surface, groups[GROUP_DOOR] + groups[GROUP_PICKUP], self.pyg)
+
+        angle = 0
+        for obj in world.get_level_objects():
+            if obj.is_rotating:
+                angle = obj.angle
+                break
+        rotated = self.pyg.transform.rotate(self.surface, angle)
+        return rotated, rotated.get_rect(center=(WIDTH / 2, HEIGHT / 2))
+
+
+class DirtyRects:
+    """
+    The items drawn over the background last frame, to paint again only where something changed
+    Areas of items gone, moved or changed get their background back and every item reaching into them
+    is drawn again clipped to them, the rest of the surface stays as it was
+    """
+    def __init__(self) -> None:
+        self.items: list = []
+        self.background = None
+        self.version = None
+
+    def render(self, surface, background, version, items: list) -> list:
+        """
+        Draw a frame's items over a background, return the areas of the surface which changed
+        A background that is None or another one or a new version of it paints the whole surface
+        """
+        if background is None or background is not self.background or version != self.version:
+            self.items = items
+            self.background, self.version = background, version
+            if background is None:
+                surface.fill(COLOR_BACKGROUND)
+            else:
+                surface.blit(background, (0, 0))
+            surface.blits([sprite for _, _, sprite in items], False)
+            return [surface.get_rect()]
+
+        old = {item[:2] for item in self.items}
+        new = {item[:2] for item in items}
+        changed = [area for area, key, _ in self.items if (area, key) not in new] + \
+                  [area for area, key, _ in items if (area, key) not in old]
+        self.items = items
+        if not changed:
+            return []
+
+        rects = []
+        for area in changed:
+            rect = surface.get_rect().clip(area)
+            if not rect or any(r.contains(rect) for r in rects):
+                continue
+            rects.append(rect)
+
+        for rect in rects:
+            surface.set_clip(rect)
+            surface.blit(background, rect, rect)
+            surface.blits([sprite for area, _, sprite in items if rect.colliderect(area)], False)
+        surface.set_clip(None)
+        return rects
+
+
+def area(x: float, y: float, w: float, h: float, margin: float = 2) -> tuple:
+    """
+    Pixels a shape at a position may paint, with a margin for its outline
+    """
+    return int(x - margin), int(y - margin), int(w + 2 * margin + 1), int(h + 2 * margin + 1)
+
+
+def level_items(world, scenery: Scenery, rotation: Rotation, paths: bool = False) -> tuple:
+    """
+    Background, its version and the items of the current level of a world over it, the arrows' paths too
+    While the level rotates it is drawn as a whole turned over no background
+    """
+    groups = world.groups
+    items = []
+    if world.is_rotating:
+        items.append(((0, 0, WIDTH, HEIGHT), None, rotation.render(world, scenery)))
+    else:
+        items += [(area(*door.get_rect()), door.get_rect(), door.sprite()) for door in groups[GROUP_DOOR]]
+        # a spinning pickup reaches past its corners by up to 0.21 of its side
+        items += [(area(*pickup.get_rect(), pickup.width / 4), (pickup.get_rect(), pickup.degree), pickup.sprite())
+                  for pickup in groups[GROUP_PICKUP]]
+
+    for crossbow in groups[GROUP_CROSSBOW]:
+        arrow = crossbow.arrow
+        if arrow.is_launched:
+            items.append((area(arrow.x, arrow.y, arrow.width, arrow.height), (arrow.x, arrow.y, arrow.vx, arrow.vy),
+                          arrow.sprite()))
+        if paths:
+            start, end = path = arrow.path()
+            line = arrow.sprites.line(arrow.color[0], start, end)
+            items.append((area(*line[1], *line[0].get_size(), 0), path, line))
+
+    if world.is_rotating:
+        return None, None, items
+    return scenery.update(world), scenery.version, items
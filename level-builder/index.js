@@ -20,7 +20,8 @@ const xin = document.getElementById(`x-coor`),
     dinx = document.getElementById(`o-dirx`),
     diny = document.getElementById(`o-diry`),
     tin = document.getElementById(`o-type`),
-    pin = document.getElementById(`o-power`);
+    pin = document.getElementById(`o-power`),
+    nin = document.getElementById(`level-name`);
 
 xin.addEventListener(`input`, _ => {
     if (selection === null)
@@ -432,35 +433,42 @@ function renderObj(o) {
 }
 
 function generate() {
-    let str = `level = (\n`;
-    let startPoint = {};
+    let start = [0, 0],
+        objects = [];
 
     for (let o of all) {
-        if (o.type === `block`)
-            str += `    game_objects.Block(${o.x}, ${o.y}, ${o.width}, ${o.height}),\n`;
-        else if (o.type === `player`)
-            startPoint = { x: o.x, y: o.y };
+        if (o.type === `player`)
+            start = [o.x, o.y];
+        else if (o.type === `block`)
+            objects.push({ type: `block`, x: o.x, y: o.y, width: o.width, height: o.height });
         else if (o.type === `door`)
-            str += `    game_objects.Door(${o.x}, ${o.y}),\n`;
+            objects.push({ type: `door`, x: o.x, y: o.y });
         else if (o.type === `key`)
-            str += `    power_ups.Key(${o.x}, ${o.y}),\n`;
+            objects.push({ type: `key`, x: o.x, y: o.y });
         else if (o.type === `rotator`)
-            str += `    power_ups.GravityRotator(${o.x}, ${o.y}, ${o.dir}),\n`;
+            objects.push({ type: `rotator`, x: o.x, y: o.y, dir: o.dir });
         else if (o.type === `jet`)
-            str += `    power_ups.Jet(${o.x}, ${o.y}),\n`;
+            objects.push({ type: `jet`, x: o.x, y: o.y });
         else if (o.type === `spikes`)
-            str += `    obstacles.Spikes(${o.x}, ${o.y}, ${o.width}, ${o.height}, ${o.dirx}),\n`;
+            objects.push({ type: `spikes`, x: o.x, y: o.y, width: o.width, height: o.height, dir: o.dirx });
         else if (o.type === `crossbow`)
-            str += `    obstacles.Crossbow(${o.x}, ${o.y}, ${o.dirx}, ${o.diry}),\n`;
+            objects.push({ type: `crossbow`, x: o.x, y: o.y, dx: o.dirx, dy: o.diry });
         else if (o.type === `springboard`)
-            str += `    game_objects.SpringBoard(${o.x}, ${o.y}),\n`;
+            objects.push({ type: `springboard`, x: o.x, y: o.y });
     }
 
-    str = str.substring(0, str.length - 2);
-    str += `\n)\n`;
-
-    str += `Game.new_start_point(${startPoint.x}, ${startPoint.y})\n`;
-    str += `Game.add_level(level)\n`;
+    // one object per line, as the levels in assets/levels are written
+    let name = nin.value || `level`;
+    let str = `{\n    "name": ${JSON.stringify(name)},\n    "start": ${JSON.stringify(start)},\n    "objects": [\n`;
+    str += objects.map(o => `        ${JSON.stringify(o)}`).join(`,\n`);
+    str += `\n    ]\n}\n`;
 
     console.log(str);
+
+    // saved as a file to drop into a level pack and list in its pack.json
+    let link = document.createElement(`a`);
+    link.href = URL.createObjectURL(new Blob([str], { type: `application/json` }));
+    link.download = `${name.toLowerCase().replace(/[^a-z0-9]+/g, `-`)}.json`;
+    link.click();
+    setTimeout(_ => URL.revokeObjectURL(link.href), 0);
 }
@@ -0,0 +1,179 @@
+"""
+Levels of the game, read from a level pack one level at a time
+
+A pack is a directory holding pack.json, which lists its level files in the order they are played:
+    Lobby: 0
+    Normal: 1st -> 3rd
+    Hard: 1st -> 5th
+    Extreme: 1st -> 6th
+    Score Lounge: 7th
+A level file is JSON as the level builder exports it, a start point and a list of objects:
+    {"name": "1st Level - Normal", "start": [413, 465], "objects": [
+        {"type": "block", "x": 0, "y": 590, "width": 590, "height": 10},
+        {"type": "door", "x": 0, "y": 0}, ...]}
+Every object has a type and a position, blocks and spikes a size, spikes and rotators a dir,
+crossbows a dx and dy and optionally the frames between their shots as timing.
+
+The first time a level is read it is compiled to a compact binary form, kept in memory and in the
+cache directory of the pack under the hash of the JSON it came from. Later reads only hash the file,
+an edited level misses the cache and is compiled again. A pack may also list compiled .bin files.
+
+Run to compile a whole pack ahead of time:
+    python levels.py [pack directory]
+"""
+import hashlib
+import json
+import os
+import struct
+import sys
+
+import game_objects
+import obstacles
+import power_ups
+
+PACK = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'assets', 'levels')
+CACHE = 'cache'
+
+KINDS = ('block', 'door', 'key', 'rotator', 'jet', 'spikes', 'crossbow', 'springboard')
+
+# magic, format version, start point, count of objects
+HEADER = struct.Struct('!4sBiiI')
+MAGIC = b'DYBL'
+VERSION = 1
+# kind, x, y, width, height, and what else the kind takes: direction or dx, dy, timing
+OBJECT = struct.Struct('!Biiiihhh')
+
+compiled: dict = {}  # content hash to (start point, records) of every level read in this process
+packs: dict = {}  # directory to its pack
+
+
+def parse(data: dict) -> tuple:
+    """
+    Start point and records of objects of a level in its JSON form
+    """
+    records = []
+    for obj in data['objects']:
+        kind = obj['type']
+        x, y = obj['x'], obj['y']
+        if kind in ('block', 'spikes'):
+            record = (x, y, obj['width'], obj['height'], obj.get('dir', 0), 0, 0)
+        elif kind == 'rotator':
+            record = (x, y, 0, 0, obj['dir'], 0, 0)
+        elif kind == 'crossbow':
+            record = (x, y, 0, 0, obj['dx'], obj['dy'], obj.get('timing', 0))
+        elif kind in KINDS:
+            record = (x, y, 0, 0, 0, 0, 0)
+        else:
+            raise ValueError(f'unknown object type {kind}')
+        records.append((KINDS.index(kind),) + record)
+    return tuple(data['start']), tuple(records)
+
+
+def encode(start: tuple, records: tuple) -> bytes:
+    return HEADER.pack(MAGIC, VERSION, *start, len(records)) + b''.join(OBJECT.pack(*r) for r in records)
+
+
+def decode(data: bytes) -> tuple:
+    magic, version, x, y, count = HEADER.unpack_from(data)
+    if magic != MAGIC or version != VERSION:
+        raise ValueError('not a compiled level of this version')
+    return (x, y), tuple(OBJECT.iter_unpack(data[HEADER.size:HEADER.size + count * OBJECT.size]))
+
+
+def create(world, record: tuple):
+    """
+    Build the object a record describes into a world
+    """
+    kind, x, y, w, h, a, b, c = record
+    kind = KINDS[kind]
+    if kind == 'block':
+        return game_objects.Block(world, x, y, w, h)
+    elif kind == 'door':
+        return game_objects.Door(world, x, y)
+    elif kind == 'key':
+        return power_ups.Key(world, x, y)
+    elif kind == 'rotator':
+        return power_ups.GravityRotator(world, x, y, a)
+    elif kind == 'jet':
+        return power_ups.Jet(world, x, y)
+    elif kind == 'spikes':
+        return obstacles.Spikes(world, x, y, w, h, a)
+    elif kind == 'crossbow':
+        return obstacles.Crossbow(world, x, y, a, b, c or None)
+    return game_objects.SpringBoard(world, x, y)
+
+
+class Pack:
+    """
+    The list of levels of a pack, levels themselves are read only when asked for
+    """
+    def __init__(self, path: str = PACK) -> None:
+        self.path = path
+        with open(os.path.join(path, 'pack.json')) as f:
+            self.files: list = json.load(f)['levels']
+
+    def __len__(self) -> int:
+        return len(self.files)
+
+    def read(self, i: int) -> tuple:
+        """
+        Start point and records of the i-th level, compiled and cached the first time
+        """
+        with open(os.path.join(self.path, self.files[i]), 'rb') as f:
+            data = f.read()
+        if self.files[i].endswith('.bin'):
+            return decode(data)
+
+        key = hashlib.sha1(data).hexdigest()
+        level = compiled.get(key)
+        if level is not None:
+            return level
+
+        cached = os.path.join(self.path, CACHE, key + '.bin')
+        try:
+            with open(cached, 'rb') as f:
+                level = decode(f.read())
+        except (OSError, ValueError, struct.error):
+            level = parse(json.loads(data))
+            self.store(cached, encode(*level))
+
+        compiled[key] = level
+        return level
+
+    @staticmethod
+    def store(path: str, data: bytes) -> None:
+        """
+        Write a compiled level to the cache, several servers may do so at once
+        """
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            temporary = f'{path}.{os.getpid()}'
+            with open(temporary, 'wb') as f:
+                f.write(data)
+            os.replace(temporary, path)
+        except OSError:  # a read only pack is compiled in memory alone
+            pass
+
+    def build(self, world, i: int) -> tuple:
+        """
+        Build the i-th level into a world, return its start point and objects
+        """
+        start, records = self.read(i)
+        world.crossbows = 0
+        return start, tuple(create(world, record) for record in records)
+
+
+def load(path: str = PACK) -> Pack:
+    """
+    The pack in a directory, read once per process
+    """
+    if path not in packs:
+        packs[path] = Pack(path)
+    return packs[path]
+
+
+if __name__ == '__main__':
+    pack = Pack(sys.argv[1] if len(sys.argv) > 1 else PACK)
+    for i, name in enumerate(pack.files):
+        start, records = pack.read(i)
+        print(f'{name:<24}{len(records):>6} objects{HEADER.size + len(records) * OBJECT.size:>8} bytes')
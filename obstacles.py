@@ -1,16 +1,41 @@
-import game
+import math
 
+from consts import *
 from game_objects import GameObject
-from power_ups import PowerUp
+
+
+def first_overlap(p: float, s: float, v: float, c: float, e: float) -> int:
+    """
+    First step k from 1 on at which [p + k * v, p + k * v + s] overlaps (c, c + e), None if never
+    """
+    if v > 0:
+        def reached(k): return p + k * v + s > c
+
+        def passed(k): return p + k * v >= c + e
+        k = math.floor((c - s - p) / v) + 1
+    else:
+        def reached(k): return p + k * v < c + e
+
+        def passed(k): return p + k * v + s <= c
+        k = math.floor((c + e - p) / v) + 1
+
+    # the division only estimates it, positions are compared the way the arrow compares them
+    k = max(k, 1)
+    while k > 1 and reached(k - 1):
+        k -= 1
+    while not reached(k):
+        k += 1
+    return None if passed(k) else k
 
 
 class Obstacle(GameObject):
     """
     Obstacle super class, represents an obstacle that tackles the player
     """
+    group: int = GROUP_HAZARD
 
-    def __init__(self, t: int, c: tuple, x: float, y: float, w: int, h: int) -> None:
-        super().__init__(t, c, x, y, w, h)
+    def __init__(self, world, t: int, c: tuple, x: float, y: float, w: int, h: int) -> None:
+        super().__init__(world, t, c, x, y, w, h)
 
 
 class Spikes(Obstacle):
@@ -19,19 +44,29 @@ class Spikes(Obstacle):
     Spikes stab the player and kills it
     """
 
-    def __init__(self, x: float, y: float, w: int, h: int, d: int) -> None:
-        super().__init__(game.Game.TYPE_SPIKES, game.Game.COLOR_SPIKES, x, y, w, h)
+    def __init__(self, world, x: float, y: float, w: int, h: int, d: int) -> None:
+        super().__init__(world, TYPE_SPIKES, COLOR_SPIKES, x, y, w, h)
 
         self.dir: int = d
 
+    def state(self) -> tuple:
+        return super().state(), self.dir
+
+    def restore(self, state: tuple) -> None:
+        base, self.dir = state
+        super().restore(base)
+
+    def sprite(self) -> None:
+        return None
+
     def on_rotation_stop(self) -> None:
         """
         Act on Gravity Rotator effect end
         """
-        if self.rotation_dir == game.Game.LEFT:
+        if self.rotation_dir == LEFT:
             if self.times_rotated % 2 == 0:
                 self.dir *= -1
-        elif self.rotation_dir == game.Game.RIGHT:
+        elif self.rotation_dir == RIGHT:
             if self.times_rotated % 2 != 0:
                 self.dir *= -1
 
@@ -49,7 +84,7 @@ class Spikes(Obstacle):
                     points: tuple = ((x, y), (x + 5, y - self.height), (x + 10, y))
 
                 pyg.draw.polygon(surface, self.color, points)
-                pyg.draw.polygon(surface, game.Game.COLOR_BLACK, points, 1)
+                pyg.draw.polygon(surface, COLOR_BLACK, points, 1)
         else:
             self.y = int(self.y)
             for y in range(self.y, self.y + self.height, 10):
@@ -60,23 +95,22 @@ class Spikes(Obstacle):
                     points: tuple = ((x, y), (x - self.width, y + 5), (x, y + 10))
 
                 pyg.draw.polygon(surface, self.color, points)
-                pyg.draw.polygon(surface, game.Game.COLOR_BLACK, points, 1)
+                pyg.draw.polygon(surface, COLOR_BLACK, points, 1)
 
 
 class Crossbow(GameObject):
     """
     A wooden claw that launches arrows at undetermined rate
     """
-    count = 0
+    group: int = GROUP_CROSSBOW
 
     class Arrow(GameObject):
         """
         A launched arrow, moves in a straight line
         Kills player on impact
         """
-
-        def __init__(self, x: float, y: float, dx: int, dy: int) -> None:
-            super().__init__(game.Game.TYPE_ARROW, game.Game.COLOR_ARROW, x, y, 30, 9)
+        def __init__(self, world, x: float, y: float, dx: int, dy: int) -> None:
+            super().__init__(world, TYPE_ARROW, COLOR_ARROW, x, y, 30, 9)
 
             self.ox: float = x
             self.oy: float = y
@@ -89,43 +123,74 @@ class Crossbow(GameObject):
 
             self.is_launched: bool = False
 
+            # frames of flight until it hits an object, from its origin and from where it is now,
+            # None if it never does. Both hold until the level changes its layout
+            self.impact: int = None
+            self.remaining: int = None
+            self.layout: int = None
+
         def get_rect(self) -> tuple:
             return self.x, self.y + 3, self.width, self.height - 6
 
-        def render(self, surface, pyg) -> None:
+        def state(self) -> tuple:
+            return super().state(), self.is_launched
+
+        def restore(self, state: tuple) -> None:
+            base, self.is_launched = state
+            super().restore(base)
+            self.layout = None  # its flight is worked out again
+
+        def sprite(self) -> tuple:
+            return self.sprites.arrow(self.vx, self.vy), (self.x, self.y)
+
+        def path(self) -> tuple:
             """
-            Render arrow to the screen
+            Start and end of the line the arrow flies along
             """
-            image: pyg.Surface = game.Game.sprite_arrow
-            image_surf: pyg.Surface = image.convert()
-            image_surf = pyg.transform.rotate(
-                image_surf,
-                0 if self.vx > 0 else
-                180 if self.vx < 0 else
-                90 if self.vy < 0 else
-                270 if self.vy > 0 else 0
-            )
-            image_surf.set_colorkey((255, 255, 255))
-            surface.blit(image_surf, (self.x, self.y))
+            steps: int = self.impact if self.impact is not None else (WIDTH + HEIGHT) // 10
+            start: tuple = (self.ox + self.width / 2, self.oy + self.height / 2)
+            return start, (start[0] + self.vx * steps, start[1] + self.vy * steps)
+
+        def flight(self, x: float, y: float) -> int:
+            """
+            Frames until the arrow flying on from a position hits an object, None if it never does
+            """
+            frames = None
+            for group in ARROW_STOPS:
+                for b in self.world.groups[group]:
+                    # it moves along one axis only, on the other it has to be level with the object
+                    if self.vx != 0 and y < b.y + b.height and y + self.height > b.y:
+                        k = first_overlap(x, self.width, self.vx, b.x, b.width)
+                    elif self.vy != 0 and x < b.x + b.width and x + self.width > b.x:
+                        k = first_overlap(y, self.height, self.vy, b.y, b.height)
+                    else:
+                        continue
+
+                    if k is not None and (frames is None or k < frames):
+                        frames = k
+            return frames
 
         def update(self) -> None:
             """
-            Update arrow movement
+            Update arrow movement, it flies until the frame its flight was worked out to end
             """
+            if self.layout != self.world.layout:
+                self.layout = self.world.layout
+                self.impact = self.flight(self.ox, self.oy)
+                self.remaining = self.flight(self.x, self.y)
+
             self.x += self.vx
             self.y += self.vy
 
-            for b in game.Game.levels[game.Game.current_level]:
-                if b.type == game.Game.TYPE_CROSSBOW or b.__class__.__bases__[0] == PowerUp:
-                    continue
-
-                if self.is_colliding(b.get_rect()):
+            if self.remaining is not None:
+                self.remaining -= 1
+                if not self.remaining:
                     self.x, self.y = self.ox, self.oy
                     self.is_launched = False
-                    break
+                    self.remaining = self.impact
 
-    def __init__(self, x: float, y: float, dx: int, dy: int) -> None:
-        super().__init__(game.Game.TYPE_CROSSBOW, game.Game.COLOR_CROSSBOW, x, y, 40, 30)
+    def __init__(self, world, x: float, y: float, dx: int, dy: int, timing: int = None) -> None:
+        super().__init__(world, TYPE_CROSSBOW, COLOR_CROSSBOW, x, y, 40, 30)
 
         if dy != 0:
             self.width, self.height = self.height, self.width
@@ -133,14 +198,35 @@ class Crossbow(GameObject):
         x = x + (self.width - 30) / 2 if dx != 0 else x + (self.width - 29) / 2 + 10
         y = y + (self.height - 29) / 2 + 10 if dx != 0 else y + (self.height - 30) / 2
 
-        self.arrow: Crossbow.Arrow = Crossbow.Arrow(x, y, dx, dy)
+        self.arrow: Crossbow.Arrow = Crossbow.Arrow(world, x, y, dx, dy)
         self.count: int = 0
 
         self.dx: int = dx
         self.dy: int = dy
 
-        self.timing = 40 + (Crossbow.count * 5 if Crossbow.count % 3 == 0 else Crossbow.count * -5)
-        Crossbow.count += 1
+        # frames between shots, unless the level says otherwise crossbows of a level shoot at
+        # staggered rates, counted in the order they are built
+        if timing is None:
+            timing = 40 + (world.crossbows * 5 if world.crossbows % 3 == 0 else world.crossbows * -5)
+        self.timing: int = timing
+        world.crossbows += 1
+
+    def state(self) -> tuple:
+        return super().state(), self.count, self.arrow.state()
+
+    def restore(self, state: tuple) -> None:
+        base, self.count, arrow = state
+        super().restore(base)
+        self.arrow.restore(arrow)
+
+    def get_bounds(self) -> tuple:
+        """
+        The crossbow and its arrow, touching the arrow counts as touching the crossbow
+        """
+        return self.get_rect(), self.arrow.get_rect()
+
+    def sprite(self) -> None:
+        return None
 
     def draw_shape(self, surface, pyg) -> None:
         """
@@ -148,16 +234,16 @@ class Crossbow(GameObject):
         """
         if self.dx != 0:
             pyg.draw.rect(surface, self.color, (self.x, self.y, self.width, 10))
-            pyg.draw.rect(surface, game.Game.COLOR_BLACK, (self.x, self.y, self.width, 10), 2)
+            pyg.draw.rect(surface, COLOR_BLACK, (self.x, self.y, self.width, 10), 2)
 
             pyg.draw.rect(surface, self.color, (self.x, self.y + 20, self.width, 10))
-            pyg.draw.rect(surface, game.Game.COLOR_BLACK, (self.x, self.y + 20, self.width, 10), 2)
+            pyg.draw.rect(surface, COLOR_BLACK, (self.x, self.y + 20, self.width, 10), 2)
         else:
             pyg.draw.rect(surface, self.color, (self.x, self.y, 10, self.height))
-            pyg.draw.rect(surface, game.Game.COLOR_BLACK, (self.x, self.y, 10, self.height), 2)
+            pyg.draw.rect(surface, COLOR_BLACK, (self.x, self.y, 10, self.height), 2)
 
             pyg.draw.rect(surface, self.color, (self.x + 20, self.y, 10, self.height))
-            pyg.draw.rect(surface, game.Game.COLOR_BLACK, (self.x + 20, self.y, 10, self.height), 2)
+            pyg.draw.rect(surface, COLOR_BLACK, (self.x + 20, self.y, 10, self.height), 2)
 
         x: float = self.x + self.width - 10 if self.dx < 0 else \
             self.x if self.dx > 0 else \
@@ -171,7 +257,7 @@ class Crossbow(GameObject):
         h = self.height - 20 if self.dx != 0 else 10 if self.dy != 0 else 0
 
         pyg.draw.rect(surface, self.color, (x, y, w, h))
-        pyg.draw.rect(surface, game.Game.COLOR_BLACK, (x, y, w, h), 2)
+        pyg.draw.rect(surface, COLOR_BLACK, (x, y, w, h), 2)
 
     def update(self) -> None:
         """
@@ -187,12 +273,4 @@ class Crossbow(GameObject):
 
         if self.arrow.is_launched:
             self.arrow.update()
-
-    def render(self, surface, pyg) -> None:
-        """
-        Render crossbow and arrow to the screen
-        """
-        super().render(surface, pyg)
-
-        if self.arrow.is_launched:
-            self.arrow.render(surface, pyg)
+            self.world.grid.move(self)
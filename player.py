@@ -1,7 +1,6 @@
-import game
 import game_objects
-import obstacles
-import power_ups
+
+from consts import *
 
 
 class Player(game_objects.GameObject):
@@ -9,11 +8,11 @@ class Player(game_objects.GameObject):
     Player class, sets the actual player, and the "shadows" (other players on the game)
     """
 
-    def __init__(self, color) -> None:
+    def __init__(self, world, color) -> None:
         super().__init__(
-            game.Game.TYPE_PLAYER, color,
-            game.Game.start_points[game.Game.current_level][0],
-            game.Game.start_points[game.Game.current_level][1], 40, 40
+            world, TYPE_PLAYER, color,
+            world.start_points[world.current_level][0],
+            world.start_points[world.current_level][1], 40, 40
         )
 
         self.vx: float = 0
@@ -24,20 +23,26 @@ class Player(game_objects.GameObject):
         self.is_jumping: bool = False
         self.is_alive: bool = True
         self.keep_jumping: bool = False
+        self.is_up_pressed: bool = False
+        self.keys: int = 0
 
         self.total_keys_collected: int = 0
 
-        self.before: tuple = ()
+        self.before: int = 0
         self.s_modifier: float = -10
         self.s_direction: int = 1
         self.level = 0
 
+        # distance still to smooth out after a server correction, the player is drawn this far off
+        self.error_x: float = 0
+        self.error_y: float = 0
+
     def reset(self) -> None:
         """
         On contact with obstacle, reset the level
         """
-        self.x = game.Game.start_points[game.Game.current_level][0]
-        self.y = game.Game.start_points[game.Game.current_level][1]
+        self.x = self.world.start_points[self.world.current_level][0]
+        self.y = self.world.start_points[self.world.current_level][1]
 
         self.vx = 0
         self.vy = 0
@@ -45,26 +50,41 @@ class Player(game_objects.GameObject):
         self.is_standing = False
         self.is_floating = False
         self.is_jumping = False
-        game.Game.is_floating = False
 
         self.total_keys_collected = 0
 
-        self.before = ()
+        self.before = 0
         self.s_modifier = -10
         self.s_direction = 1
 
+    def state(self) -> tuple:
+        """
+        Everything the next frames of physics depend on, to compare with and restore from the server
+        """
+        floated: int = self.world.frame - self.before if self.is_floating else 0
+        return (self.x, self.y, self.vx, self.vy, self.is_standing, self.is_floating, self.is_jumping,
+                self.keep_jumping, self.is_up_pressed, self.keys, floated, self.total_keys_collected)
+
+    def restore(self, state: tuple) -> None:
+        """
+        Continue from a state taken by state()
+        """
+        (self.x, self.y, self.vx, self.vy, self.is_standing, self.is_floating, self.is_jumping,
+         self.keep_jumping, self.is_up_pressed, self.keys, floated, self.total_keys_collected) = state
+        self.before = self.world.frame - floated
+
     def passed(self) -> bool:
         """
         Checks if player exits the "boundaries" (the screen size)
         """
-        return self.x + self.width <= 0 or self.x >= game.Game.WIDTH or \
-               self.y + self.height <= 0 or self.y >= game.Game.HEIGHT
+        return self.x + self.width <= 0 or self.x >= WIDTH or \
+               self.y + self.height <= 0 or self.y >= HEIGHT
 
     def die(self) -> None:
         """
         Kills player, unless is in God Testing Mode
         """
-        if not game.Game.god_mode:
+        if not self.world.god_mode:
             tvx: float = self.vx
             self.reset()
             self.vx = tvx
@@ -79,7 +99,7 @@ class Player(game_objects.GameObject):
             if self.vy > -1:
                 self.vy += -0.02
         else:
-            self.vy += game.Game.GRAVITY
+            self.vy += GRAVITY
 
     def jump(self) -> None:
         """
@@ -99,7 +119,7 @@ class Player(game_objects.GameObject):
         """
         On interaction with "Jet", levitate and float of the ground, ignoring gravity
         """
-        self.before = (game.Game.frame_cycles, game.Game.frame_count)
+        self.before = self.world.frame
         self.is_floating = True
 
         if self.vy < 0:
@@ -133,35 +153,65 @@ class Player(game_objects.GameObject):
         if self.vx == 3:
             self.vx = 0
 
+    def control(self, keys: int) -> None:
+        """
+        Act on the keys pressed and released since the previous frame
+        """
+        pressed: int = keys & ~self.keys
+        released: int = self.keys & ~keys
+        self.keys = keys
+
+        if pressed & KEY_LEFT:
+            self.start_left()
+        if pressed & KEY_RIGHT:
+            self.start_right()
+        if pressed & KEY_UP and self.is_standing:
+            self.is_up_pressed = True
+
+        if released & KEY_LEFT:
+            self.stop_left()
+        if released & KEY_RIGHT:
+            self.stop_right()
+        if released & KEY_UP:
+            self.is_up_pressed = False
+        if released & KEY_RETRY:
+            self.die()
+
+        if self.is_up_pressed:
+            self.jump()
+
     def check_miscellaneous(self, b) -> bool:
         """
         Check for intersection with miscellaneous obstacles
         """
-        if b.type == game.Game.TYPE_CROSSBOW:
+        group: int = b.group
+        if group == GROUP_SOLID or group == GROUP_SPRINGBOARD:
+            return False
+
+        if group == GROUP_CROSSBOW:
             if self.is_colliding(b.arrow.get_rect()):
                 self.die()
                 return True
+            return False
 
         if b.is_colliding(self.get_rect()):
-            if b.__class__.__bases__[0] == power_ups.PowerUp:
+            if group == GROUP_PICKUP:
+                # collected ones are dropped from the level, but may still be nearby in this frame
                 if not b.collected:
                     b.collect()
 
-                    if b.type == game.Game.TYPE_KEY:
+                    if b.type == TYPE_KEY:
                         self.total_keys_collected += 1
-                    elif b.type == game.Game.TYPE_JET:
+                    elif b.type == TYPE_JET:
                         self.float()
-                    return True
-                else:
-                    return True
+                return True
 
-            elif b.__class__.__bases__[0] == obstacles.Obstacle:
+            elif group == GROUP_HAZARD:
                 self.die()
                 return True
 
-            elif b.type == game.Game.TYPE_DOOR:
-                if b.is_open:
-                    return True
+            elif b.is_open:  # door
+                return True
 
         return False
 
@@ -176,12 +226,12 @@ class Player(game_objects.GameObject):
         """
         Update the player state in this frame
         """
-        if game.Game.is_rotating:
-            self.vy -= game.Game.GRAVITY
+        if self.world.is_rotating:
+            self.vy -= GRAVITY
             return
 
         if self.is_floating:
-            if (game.Game.frame_cycles * 60 + game.Game.frame_count) - (self.before[0] * 60 + self.before[1]) >= 240:
+            if self.world.frame - self.before >= 240:
                 self.is_floating = False
 
         self.update_pos()
@@ -191,8 +241,13 @@ class Player(game_objects.GameObject):
 
         self.is_standing = False
 
+        # resolving a collision only moves the player back towards where it was, between the two
+        # positions is all it can touch this frame
+        nearby: list = self.world.grid.query(min(self.x, prev_x), min(self.y, prev_y),
+                                             abs(self.vx) + self.width, abs(self.vy) + self.height)
+
         # check intersections on vertical axis
-        for b in game.Game.get_level_objects():
+        for b in nearby:
             if self.check_miscellaneous(b):
                 continue
 
@@ -209,7 +264,7 @@ class Player(game_objects.GameObject):
 
                     self.y = b.y - self.height
 
-                    if b.type == game.Game.TYPE_SPRINGBOARD:
+                    if b.group == GROUP_SPRINGBOARD:
                         if self.vy < 15:
                             self.vy *= -1.1
                         else:
@@ -220,7 +275,7 @@ class Player(game_objects.GameObject):
                         self.is_jumping = False
 
         # check intersections on horizontal axis
-        for b in game.Game.get_level_objects():
+        for b in nearby:
             if self.check_miscellaneous(b):
                 continue
 
@@ -232,7 +287,7 @@ class Player(game_objects.GameObject):
                     self.x = b.x + b.width
 
                     if self.vy > 0 and not self.is_floating:
-                        self.vy -= game.Game.GRAVITY / 2
+                        self.vy -= GRAVITY / 2
                 elif self.vx > 0 and prev_x + self.width <= b.x:
                     if self.is_standing and self.y == b.y:
                         continue
@@ -240,7 +295,7 @@ class Player(game_objects.GameObject):
                     self.x = b.x - self.width
 
                     if self.vy > 0 and not self.is_floating:
-                        self.vy -= game.Game.GRAVITY / 2
+                        self.vy -= GRAVITY / 2
 
         if self.vx == 0 and self.vy == 0:
             self.s_modifier += 0.2 * self.s_direction
@@ -249,9 +304,5 @@ class Player(game_objects.GameObject):
         else:
             self.s_modifier = -10
 
-    def render(self, surface, pyg) -> None:
-        """
-        Render the player to the screen
-        """
-        pyg.draw.rect(surface, self.color, self.get_rect())
-        pyg.draw.rect(surface, game.Game.COLOR_BLACK, self.get_rect(), 2)
+    def sprite(self) -> tuple:
+        return self.sprites.rect(self.color, self.width, self.height), (self.x + self.error_x, self.y + self.error_y)
@@ -1,5 +1,4 @@
-import game
-
+from consts import *
 from game_objects import GameObject
 
 
@@ -7,17 +6,27 @@ class PowerUp(GameObject):
     """
     Power up class representing the effects and keys which are distributed across all levels
     """
-    def __init__(self, t: int, c: tuple, x: float, y: float) -> None:
-        super().__init__(t, c, x, y, 20, 20)
+    group: int = GROUP_PICKUP
+
+    def __init__(self, world, t: int, c: tuple, x: float, y: float) -> None:
+        super().__init__(world, t, c, x, y, 20, 20)
 
         self.degree: int = 0
         self.collected: bool = False
 
+    def state(self) -> tuple:
+        return super().state(), self.degree, self.collected
+
+    def restore(self, state: tuple) -> None:
+        base, self.degree, self.collected = state
+        super().restore(base)
+
     def collect(self) -> None:
         """
-        Mark power up as collected
+        Mark power up as collected, nothing touches it anymore
         """
         self.collected = True
+        self.world.drop(self)
 
         self.on_collect()
 
@@ -37,73 +46,44 @@ class PowerUp(GameObject):
         if self.degree == 360:
             self.degree = 0
 
-    def render(self, surface, pyg) -> None:
+    def sprite(self) -> tuple:
+        """
+        The power up spun by its degree and where it goes, centered on the square at its position
+        """
+        frame = self.sprites.spin(self.color, self.width, self.height, self.degree)
+        return frame, frame.get_rect(center=(int(self.x) + self.width // 2, int(self.y) + self.height // 2))
+
+    def draw(self, surface, pyg) -> None:
         """
-        Render the power up to the screen
+        Draw the power up, nothing once collected
         """
-        if self.collected:
-            return
-
-        if self.is_rotating:
-            sur: pyg.Surface = pyg.Surface((game.Game.WIDTH, game.Game.HEIGHT))
-            sur.fill(game.Game.COLOR_BACKGROUND)
-            sur.set_colorkey(game.Game.COLOR_BACKGROUND)
-
-            ssur: pyg.Surface = pyg.Surface((self.width, self.height))
-            ssur.fill(game.Game.COLOR_BACKGROUND)
-            ssur.set_colorkey((0, 255, 0))
-
-            pyg.draw.rect(ssur, self.color, (0, 0, self.width, self.height))
-            pyg.draw.rect(ssur, game.Game.COLOR_BLACK, (0, 0, self.width, self.height), 1)
-
-            sblitted: pyg.Surface = sur.blit(ssur, (self.x, self.y))
-            srotated: pyg.Surface = pyg.transform.rotate(ssur, self.degree)
-            srotated_rect: pyg.Surface = srotated.get_rect()
-            srotated_rect.center = sblitted.center
-            sur.blit(srotated, srotated_rect)
-
-            rotated: pyg.Surface = pyg.transform.rotate(sur, self.angle)
-            rotated_rect: pyg.Surface = rotated.get_rect()
-            rotated_rect.center = (game.Game.WIDTH / 2, game.Game.HEIGHT / 2)
-            surface.blit(rotated, rotated_rect)
-        else:
-            sur: pyg.Surface = pyg.Surface((self.width, self.height))
-            sur.fill(game.Game.COLOR_BACKGROUND)
-            sur.set_colorkey((0, 255, 0))
-
-            pyg.draw.rect(sur, self.color, (0, 0, self.width, self.height))
-            pyg.draw.rect(sur, game.Game.COLOR_BLACK, (0, 0, self.width, self.height), 1)
-
-            blitted: pyg.Surface = surface.blit(sur, (self.x, self.y))
-            rotated: pyg.Surface = pyg.transform.rotate(sur, self.degree)
-            rotated_rect: pyg.Surface = rotated.get_rect()
-            rotated_rect.center = blitted.center
-            surface.blit(rotated, rotated_rect)
+        if not self.collected:
+            super().draw(surface, pyg)
 
 
 class Key(PowerUp):
     """
     A power up used to unlock doors and progress levels
     """
-    def __init__(self, x: float, y: float) -> None:
-        super().__init__(game.Game.TYPE_KEY, game.Game.COLOR_KEY, x, y)
+    def __init__(self, world, x: float, y: float) -> None:
+        super().__init__(world, TYPE_KEY, COLOR_KEY, x, y)
 
 
 class GravityRotator(PowerUp):
     """
     A power up used to rotate the level by 90 degrees
     """
-    def __init__(self, x: float, y: float, rd: int) -> None:
-        super().__init__(game.Game.TYPE_GRAVITY_ROTATOR, game.Game.COLOR_GRAVITY_ROTATOR, x, y)
+    def __init__(self, world, x: float, y: float, rd: int) -> None:
+        super().__init__(world, TYPE_GRAVITY_ROTATOR, COLOR_GRAVITY_ROTATOR, x, y)
         self.rotation_dir: int = rd
 
     def on_collect(self) -> None:
-        game.Game.rotate(self.rotation_dir)
+        self.world.rotate(self.rotation_dir)
 
 
 class Jet(PowerUp):
     """
     A power up used to levitate and float off the ground
     """
-    def __init__(self, x: float, y: float) -> None:
-        super().__init__(game.Game.TYPE_JET, game.Game.COLOR_JET, x, y)
+    def __init__(self, world, x: float, y: float) -> None:
+        super().__init__(world, TYPE_JET, COLOR_JET, x, y)
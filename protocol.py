@@ -0,0 +1,314 @@
+"""
+Wire protocol shared by the server and the game client
+
+Binary frames are a 2 byte length prefix (counting the type byte and the payload),
+a message type byte, and a fixed layout struct payload.
+The original string protocol remains as a fallback, binary is negotiated during the color handshake:
+the client answers the color with "ACK:<version>", a server supporting that version replies with
+an ACK frame and both sides switch to frames, otherwise both keep talking strings.
+A server with a UDP channel then sends a session token, clients may send their positions and acks
+as datagrams of the token followed by frames, and receive snapshots as datagrams of frames.
+Binary clients send a heartbeat frame every HEARTBEAT_INTERVAL, so a server may drop players
+it did not hear from for READ_TIMEOUT, even while they wait in a menu.
+Spectators connect to a separate port and send a watch frame naming a room, the server answers
+with a begin frame and then streams the room's snapshots and scores, spectators send nothing else.
+A server running the physics itself announces it before the begin frame, the client then sends
+the keys it holds every frame as input frames over TCP, and the positions it sends are ignored.
+With every snapshot such a server sends each player its own physics state after the last input applied,
+which the client checks its prediction against.
+"""
+import struct
+from collections import OrderedDict
+
+from consts import *
+
+VERSION = 1
+
+LENGTH = struct.Struct('!H')
+HEADER = struct.Struct('!HB')
+
+# message types
+MSG_ACK = 1
+MSG_DIFF = 2
+MSG_DIFFICULTY = 3
+MSG_BEGIN = 4
+MSG_POS = 5
+MSG_POSITIONS = 6
+MSG_DONE = 7
+MSG_SCORES = 8
+MSG_SCORE = 9
+MSG_QUIT = 10
+MSG_SNAPSHOT = 11
+MSG_SNAPSHOT_ACK = 12
+MSG_TOKEN = 13
+MSG_HEARTBEAT = 14
+MSG_WATCH = 15
+MSG_INPUT = 16
+MSG_SIMULATE = 17
+MSG_STATE = 18
+
+# payload layouts
+LEVEL = struct.Struct('!B')
+POSITION = struct.Struct('!Bff')  # level, x, y
+PLAYER_POSITION = struct.Struct('!BBff')  # color, level, x, y
+SCORE_VALUE = struct.Struct('!I')
+PLAYER_SCORE = struct.Struct('!BI')  # color, score
+SNAPSHOT = struct.Struct('!IIB')  # sequence, base sequence (0 for none), bitmask of present colors
+SNAPSHOT_ENTRY = struct.Struct('!BBhh')  # color, level, quantized x, quantized y
+SEQUENCE = struct.Struct('!I')
+TOKEN = struct.Struct('!QH')  # session token, UDP port
+DATAGRAM = struct.Struct('!Q')  # session token prefixing the frames of every client datagram
+ROOM = struct.Struct('!I')  # room id, 0 for the newest room
+INPUT = struct.Struct('!IB')  # input sequence, bitmask of held keys
+# last input applied, level, x, y, vx, vy, bitmask of flags, held keys, frames floated, keys collected,
+# bitmask of the pickups of the level collected. Doubles, so the client continues from exactly the state the server has
+STATE = struct.Struct('!IBddddBBIBQ')
+
+# fixed point positions, 1/32 px keeps int16 within -1024..1024 px,
+# the 600x600 playfield plus the margin players walk through when leaving by a door
+SCALE = 32
+HISTORY = 64
+
+
+def frame(msg_type: int, payload: bytes = b'') -> bytes:
+    """
+    Wrap a payload in a frame
+    """
+    return HEADER.pack(len(payload) + 1, msg_type) + payload
+
+
+CONFIRM = frame(MSG_ACK)
+
+
+class Decoder:
+    """
+    Reassemble frames from a byte stream regardless of how TCP split or merged them
+    """
+    def __init__(self) -> None:
+        self.buffer = bytearray()
+
+    def feed(self, data: bytes) -> list:
+        """
+        Consume received bytes, return every complete (type, payload) frame
+        """
+        self.buffer += data
+
+        frames = []
+        offset = 0
+        while len(self.buffer) - offset >= HEADER.size:
+            length, msg_type = HEADER.unpack_from(self.buffer, offset)
+            end = offset + LENGTH.size + length
+            if len(self.buffer) < end:
+                break
+
+            frames.append((msg_type, bytes(self.buffer[offset + HEADER.size:end])))
+            offset = end
+
+        del self.buffer[:offset]
+        return frames
+
+
+def offer() -> str:
+    """
+    Client answer to the color message, offering the binary protocol
+    """
+    return f'{ACK}:{VERSION}'
+
+
+def negotiate(answer: str) -> bool:
+    """
+    Check if a client answered the color message with an offer this server supports
+    """
+    split = answer.split(':')
+    return split[0] == ACK and str(VERSION) in split[1:]
+
+
+def encode_position(level: int, x: float, y: float) -> bytes:
+    return POSITION.pack(level, x, y)
+
+
+def decode_position(payload: bytes) -> tuple:
+    return POSITION.unpack(payload)
+
+
+def encode_positions(positions: dict) -> bytes:
+    return b''.join(PLAYER_POSITION.pack(COLORS.index(color), *positions[color]) for color in positions)
+
+
+def decode_positions(payload: bytes) -> dict:
+    return {COLORS[color]: (level, x, y) for color, level, x, y in PLAYER_POSITION.iter_unpack(payload)}
+
+
+def encode_score(score: int) -> bytes:
+    return SCORE_VALUE.pack(score)
+
+
+def decode_score(payload: bytes) -> int:
+    return SCORE_VALUE.unpack(payload)[0]
+
+
+def encode_scores(scores: dict) -> bytes:
+    return b''.join(PLAYER_SCORE.pack(COLORS.index(color), scores[color]) for color in scores)
+
+
+def decode_scores(payload: bytes) -> dict:
+    return {COLORS[color]: score for color, score in PLAYER_SCORE.iter_unpack(payload)}
+
+
+def encode_state(seq: int, level: int, state: tuple, pickups: int) -> bytes:
+    """
+    Encode a player's physics state as taken by Player.state, with the pickups of its level collected
+    """
+    x, y, vx, vy, standing, floating, jumping, keep_jumping, up_pressed, keys, floated, collected = state
+    flags = standing | floating << 1 | jumping << 2 | keep_jumping << 3 | up_pressed << 4
+    return STATE.pack(seq, level, x, y, vx, vy, flags, keys, floated, collected, pickups)
+
+
+def decode_state(payload: bytes) -> tuple:
+    """
+    Decode a player's physics state as (last input applied, level, state for Player.restore, pickups collected)
+    """
+    seq, level, x, y, vx, vy, flags, keys, floated, collected, pickups = STATE.unpack(payload)
+    return seq, level, (x, y, vx, vy, bool(flags & 1), bool(flags & 2), bool(flags & 4), bool(flags & 8),
+                        bool(flags & 16), keys, floated, collected), pickups
+
+
+def quantize(position: tuple) -> tuple:
+    level, x, y = position
+    return level, max(-32768, min(32767, round(x * SCALE))), max(-32768, min(32767, round(y * SCALE)))
+
+
+def dequantize(state: tuple) -> tuple:
+    level, x, y = state
+    return level, x / SCALE, y / SCALE
+
+
+class SnapshotEncoder:
+    """
+    Number room snapshots and encode each as a delta against the snapshot a client acknowledged
+    Players whose quantized position did not change since that snapshot are omitted
+    Each snapshot is encoded once per base, clients with the same base share the same bytes
+    """
+    def __init__(self) -> None:
+        self.seq = 0
+        self.states = OrderedDict()
+        self.frames = {}
+
+    def push(self, positions: dict) -> None:
+        """
+        Record the room state of a new tick
+        """
+        self.seq += 1
+        self.states[self.seq] = {COLORS.index(color): quantize(positions[color]) for color in positions}
+        self.frames = {}
+
+        if len(self.states) > HISTORY:
+            self.states.popitem(last=False)
+
+    def encode(self, acked: int) -> bytes:
+        """
+        Frame of the latest snapshot for a client which acknowledged the given sequence
+        Unknown or expired acknowledgements get a full snapshot
+        """
+        base = self.states.get(acked)
+        if base is None:
+            acked, base = 0, {}
+
+        encoded = self.frames.get(acked)
+        if encoded is None:
+            present = 0
+            entries = []
+            for color, value in self.states[self.seq].items():
+                present |= 1 << color
+                if base.get(color) != value:
+                    entries.append(SNAPSHOT_ENTRY.pack(color, *value))
+
+            encoded = frame(MSG_SNAPSHOT, SNAPSHOT.pack(self.seq, acked, present) + b''.join(entries))
+            self.frames[acked] = encoded
+        return encoded
+
+
+class SnapshotDecoder:
+    """
+    Rebuild room snapshots from deltas, client side counterpart of SnapshotEncoder
+    """
+    def __init__(self) -> None:
+        self.seq = 0
+        self.states = OrderedDict()
+
+    def decode(self, payload: bytes) -> dict:
+        """
+        Apply a snapshot, return the positions of present players
+        Return None for stale snapshots or ones based on a state this client no longer has
+        """
+        seq, base_seq, present = SNAPSHOT.unpack_from(payload)
+        base = self.states.get(base_seq) if base_seq else {}
+        if seq <= self.seq or base is None:
+            return None
+
+        state = {color: base[color] for color in base if present & 1 << color}
+        for color, level, x, y in SNAPSHOT_ENTRY.iter_unpack(payload[SNAPSHOT.size:]):
+            state[color] = (level, x, y)
+
+        self.seq = seq
+        self.states[seq] = state
+        if len(self.states) > HISTORY:
+            self.states.popitem(last=False)
+
+        return {COLORS[color]: dequantize(state[color]) for color in state}
+
+    def ack(self) -> bytes:
+        """
+        Frame acknowledging the latest applied snapshot
+        """
+        return frame(MSG_SNAPSHOT_ACK, SEQUENCE.pack(self.seq))
+
+
+def string_positions(positions: dict) -> str:
+    """
+    Compose a string message containing all positions of players
+    """
+    pos_msg = ''
+    for key in positions.keys():
+        pos_msg += f':{key}:{positions[key]}'
+    return f'{POS}{pos_msg}'
+
+
+def parse_string_positions(msg: str) -> dict:
+    """
+    Parse a string message containing all positions of players
+    """
+    dic = {}
+    data = msg.split(':')[1:]
+    for i in range(0, len(data) - 1, 2):
+        data_list = data[i + 1][1:-1].split(', ')
+        dic[data[i]] = (int(data_list[0]), float(data_list[1]), float(data_list[2]))
+    return dic
+
+
+def string_scores(scores: dict) -> str:
+    """
+    Compose a string message containing all scores of players
+    """
+    score_msg = ''
+    for key in scores.keys():
+        score_msg += f':{key}:{scores[key]}'
+    return f'{SCORE}{score_msg}'
+
+
+def parse_string_scores(msg: str) -> dict:
+    """
+    Parse a string message containing all scores of players
+    """
+    msg_split = msg.split(':')[1:]
+    return {msg_split[i]: int(msg_split[i + 1]) for i in range(0, len(msg_split) - 1, 2)}
+
+
+def parse_string_position(msg: str) -> tuple:
+    """
+    Parse a "level:x:y" string, optionally prefixed by DONE
+    """
+    split = msg.split(':')
+    if split[0] == DONE:
+        split = split[1:]
+    return int(split[0]), float(split[1]), float(split[2])
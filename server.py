@@ -1,7 +1,10 @@
+import argparse
 import random
 import socket
 import threading
+from collections import deque
 
+import protocol
 from consts import *
 
 
@@ -9,6 +12,76 @@ def thread(function):
     return threading.Thread(target=function)
 
 
+class Outbox(threading.Thread):
+    """
+    Send queue of one connection, so a slow player only delays what is sent to them
+    Control messages are sent in order, of the positions only the newest waits
+    """
+    def __init__(self, csocket, limit=SEND_LIMIT):
+        super().__init__(daemon=True)
+        self.socket = csocket
+        self.limit = limit
+
+        self.condition = threading.Condition()
+        self.control = deque()
+        self.size = 0
+        self.latest = None
+        self.closed = False
+
+    def put(self, data):
+        """
+        Queue a control message, a player who let the limit fill up is disconnected
+        """
+        with self.condition:
+            if self.size + len(data) > self.limit:
+                self.shutdown()
+                return
+
+            self.control.append(data)
+            self.size += len(data)
+            self.condition.notify()
+
+    def replace(self, data):
+        """
+        Queue positions, replacing positions not sent yet
+        """
+        with self.condition:
+            self.latest = data
+            self.condition.notify()
+
+    def run(self):
+        while True:
+            with self.condition:
+                while not self.closed and not self.control and self.latest is None:
+                    self.condition.wait()
+                if self.closed:
+                    return
+
+                data = b''.join(self.control) + (self.latest or b'')
+                self.control.clear()
+                self.size = 0
+                self.latest = None
+
+            try:
+                self.socket.sendall(data)
+            except socket.error:
+                self.shutdown()
+                return
+
+    def shutdown(self):
+        """
+        Stop sending and wake the room thread reading from this connection
+        """
+        with self.condition:
+            self.closed = True
+            self.condition.notify()
+
+        try:
+            self.socket.shutdown(socket.SHUT_RDWR)
+        except socket.error:
+            pass
+
+
 class Player:
     """
     Simplify interaction with player client
@@ -18,59 +91,223 @@ class Player:
         self.color = color
         self.score = 0
 
-        self.send(f'{self.color}')
-        self.recv()  # ACK
+        self.decoder = protocol.Decoder()
+        self.frames = deque()
+
+        # every read and write gives up after the deadline instead of blocking the room forever
+        self.socket.settimeout(READ_TIMEOUT)
+        self.outbox = Outbox(csocket)
+        self.outbox.start()
+
+        try:
+            self.send(f'{self.color}')
+            self.binary = protocol.negotiate(self.recv())  # ACK
+        except socket.error:
+            self.outbox.shutdown()
+            raise
+
+        if self.binary:
+            self.outbox.put(protocol.CONFIRM)
+
+    def request_difficulty(self):
+        """
+        Ask the player to choose the difficulty
+        """
+        if self.binary:
+            self.send_frame(protocol.MSG_DIFF)
+            return protocol.LEVEL.unpack(self.recv_frame()[1])[0]
+
+        # string clients send nothing while the player chooses
+        self.send(DIFF)
+        self.socket.settimeout(None)
+        try:
+            data = self.recv()
+            if not data:
+                raise ConnectionError(f'{self.color} disconnected')
+            return int(data)
+        finally:
+            self.socket.settimeout(READ_TIMEOUT)
 
     def begin(self, level):
-        self.send(f'{BEGIN}:{level}')
-        self.recv()  # ACK
+        if self.binary:
+            self.send_frame(protocol.MSG_BEGIN, protocol.LEVEL.pack(level))
+            self.recv_frame()  # ACK
+        else:
+            self.send(f'{BEGIN}:{level}')
+            self.recv()  # ACK
+
+    def send_positions(self, positions):
+        if self.binary:
+            self.outbox.replace(protocol.frame(protocol.MSG_POSITIONS, protocol.encode_positions(positions)))
+        else:
+            self.outbox.replace(protocol.string_positions(positions).encode())
+
+    def send_scores(self, scores):
+        if self.binary:
+            self.send_frame(protocol.MSG_SCORES, protocol.encode_scores(scores))
+        else:
+            self.send(protocol.string_scores(scores))
+
+    def recv_update(self):
+        """
+        Receive the player's reply to positions, as (POS | DONE | QUIT, (level, x, y))
+        Raises socket.error once the connection is closed or silent for READ_TIMEOUT
+        """
+        if self.binary:
+            msg_type, payload = self.recv_frame()
+
+            if msg_type == protocol.MSG_POS:
+                return POS, protocol.decode_position(payload)
+            elif msg_type == protocol.MSG_DONE:
+                return DONE, protocol.decode_position(payload)
+            return QUIT, None
+
+        data = self.recv()
+        if not data:
+            raise ConnectionError(f'{self.color} disconnected')
+        elif data.startswith(DONE):
+            return DONE, protocol.parse_string_position(data)
+        elif QUIT in data:
+            return QUIT, None
+        return POS, protocol.parse_string_position(data)
+
+    def recv_score(self):
+        if self.binary:
+            return protocol.decode_score(self.recv_frame()[1])
+        return int(self.recv())
 
     def send(self, msg):
-        self.socket.send(msg.encode())
+        self.outbox.put(msg.encode())
 
     def recv(self, size=1024):
         return self.socket.recv(size).decode()
 
+    def send_frame(self, msg_type, payload=b''):
+        self.outbox.put(protocol.frame(msg_type, payload))
+
+    def close(self):
+        self.outbox.shutdown()
+        self.socket.close()
+
+    def recv_frame(self):
+        """
+        Receive the next whole (type, payload) frame, skipping heartbeats
+        """
+        while True:
+            while not self.frames:
+                data = self.socket.recv(SIZE)
+                if not data:
+                    raise ConnectionError(f'{self.color} disconnected')
+                self.frames.extend(self.decoder.feed(data))
+
+            msg_type, payload = self.frames.popleft()
+            if msg_type != protocol.MSG_HEARTBEAT:
+                return msg_type, payload
+
 
 class Server:
     """
     Accept players and direct to rooms
+    Players wait in one room until it is full or, with a fill timeout, until the timeout passes
     """
-    def __init__(self):
+    def __init__(self, address=ADDRESS, reuse_port=False, fill_timeout=None):
         self.socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-        self.socket.bind(ADDRESS)
+        self.socket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        if reuse_port:
+            # several worker processes accept on the same port, the kernel balances connections
+            self.socket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEPORT, 1)
+        self.socket.bind(address)
         self.socket.listen()
 
-        self.rooms = [Room()]
+        self.fill_timeout = fill_timeout
+        self.lock = threading.Lock()
+        self.rooms = []  # rooms playing, a room drops itself once it is over
+        self.waiting = Room(self.drop)
 
     def run(self):
         """
-        Accept and connect players to rooms
+        Accept players and hand each to a thread of its own for the handshake
         """
         while True:
             client, _ = self.socket.accept()
 
-            if self.current().is_full():
-                self.rooms.append(Room())
+            with self.lock:
+                room = self.waiting
+                color = room.reserve()
+                if room.is_full():
+                    # every color is taken, later players wait in the next room
+                    self.waiting = Room(self.drop)
+
+            thread(lambda: self.admit(client, room, color)).start()
+
+    def admit(self, client, room, color):
+        """
+        Handshake with an accepted player, then seat it in the room its color belongs to (own thread)
+        A slow or silent client only holds up itself, the lock is taken once the handshake is over
+        """
+        try:
+            player = Player(client, color)
+        except socket.error:
+            # left or stayed silent during the handshake
+            client.close()
+            player = None
+
+        with self.lock:
+            if room.ident is not None:
+                # the fill timeout started the room without this player
+                if player is not None:
+                    player.close()
+                return
+
+            room.seat(player, color)
+            if room is not self.waiting and not room.joining and room.players:
+                self.start(room)
+            elif len(room.players) == 1 and player is not None and self.fill_timeout:
+                threading.Timer(self.fill_timeout, self.expire, (room,)).start()
+
+    def expire(self, room):
+        """
+        Start a room which did not fill in time (timer thread)
+        """
+        with self.lock:
+            if room.ident is None:
+                if room is self.waiting:
+                    self.waiting = Room(self.drop)
+                self.start(room)
+
+    def start(self, room):
+        """
+        Play a room closed to new players
+        """
+        self.rooms.append(room)
+        room.start()
 
-            self.current().add_player(client)
+    def drop(self, room):
+        """
+        Forget a room which is over (room thread)
+        """
+        with self.lock:
+            self.rooms.remove(room)
 
     def current(self):
-        return self.rooms[-1]
+        return self.waiting
 
 
 class Room(threading.Thread):
     """
     Interacts with all four players to ensure everyone gets data
     """
-    def __init__(self):
+    def __init__(self, done=None):
         super().__init__()
+        self.done = done  # called with the room once it is over
 
         self.difficulty = 4
         self.players = []
-        self.colors = [PURPLE, RED, GREEN, BROWN]
+        self.colors = [PURPLE, RED, GREEN, BROWN]  # colors not taken yet
         random.shuffle(self.colors)
+        self.joining = 0  # players still shaking hands
 
+        self.lock = threading.Lock()  # guards positions and scores, every player thread reads and writes them
         self.positions = {
             PURPLE: (0, .0, .0),  # (level, x, y)
             RED: (0, .0, .0),
@@ -88,10 +325,34 @@ class Room(threading.Thread):
     def run(self):
         """
         Request difficulty and start game
+        Every player is closed once the room is over, however it ended
+        """
+        try:
+            difficulty = self.choose_difficulty()
+            if difficulty is not None:
+                self.difficulty = difficulty
+                self.play()
+        except (socket.error, ValueError):
+            pass
+        finally:
+            for player in self.players:
+                player.close()
+            if self.done is not None:
+                self.done(self)
+
+    def choose_difficulty(self):
+        """
+        Ask the first player still connected to choose the difficulty, the next one asked if they leave
+        None once every player left
         """
-        self.players[0].send(DIFF)
-        self.difficulty = int(self.players[0].recv())
-        self.play()
+        while self.players:
+            player = self.players[0]
+            try:
+                return player.request_difficulty()
+            except (socket.error, ValueError):
+                self.players.remove(player)
+                self.evict(player)
+        return None
 
     def play(self):
         """
@@ -99,66 +360,110 @@ class Room(threading.Thread):
         """
         threads = []
         for player in self.players:
-            ct = thread(lambda: self.track_player(player))
+            ct = thread(lambda p=player: self.track_player(p))
             threads.append(ct)
             ct.start()
 
-        while True:
-            if all([not t.is_alive() for t in threads]):
-                break
+        for t in threads:
+            t.join()
 
     def track_player(self, player):
         """
         Communicate with specific player (threaded)
+        A player who quits, disconnects or stays silent for READ_TIMEOUT is evicted
         """
-        player.begin(self.difficulty)
+        try:
+            player.begin(self.difficulty)
 
-        while True:
-            try:
-                # compose a message containing all positions of players
-                pos_msg = ''
-                for key in self.positions.keys():
-                    pos_msg += f':{key}:{self.positions[key]}'
-                player.send(f'{POS}{pos_msg}')
-                data = player.recv()
-
-                if data.startswith(DONE):
-                    # compose a message containing all scores of players
-                    score_msg = ''
-                    for key in self.scores.keys():
-                        score_msg += f':{key}:{self.scores[key]}'
-                    player.send(f'{SCORE}{score_msg}')
-                    score = int(player.recv())
+            while True:
+                with self.lock:
+                    player.send_positions(self.positions)
+                kind, position = player.recv_update()
+
+                if kind == DONE:
+                    with self.lock:
+                        player.send_scores(self.scores)
+                    score = player.recv_score()
 
                     # receive player score and location in lounge
-                    self.scores[player.color] = score
-                    split = data.split(':')[1:]
-                    self.positions[player.color] = (int(split[0]), float(split[1]), float(split[2]))
+                    with self.lock:
+                        self.scores[player.color] = score
+                        self.positions[player.color] = position
                     continue
-                elif QUIT in data:
-                    player.socket.close()
+                elif kind == QUIT:
                     break
 
                 # update positions
-                data_list = data.split(':')
-                self.positions[player.color] = (int(data_list[0]), float(data_list[1]), float(data_list[2]))
-            except socket.error:
-                pass
+                with self.lock:
+                    self.positions[player.color] = position
+        except (socket.error, ValueError):
+            pass
+        finally:
+            self.evict(player)
+
+    def evict(self, player):
+        """
+        Remove a player who left from the positions sent to the others
+        Scores of players who finished stay on the leaderboard
+        """
+        player.close()
+
+        with self.lock:
+            self.positions.pop(player.color, None)
+            if not self.scores.get(player.color):
+                self.scores.pop(player.color, None)
+
+    def reserve(self):
+        """
+        Set a color aside for a player whose handshake is starting
+        """
+        self.joining += 1
+        return self.colors.pop()
 
-    def add_player(self, csocket):
+    def seat(self, player, color):
         """
-        Add a player to the room
+        Add a player whose handshake is over, None gives its color back
         """
-        self.players.append(Player(csocket, self.colors[len(self.players) - 1]))
-        if self.is_full():
-            self.start()
+        self.joining -= 1
+        if player is None:
+            self.colors.append(color)
+        else:
+            self.players.append(player)
 
     def is_full(self):
         """
-        Check if room is full
+        Check if every color of the room is taken, by a player or a handshake
         """
-        return len(self.players) == 4
+        return not self.colors
 
 
 if __name__ == '__main__':
-    Server().run()
+    parser = argparse.ArgumentParser(description='Dyber game server')
+    parser.add_argument('--async', dest='use_async', action='store_true',
+                        help='serve all rooms from a single asyncio event loop')
+    parser.add_argument('--port', type=int, default=ADDRESS[1])
+    parser.add_argument('--tick', type=float, default=None, metavar='HZ',
+                        help='with --async, broadcast snapshots at a fixed rate instead of ping-pong')
+    parser.add_argument('--udp', action='store_true',
+                        help='with --tick, offer clients a UDP channel for positions on the same port')
+    parser.add_argument('--simulate', action='store_true',
+                        help='with --tick, run the physics on the server from the keys binary players send')
+    parser.add_argument('--spectate', type=int, default=None, metavar='PORT',
+                        help='with --tick, let spectators watch rooms from this port')
+    parser.add_argument('--fill-timeout', type=float, default=None, metavar='SECONDS',
+                        help='start a room with fewer than four players once its first player waited this long')
+    parser.add_argument('--workers', type=int, default=None, metavar='N',
+                        help='fork N worker processes sharing the port, worker i gets UDP port PORT + i')
+    args = parser.parse_args()
+
+    address = (ADDRESS[0], args.port)
+    if args.workers:
+        import launcher
+        launcher.Supervisor(args.workers, address, args.use_async, args.tick, args.udp, args.fill_timeout,
+                            args.simulate).run()
+    elif args.use_async:
+        import async_server
+        async_server.Server(address, args.tick, args.udp, fill_timeout=args.fill_timeout,
+                            spectate_port=args.spectate, simulate=args.simulate).run()
+    else:
+        Server(address, fill_timeout=args.fill_timeout).run()
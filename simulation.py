@@ -0,0 +1,504 @@
+"""
+Game physics and level state without pygame
+
+The game client plays one world, an authoritative server steps one world per player of a room
+from the keys each of them holds every frame, so both run exactly the same physics.
+"""
+import math
+from threading import Lock, Thread
+
+import levels
+import player
+
+from consts import *
+
+
+class Grid:
+    """
+    Uniform grid over the objects of a level, each cell lists the objects reaching into it
+    Collision checks look only at the cells around them instead of at every object of the level,
+    objects which move tell the grid so
+    """
+    def __init__(self, objects: tuple, size: int = GRID_CELL) -> None:
+        self.objects = objects
+        self.size = size
+        self.cells: dict = {}  # (column, row) to the indices of the objects in it
+        self.entries: dict = {}  # object to its index and the spans of cells it is listed in
+        self.refresh()
+
+    def refresh(self) -> None:
+        """
+        List every object where it is now, the ones removed before included
+        """
+        for i, obj in enumerate(self.objects):
+            if obj not in self.entries:
+                self.entries[obj] = (i, ())
+            self.move(obj)
+
+    def remove(self, obj) -> None:
+        """
+        Stop listing an object
+        """
+        entry = self.entries.pop(obj, None)
+        if entry is not None:
+            for cell in self.cover(entry[1]):
+                self.cells[cell].discard(entry[0])
+
+    @staticmethod
+    def cover(spans: tuple) -> set:
+        """
+        Cells within spans of columns and rows
+        """
+        return {(column, row) for first, last, top, bottom in spans
+                for column in range(first, last + 1) for row in range(top, bottom + 1)}
+
+    def move(self, obj) -> None:
+        """
+        List an object in the cells it reaches into now
+        """
+        entry = self.entries.get(obj)
+        if entry is None:  # not in the level of this grid
+            return
+
+        i, before = entry
+        size = self.size
+        after = tuple((int(x // size), int((x + w) // size), int(y // size), int((y + h) // size))
+                      for x, y, w, h in obj.get_bounds())
+        if after == before:  # most moves stay within the same cells
+            return
+
+        old, new = self.cover(before), self.cover(after)
+        for cell in old - new:
+            self.cells[cell].discard(i)
+        for cell in new - old:
+            self.cells.setdefault(cell, set()).add(i)
+        self.entries[obj] = (i, after)
+
+    def query(self, x: float, y: float, w: float, h: float) -> list:
+        """
+        Objects which may collide with a rectangle, in level order as a scan of the level meets them
+        """
+        found = set()
+        cells = self.cells
+        size = self.size
+        # a pixel more around it, the renderer rounds spikes to whole pixels
+        for column in range(int((x - 1) // size), int((x + w + 1) // size) + 1):
+            for row in range(int((y - 1) // size), int((y + h + 1) // size) + 1):
+                cell = cells.get((column, row))
+                if cell:
+                    found |= cell
+        objects = self.objects
+        return [objects[i] for i in sorted(found)]
+
+
+class World:
+    """
+    One player's run through the levels, everything the level objects read and change
+    Levels are built from the pack when first played, until then they are None. A world played in
+    the background prepares the next level on a thread of its own while the door of the current one opens,
+    and hands its objects to on_prepare there, for the game client to draw its scenery ahead too
+    """
+    def __init__(self, pack: levels.Pack = None, background: bool = False, on_prepare=None) -> None:
+        self.pack: levels.Pack = pack or levels.load()
+        self.loading: Lock = Lock()  # the renderer may ask for a level the game is about to build
+        self.background: bool = background
+        self.prepared: dict = {}  # level to its index built ahead of entering it
+        self.on_prepare = on_prepare  # called with the objects of a level prepared, on the thread preparing it
+
+        self.levels: list = []
+        self.initial: list = []  # state of every object of each level as it was built
+        self.start_points: list = []
+        self.current_level: int = 0
+        self.level_count: int = None  # levels kept for the chosen difficulty, all before it is chosen
+
+        self.total_keys: int = 0
+        self.gate = None
+        self.grid: Grid = None
+        self.groups: dict = {}  # group to the objects of the current level in it, pickups while not collected
+        self.active: list = []  # objects of the current level which change every frame, in level order
+        self.layout: int = 0  # changes whenever objects arrows stop at move, arrows work out their flight again
+        self.scenery: int = 0  # changes whenever the scenery of the level moves, it is drawn again
+        self.crossbows: int = 0  # crossbows built so far into the level being built
+
+        self.is_rotating: bool = False
+        self.god_mode: bool = False
+        self.frame: int = 0
+
+        self.generate_levels()
+        self.init_level()
+
+    def build_level(self, i: int) -> tuple:
+        """
+        Build a level from the pack, keeping its start point and its state to restart it from
+        """
+        with self.loading:
+            if self.levels[i] is None:
+                self.start_points[i], lvl = self.pack.build(self, i)
+                self.initial[i] = tuple(obj.state() for obj in lvl)
+                self.levels[i] = lvl
+            return self.levels[i]
+
+    @staticmethod
+    def index(objects: tuple, grid: Grid = None) -> tuple:
+        """
+        Collision grid, groups and active objects of a level, with its count of keys and its door if it has one
+        A grid given over the same objects is refreshed instead of built again
+        """
+        if grid is None:
+            grid = Grid(objects)
+        else:
+            grid.refresh()
+        groups = {group: [] for group in GROUPS}
+        for obj in objects:
+            groups[obj.group].append(obj)
+        active = [obj for obj in objects if obj.group in ACTIVE]
+        total_keys = sum(obj.type == TYPE_KEY for obj in groups[GROUP_PICKUP])
+        return grid, groups, active, total_keys, groups[GROUP_DOOR][-1] if groups[GROUP_DOOR] else None
+
+    def prepare(self, i: int) -> None:
+        """
+        Build and index a level before it is entered, kept unless it was entered in the meantime
+        """
+        objects = self.build_level(i)
+        index = self.index(objects)
+        with self.loading:
+            if self.current_level >= i or self.levels[i] is not objects:
+                return
+            self.prepared[i] = index
+        if self.on_prepare is not None:
+            self.on_prepare(objects)
+
+    def prefetch(self, i: int) -> None:
+        """
+        Prepare a level on a thread of its own, in a world played in the background
+        """
+        if self.background and i < len(self.levels) and i not in self.prepared:
+            Thread(target=self.prepare, args=(i,), daemon=True).start()
+
+    def generate_levels(self) -> None:
+        """
+        Forget all levels built, dropping the ones beyond the chosen difficulty
+        """
+        count = len(self.pack) if self.level_count is None else min(self.level_count, len(self.pack))
+        self.levels = [None] * count
+        self.initial = [None] * count
+        self.start_points = [None] * count
+
+    def init_level(self) -> None:
+        """
+        Initialize keys, groups and the collision grid for current level
+        """
+        objects = self.get_level_objects()
+        with self.loading:
+            prepared = self.prepared.pop(self.current_level, None)
+        if prepared is not None and prepared[0].objects is objects:  # prepared while the door opened
+            self.grid, self.groups, self.active, self.total_keys, gate = prepared
+        else:
+            # restarted, most objects are where they were
+            grid = self.grid if self.grid is not None and self.grid.objects is objects else None
+            self.grid, self.groups, self.active, self.total_keys, gate = self.index(objects, grid)
+        if gate is not None:  # the lounge has no door of its own
+            self.gate = gate
+        self.layout += 1
+        self.scenery += 1
+
+        # objects collected before, in a level played again after a correction
+        for obj in self.groups[GROUP_PICKUP][:]:
+            if obj.collected:
+                self.drop(obj)
+
+    def moved(self, obj) -> None:
+        """
+        Keep track of an object of the current level which moved or changed its size
+        """
+        self.grid.move(obj)
+        if obj.group in ARROW_STOPS:
+            self.layout += 1
+        if obj.group in SCENERY:
+            self.scenery += 1
+
+    def drop(self, obj) -> None:
+        """
+        Take an object out of the groups and the grid of the current level
+        """
+        group = self.groups.get(obj.group)
+        if group is not None and obj in group:
+            group.remove(obj)
+            self.grid.remove(obj)
+
+    def restart_level(self) -> None:
+        """
+        Return every object of the current level to the state it was built in
+        """
+        for obj, state in zip(self.get_level_objects(), self.initial[self.current_level]):
+            obj.restore(state)
+        self.init_level()
+
+    def level_state(self) -> tuple:
+        """
+        Everything about the current level that changes while it is played, to continue from with restore_level
+        """
+        return self.is_rotating, tuple(obj.state() for obj in self.get_level_objects())
+
+    def collected(self) -> int:
+        """
+        The pickups of the current level collected, a bit for each in level order
+        """
+        pickups = [obj for obj in self.get_level_objects() if obj.group == GROUP_PICKUP]
+        return sum(1 << i for i, obj in enumerate(pickups) if obj.collected)
+
+    def restore_level(self, level: int, state: tuple = None, collected: int = None) -> None:
+        """
+        Continue in a level from a state taken by level_state, from where its objects are without one,
+        with the pickups a bitmask taken by collected gives collected
+        """
+        self.current_level = level
+        objects = self.get_level_objects()
+        if state is not None:
+            self.is_rotating, states = state
+            for obj, s in zip(objects, states):
+                obj.restore(s)
+        if collected is not None:
+            pickups = [obj for obj in objects if obj.group == GROUP_PICKUP]
+            for i, obj in enumerate(pickups):
+                obj.collected = bool(collected >> i & 1)
+        self.init_level()
+
+    def get_level_objects(self) -> tuple:
+        """
+        Return level objects
+        """
+        lvl = self.levels[self.current_level]
+        if lvl is None:
+            lvl = self.build_level(self.current_level)
+        return lvl
+
+    def rotate(self, rd: int) -> None:
+        """
+        Rotate the level
+        """
+        self.is_rotating = True
+
+        for b in self.get_level_objects():
+            b.rotate_gravity(rd)
+
+    def begin(self, p: player.Player, difficulty: int) -> None:
+        """
+        Leave the lobby for the first level, keeping as many levels as the difficulty asks for
+        """
+        self.level_count = difficulty + 2
+        del self.levels[self.level_count:]
+        del self.initial[self.level_count:]
+        del self.start_points[self.level_count:]
+        self.next_level(p)
+
+        # keys held through the lobby count as pressed again, as they do for a player starting fresh
+        p.keys = 0
+        p.is_up_pressed = False
+
+    def next_level(self, p: player.Player) -> None:
+        """
+        Transition to the next level
+        """
+        self.current_level += 1
+        self.init_level()
+        p.reset()
+
+    def in_lounge(self) -> bool:
+        """
+        Check if the player reached the scoreboard room
+        """
+        return self.current_level == len(self.levels) - 1
+
+    def step(self, p: player.Player, keys: int) -> None:
+        """
+        Advance one frame with the keys the player holds
+        """
+        p.control(keys)
+        self.update(p)
+
+    def update(self, p: player.Player) -> None:
+        """
+        Update the player and the game objects in level
+        Blocks, spikes and springboards only change while the level turns, the rest of the time
+        only the active objects are updated
+        """
+        if self.advance(p):
+            for obj in self.get_level_objects() if self.is_rotating else self.active:
+                obj.update()
+
+    def advance(self, p: player.Player) -> bool:
+        """
+        Update the player alone, return False when it died and the level was restarted
+        """
+        self.frame += 1
+
+        p.fall()
+        p.update()
+
+        if not p.is_alive:
+            self.restart_level()
+            p.is_alive = True
+            return False
+
+        if p.total_keys_collected >= self.total_keys:
+            if not self.gate.is_animating_closure:
+                self.gate.open()
+                self.prefetch(self.current_level + 1)
+
+            if p.passed():
+                self.next_level(p)
+        return True
+
+
+class Simulation:
+    """
+    Authoritative game of one room, every player runs through a world of its own
+    Players only see each other's positions, so their worlds never interact
+    """
+    def __init__(self, difficulty: int) -> None:
+        self.difficulty = difficulty
+        self.players: dict = {}
+        self.inputs: dict = {}  # color to the sequence of its last input applied
+        self.credit: dict = {}  # color to (frames it may still step, time they were counted at)
+        self.scores: dict = {}  # color to the seconds it took to reach the lounge
+
+    def join(self, color: str, now: float = 0) -> tuple:
+        """
+        Start a player in the first level, return its position
+        """
+        world = World()
+        p = player.Player(world, PLAYER_COLORS[color])
+        world.begin(p, self.difficulty)
+        self.players[color] = p
+        self.inputs[color] = 0
+        self.credit[color] = (INPUT_BURST, now)
+        return world.current_level, p.x, p.y
+
+    def leave(self, color: str) -> None:
+        self.players.pop(color, None)
+        self.inputs.pop(color, None)
+        self.credit.pop(color, None)
+
+    def admit(self, color: str, seq: int, now: float) -> bool:
+        """
+        Check whether a player's input may be applied at the given time
+        An input not newer than the last one applied is a replay, and a player steps at most FPS frames
+        a second, INPUT_BURST of them ahead, however fast it sends
+        """
+        if seq <= self.inputs[color]:
+            return False
+
+        credit, then = self.credit[color]
+        credit = min(credit + (now - then) * FPS, INPUT_BURST)
+        if credit < 1:
+            self.credit[color] = credit, now
+            return False
+        self.credit[color] = credit - 1, now
+        return True
+
+    def step(self, color: str, seq: int, keys: int) -> tuple:
+        """
+        Advance a player's world one frame with its input, return its position
+        The score of a player reaching the lounge is the seconds of frames it took
+        """
+        p = self.players[color]
+        p.world.step(p, keys)
+        self.inputs[color] = seq
+        if color not in self.scores and p.world.in_lounge():
+            self.scores[color] = p.world.frame // FPS
+        return p.world.current_level, p.x, p.y
+
+    def state(self, color: str) -> tuple:
+        """
+        A player's authoritative state as (last input applied, level, player state, pickups collected)
+        """
+        p = self.players[color]
+        return self.inputs[color], p.world.current_level, p.state(), p.world.collected()
+
+
+class Prediction:
+    """
+    Client side of an authoritative game, inputs move the own player at once instead of a round trip later
+    Each input is kept in a ring buffer with the state it was predicted to lead to, until the server
+    acknowledges it with the state it really led to. When the two differ the player continues from the
+    server's state with the inputs still unacknowledged played again on top of it, and the jump this
+    makes on screen is smoothed out over the next frames, CORRECTION_BUDGET px per frame
+    The server sends the state of the player and which pickups of its level it collected, the rest of
+    the level is restored as this client had it after the input. The inputs are played again through
+    the whole world, objects included, so deaths and doors along the way restart and change levels as
+    they did on the server. Objects changed in other ways, such as a level only one side restarted or
+    turned, stay as the client has them
+    """
+    def __init__(self, p: player.Player, size: int = INPUT_BUFFER) -> None:
+        self.player = p
+        self.size = size
+        # (sequence, keys, level, predicted state, pickups collected, level state) at sequence % size
+        self.inputs: list = [None] * size
+
+        self.seq: int = 0  # latest input
+        self.acked: int = 0  # latest input the server applied
+        self.corrections: int = 0
+
+    def record(self, keys: int) -> int:
+        """
+        Keep an input just applied locally with the state it led to, return its sequence
+        """
+        self.seq += 1
+        self.keep(self.seq, keys)
+        return self.seq
+
+    def keep(self, seq: int, keys: int) -> None:
+        """
+        Keep an input with the state of the player and of its level it led to
+        """
+        world = self.player.world
+        self.inputs[seq % self.size] = (seq, keys, world.current_level, self.player.state(), world.collected(),
+                                        world.level_state())
+
+    def reconcile(self, seq: int, level: int, state: tuple, collected: int) -> None:
+        """
+        Check the server's state after an input against the prediction, replay the later inputs if wrong
+        States arriving out of order are ignored
+        """
+        if seq <= self.acked:
+            return
+        self.acked = seq
+
+        entry = self.inputs[seq % self.size]
+        known = entry is not None and entry[0] == seq and entry[2] == level
+        if known and entry[3] == state and entry[4] == collected:
+            return
+
+        p = self.player
+        world = p.world
+        drawn = (world.current_level, p.x + p.error_x, p.y + p.error_y)
+        self.corrections += 1
+
+        # inputs pushed out of the buffer are lost, continue from the server's state without them
+        pending = []
+        if self.seq - seq < self.size:
+            pending = [self.inputs[s % self.size] for s in range(seq + 1, self.seq + 1)]
+
+        world.frame -= len(pending)
+        world.restore_level(level, entry[5] if known else None, collected)
+        p.restore(state)
+        for s, keys, *_ in pending:
+            world.step(p, keys)
+            self.keep(s, keys)
+
+        p.error_x, p.error_y = drawn[1] - p.x, drawn[2] - p.y
+        if drawn[0] != world.current_level or math.hypot(p.error_x, p.error_y) > SNAP_DISTANCE:
+            p.error_x = p.error_y = 0
+
+    def smooth(self) -> None:
+        """
+        Draw the player closer to where it really is, by at most CORRECTION_BUDGET px
+        """
+        p = self.player
+        error = math.hypot(p.error_x, p.error_y)
+        if error <= CORRECTION_BUDGET:
+            p.error_x = p.error_y = 0
+        else:
+            p.error_x -= p.error_x / error * CORRECTION_BUDGET
+            p.error_y -= p.error_y / error * CORRECTION_BUDGET
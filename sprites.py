@@ -0,0 +1,119 @@
+"""
+Surfaces objects are drawn from, made once and looked up every frame instead of drawn and turned
+"""
+import collections
+import threading
+
+from consts import *
+
+SPIN_KEY = (0, 255, 0)  # colour key of the frames of spinning pickups
+
+
+class Sprites:
+    """
+    The arrow in each of the four directions it flies, and frames made the first time they are drawn:
+    spinning pickups by colour, size and angle, plain rectangles by colour and size and lines. At most
+    SPRITE_CACHE frames are kept, the least recently drawn go first. The renderer and the thread
+    drawing the next level ahead share them
+    """
+    def __init__(self, pyg, arrow, step: int = SPRITE_STEP, size: int = SPRITE_CACHE) -> None:
+        self.pyg = pyg
+        self.step = step
+        self.size = size
+
+        arrow = arrow.convert()
+        self.arrows: dict = {}  # (dx, dy) to the arrow flying that way
+        for direction, angle in (((1, 0), 0), ((-1, 0), 180), ((0, -1), 90), ((0, 1), 270)):
+            sprite = pyg.transform.rotate(arrow, angle)
+            sprite.set_colorkey((255, 255, 255))
+            self.arrows[direction] = sprite
+
+        self.frames: collections.OrderedDict = collections.OrderedDict()  # key to the frame made for it
+        self.lock = threading.Lock()
+
+    def cached(self, key: tuple):
+        """
+        The frame made for a key, None if there is none
+        """
+        with self.lock:
+            frame = self.frames.get(key)
+            if frame is not None:
+                self.frames.move_to_end(key)
+            return frame
+
+    def keep(self, key: tuple, frame):
+        """
+        Keep a frame made for a key, forgetting the least recently drawn one past SPRITE_CACHE
+        """
+        with self.lock:
+            self.frames[key] = frame
+            if len(self.frames) > self.size:
+                self.frames.popitem(last=False)
+        return frame
+
+    def arrow(self, vx: float, vy: float):
+        """
+        The arrow flying with a velocity
+        """
+        return self.arrows[(vx > 0) - (vx < 0), (vy > 0) - (vy < 0)] if vx or vy else self.arrows[1, 0]
+
+    def rect(self, color: tuple, width: int, height: int):
+        """
+        A rectangle of a colour and size with a black outline, as objects are drawn by default
+        """
+        key = 'rect', color, width, height
+        frame = self.cached(key)
+        if frame is None:
+            frame = self.pyg.Surface((width, height)).convert()
+            self.pyg.draw.rect(frame, color, (0, 0, width, height))
+            self.pyg.draw.rect(frame, COLOR_BLACK, (0, 0, width, height), 2)
+            self.keep(key, frame)
+        return frame
+
+    def spin(self, color: tuple, width: int, height: int, degree: int):
+        """
+        A pickup of a colour and size turned by a number of degrees, centered on a surface of its own
+        """
+        key = 'spin', color, width, height, degree - degree % self.step
+        frame = self.cached(key)
+        if frame is not None:
+            return frame
+
+        pyg = self.pyg
+        square = pyg.Surface((width, height))
+        square.set_colorkey(SPIN_KEY)
+        pyg.draw.rect(square, color, (0, 0, width, height))
+        pyg.draw.rect(square, COLOR_BLACK, (0, 0, width, height), 1)
+
+        # the square stands under its turned copy, as the pickup was drawn before
+        rotated = pyg.transform.rotate(square, key[4])
+        frame = pyg.Surface(rotated.get_size()).convert()
+        frame.fill(SPIN_KEY)
+        frame.set_colorkey(SPIN_KEY)
+        frame.blit(square, (frame.get_width() // 2 - width // 2, frame.get_height() // 2 - height // 2))
+        frame.blit(rotated, (0, 0))
+        return self.keep(key, frame)
+
+    def line(self, color: tuple, start: tuple, end: tuple) -> tuple:
+        """
+        A line between two points and where it goes
+        """
+        x, y = int(min(start[0], end[0])), int(min(start[1], end[1]))
+        key = 'line', color, start, end
+        frame = self.cached(key)
+        if frame is None:
+            pyg = self.pyg
+            frame = pyg.Surface((int(abs(end[0] - start[0])) + 2, int(abs(end[1] - start[1])) + 2)).convert()
+            frame.fill(SPIN_KEY)
+            frame.set_colorkey(SPIN_KEY)
+            pyg.draw.line(frame, color, (start[0] - x, start[1] - y), (end[0] - x, end[1] - y))
+            self.keep(key, frame)
+        return frame, (x, y)
+
+    def turn(self, colors: tuple, width: int, height: int) -> None:
+        """
+        Make every frame of spinning pickups of some colours and a size ahead of drawing them
+        """
+        for color in colors:
+            for degree in range(0, 360, self.step):
+                self.spin(color, width, height, degree)